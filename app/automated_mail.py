@@ -0,0 +1,134 @@
+# automated_mail.py
+"""
+Header-based detection of bounces (DSNs) and auto-replies, so they never
+reach the LLM stages.
+
+    python app/automated_mail.py data/fixtures/automated
+"""
+import email
+import os
+import re
+import sys
+from email.utils import parseaddr
+
+DAEMON_SENDERS = {"mailer-daemon", "postmaster", "mail-daemon"}
+AUTO_PRECEDENCE = {"auto_reply", "bulk", "junk"}
+
+AUTO_SUBJECT = re.compile(
+    r"^\s*(automatic reply|auto(?:matic)?[- ]?(?:reply|response)|out of (?:the )?office"
+    r"|autoreply|abwesenheitsnotiz|r[ée]ponse automatique|respuesta autom[aá]tica|on vacation)",
+    re.IGNORECASE,
+)
+
+BOUNCE_SUBJECT = re.compile(
+    r"^\s*(delivery status notification|undeliverable|undelivered mail|mail delivery failed"
+    r"|returned mail|delivery failure|failure notice)",
+    re.IGNORECASE,
+)
+
+# header fields the reply listener must fetch for detect_automated()
+HEADER_FIELDS = (
+    "CONTENT-TYPE AUTO-SUBMITTED X-AUTOREPLY X-AUTORESPOND PRECEDENCE "
+    "RETURN-PATH X-FAILED-RECIPIENTS X-AUTO-RESPONSE-SUPPRESS"
+)
+
+
+def detect_automated(headers):
+    """
+    Returns "bounce", "auto_reply" or None for a human reply.
+    `headers` is an email.message.Message (headers only is enough).
+    """
+    content_type = (headers.get("Content-Type") or "").lower()
+    sender = parseaddr(headers.get("From") or "")[1].lower()
+    subject = headers.get("Subject") or ""
+
+    # 📮 delivery status notifications
+    if "multipart/report" in content_type:
+        return "bounce" if "delivery-status" in content_type else "auto_reply"
+    if headers.get("X-Failed-Recipients"):
+        return "bounce"
+    if sender.split("@", 1)[0] in DAEMON_SENDERS:
+        return "bounce"
+
+    # 🏖️ auto-responders (RFC 3834 and the common vendor headers)
+    auto_submitted = (headers.get("Auto-Submitted") or "").strip().lower()
+    if auto_submitted and auto_submitted != "no":
+        return "auto_reply"
+    if headers.get("X-Autoreply") or headers.get("X-Autorespond"):
+        return "auto_reply"
+    if (headers.get("Precedence") or "").strip().lower() in AUTO_PRECEDENCE:
+        return "auto_reply"
+    if (headers.get("Return-Path") or "").strip() == "<>":
+        return "bounce" if BOUNCE_SUBJECT.search(subject) else "auto_reply"
+    if headers.get("X-Auto-Response-Suppress") and AUTO_SUBJECT.search(subject):
+        return "auto_reply"
+
+    return None
+
+
+def failed_recipients(dsn_text, headers=None):
+    """
+    Addresses that a DSN reports as failed. Reads the per-recipient blocks
+    of a message/delivery-status part, plus X-Failed-Recipients if present.
+    """
+    failed = set()
+
+    if headers is not None:
+        for addr in (headers.get("X-Failed-Recipients") or "").split(","):
+            if "@" in addr:
+                failed.add(addr.strip().lower())
+
+    for block in re.split(r"\r?\n\s*\r?\n", dsn_text or ""):
+        fields = email.message_from_string(block.strip())
+        recipient = fields.get("Final-Recipient") or fields.get("Original-Recipient")
+        if not recipient:
+            continue
+        if (fields.get("Action") or "").strip().lower() != "failed":
+            continue
+        addr = recipient.split(";", 1)[-1].strip().strip("<>").lower()
+        if "@" in addr:
+            failed.add(addr)
+
+    return failed
+
+
+# ------------------------------------------------------------------------------
+# Fixture check: file names start with the expected kind
+# (bounce_*, auto_reply_*, human_*)
+# ------------------------------------------------------------------------------
+def _dsn_text(msg):
+    for part in msg.walk():
+        if part.get_content_type() == "message/delivery-status":
+            return "\n\n".join(block.as_string() for block in part.get_payload())
+    return ""
+
+
+def check_fixtures(directory):
+    failures = 0
+
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".eml"):
+            continue
+
+        with open(os.path.join(directory, name), "rb") as f:
+            msg = email.message_from_bytes(f.read())
+
+        expected = None
+        for kind in ("bounce", "auto_reply"):
+            if name.startswith(kind):
+                expected = kind
+
+        kind = detect_automated(msg)
+        detail = ""
+        if kind == "bounce":
+            detail = f" failed={sorted(failed_recipients(_dsn_text(msg), msg))}"
+
+        ok = kind == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name}: {kind}{detail}")
+
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_fixtures(sys.argv[1]) else 0)
@@ -15,6 +15,14 @@ def get_env(key: str, default=None) -> str | None:
     return value
 
 
+def get_int_env(key: str, default: int) -> int:
+    value = get_env(key)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        raise RuntimeError(f"{key} must be an integer, got {value!r}")
+
+
 # -------------------- OpenRouter --------------------
 def get_openrouter_config():
     api_key = get_env("OPENROUTER_API_KEY")
@@ -25,9 +33,19 @@ def get_openrouter_config():
             "OPENROUTER_API_KEY and OPENROUTER_MODEL are required. "
             "Please set them in Railway's environment variables or in a .env file for local development."
         )
+    # per-task routes; each falls back to OPENROUTER_MODEL, the hedge model is optional
+    routes = {}
+    for route in ("draft", "intent"):
+        prefix = f"OPENROUTER_{route.upper()}"
+        routes[route] = {
+            "model": get_env(f"{prefix}_MODEL") or model,
+            "hedge_model": get_env(f"{prefix}_HEDGE_MODEL"),
+        }
+
     return {
         "api_key": api_key,
         "model": model,
+        "routes": routes,
     }
 
 
@@ -60,7 +60,7 @@
 
 # app/database.py
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 Base = declarative_base()
@@ -114,3 +114,35 @@ def get_session_local():
         )
 
     return _SessionLocal
+
+
+def sync_schema(engine=None):
+    """
+    create_all() only creates missing tables. This also adds columns and
+    indexes that were added to existing models after their table was created.
+    New columns on existing tables must therefore be nullable.
+    """
+    engine = engine or get_engine()
+    Base.metadata.create_all(engine)
+
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}")
+                )
+                print(f"🛠️ Added column {table.name}.{column.name}")
+
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    print(f"🛠️ Added index {index.name}")
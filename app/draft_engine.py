@@ -0,0 +1,60 @@
+# draft_engine.py
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from types import SimpleNamespace
+
+import metrics
+from config import get_int_env
+
+DRAFT_CONCURRENCY = get_int_env("DRAFT_CONCURRENCY", 8)
+
+
+def snapshot_lead(lead):
+    """Plain copy of the fields the generators read; ORM objects stay on the caller's thread"""
+    return SimpleNamespace(
+        id=lead.id,
+        name=lead.name,
+        email=lead.email,
+        company=lead.company,
+        industry=lead.industry,
+        pain_points=lead.pain_points,
+        conversation_opener=lead.conversation_opener,
+        negotiation_angle=lead.negotiation_angle,
+        followup_count=lead.followup_count,
+        regenerate=bool(lead.regenerate_draft),
+    )
+
+
+def run_drafts(jobs, generate, on_result, concurrency=None):
+    """
+    Runs generate(job) on a bounded thread pool and calls
+    on_result(job, result, error) on the calling thread as each one
+    finishes, so results can be written back immediately.
+    At most 2x concurrency jobs are in flight or queued at once.
+    """
+    concurrency = max(1, concurrency or DRAFT_CONCURRENCY)
+    jobs = iter(jobs)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            while len(pending) < concurrency * 2:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                pending[pool.submit(generate, job)] = job
+
+            if not pending:
+                break
+
+            metrics.set_gauge("drafts_in_flight", len(pending))
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                on_result(job, result, error)
+
+    metrics.set_gauge("drafts_in_flight", 0)
@@ -0,0 +1,62 @@
+# draft_variants.py
+"""
+Alternate drafts from one multi-variant completion.
+
+The shown variant lives on the lead (draft_subject / draft_body) like
+any draft; all variants are kept in draft_variants so the dashboard can
+switch between them without another LLM call.
+"""
+from models import DraftVariant
+
+
+def save_drafts(session, lead, draft_type, drafts):
+    """Shows drafts[0] on the lead and replaces its stored variants (no commit)"""
+    if isinstance(drafts, tuple):
+        drafts = [drafts]   # single (subject, body) draft
+
+    clear_variants(session, lead)
+
+    for position, (subject, body) in enumerate(drafts):
+        session.add(
+            DraftVariant(
+                lead_id=lead.id,
+                position=position,
+                subject=subject,
+                body=body,
+            )
+        )
+
+    lead.draft_subject, lead.draft_body = drafts[0]
+    lead.draft_type = draft_type
+    lead.draft_ready = True
+    lead.draft_variant = 0
+
+
+def clear_variants(session, lead):
+    session.query(DraftVariant).filter(DraftVariant.lead_id == lead.id).delete(synchronize_session="fetch")
+    lead.draft_variant = None
+
+
+def variants_by_lead(session, lead_ids):
+    """{lead_id: [DraftVariant, ...] ordered by position} in one query"""
+    if not lead_ids:
+        return {}
+
+    rows = (
+        session.query(DraftVariant)
+        .filter(DraftVariant.lead_id.in_(lead_ids))
+        .order_by(DraftVariant.lead_id, DraftVariant.position)
+        .all()
+    )
+
+    variants = {}
+    for row in rows:
+        variants.setdefault(row.lead_id, []).append(row)
+    return variants
+
+
+def select_variant(lead, variant):
+    """Shows a stored variant as the lead's draft (no commit)"""
+    lead.draft_subject = variant.subject
+    lead.draft_body = variant.body
+    lead.draft_variant = variant.position
@@ -1,72 +1,91 @@
 
 # email_generator.py
-import requests
-from requests.exceptions import RequestException, Timeout
-from config import get_openrouter_config
+import re
+
+from config import get_int_env
+from llm_client import LLMError
+from llm_cache import cached_completion
+from llm_router import complete as route_completion, route_model, DRAFT
+from prompts import INITIAL_EMAIL, FOLLOWUP_EMAIL, REPLY_EMAIL
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 TIMEOUT_SECONDS = 25
 
+# drafts per completion: the dashboard's Regenerate asks for DRAFT_VARIANTS
+# to back its variant switcher; the background jobs draft one unless opted in
+DRAFT_VARIANTS = max(1, get_int_env("DRAFT_VARIANTS", 3))
+JOB_DRAFT_VARIANTS = max(1, get_int_env("JOB_DRAFT_VARIANTS", 1))
+
+# a marker line is "VARIANT 2:" alone (markdown decoration allowed), so a
+# body line like "Variant 2 of the plan..." never splits a draft
+VARIANT_MARKER = re.compile(r"^[^\w\n]*VARIANT\s*#?\d+\s*:[^\w\n]*$", re.IGNORECASE | re.MULTILINE)
+
 
 class EmailGenerationError(Exception):
     pass
 
 
-def _call_openrouter(prompt: str, temperature: float):
-    cfg = get_openrouter_config()
+def _call_openrouter(template, regenerate=False, variants=1, **fields):
+    """
+    Completion for a prompt template, served from the response cache
+    unless `regenerate`. Only parseable drafts are cached.
+    variants > 1 asks for that many numbered drafts in the one completion.
+    LLMError propagates: a draft job retries later instead of saving a
+    fallback draft while the provider is failing.
+    """
+    messages = template.render(variants=variants, **fields)
+
     try:
-        response = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {cfg['api_key']}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": cfg["model"],
-                "messages": [
-                    {"role": "system", "content": "You generate structured emails."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": temperature,
-            },
-            timeout=TIMEOUT_SECONDS,
-        )
+        model = route_model(DRAFT)
+    except Exception as e:
+        raise EmailGenerationError(f"Unexpected error: {e}")
 
-        if response.status_code != 200:
-            raise EmailGenerationError(
-                f"OpenRouter HTTP {response.status_code}: {response.text}"
+    def complete():
+        try:
+            content = route_completion(
+                DRAFT,
+                messages,
+                temperature=template.temperature,
+                timeout=TIMEOUT_SECONDS,
+                tag=template.key,
             )
-
-        data = response.json()
-        choices = data.get("choices")
-
-        if not choices:
-            raise EmailGenerationError("OpenRouter response missing choices")
-
-        content = (
-            choices[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
-        )
+        except LLMError:
+            raise
+        except Exception as e:
+            raise EmailGenerationError(f"Unexpected error: {e}")
 
         if not content:
             raise EmailGenerationError("Empty LLM response")
 
         return content
 
-    except Timeout:
-        raise EmailGenerationError("OpenRouter request timed out")
-    except RequestException as e:
-        raise EmailGenerationError(f"Network error: {e}")
-    except Exception as e:
-        raise EmailGenerationError(f"Unexpected error: {e}")
+    return cached_completion(
+        template,
+        messages,
+        complete,
+        model=model,
+        validate=lambda content: _parse_subject_body(content, multiple=variants > 1),
+        regenerate=regenerate,
+    )
 
 
-def _parse_subject_body(content: str):
+def _parse_subject_body(content: str, multiple=False):
     """
     Enforces strict SUBJECT/BODY extraction.
+    With `multiple`, returns [(subject, body), ...] from a numbered
+    VARIANT output, skipping variants that don't parse.
     """
+    if multiple:
+        parts = [p for p in VARIANT_MARKER.split(content) if p.strip()]
+        drafts = []
+        for part in parts:
+            try:
+                drafts.append(_parse_subject_body(part))
+            except EmailGenerationError:
+                continue
+        if not drafts:
+            raise EmailGenerationError("No usable variant in LLM output")
+        return drafts
+
     upper = content.upper()
 
     if "SUBJECT:" not in upper or "BODY:" not in upper:
@@ -87,179 +106,48 @@ def _parse_subject_body(content: str):
 # ------------------------------------------------------------------------------
 # Initial / Follow-up Email Generator
 # ------------------------------------------------------------------------------
-def generate_email(lead, followup=False, previous_emails=""):
+def _lead_fields(lead):
+    return {
+        "name": lead.name,
+        "company": lead.company,
+        "industry": lead.industry,
+        "pain_points": lead.pain_points,
+        "conversation_opener": lead.conversation_opener,
+        "negotiation_angle": lead.negotiation_angle,
+    }
+
+
+def _draft_result(content, variants):
+    if variants > 1:
+        return _parse_subject_body(content, multiple=True)[:variants]
+    return _parse_subject_body(content)
+
+
+def generate_email(lead, followup=False, previous_emails="", regenerate=None, variants=1):
+    """
+    (subject, body), or a list of up to `variants` of them when variants > 1.
+    `regenerate` bypasses the response cache; defaults to the lead snapshot's flag.
+    """
+    if regenerate is None:
+        regenerate = getattr(lead, "regenerate", False)
+
     try:
         if not followup:
-            prompt = f"""
-You are a senior B2B outreach copywriter writing on behalf of Hexanova MediaTech.
-
-GOAL:
-Write a calm, thoughtful cold email (60–80 words) as a 1-to-1 relevance check — not a pitch.
-
-TONE:
-- Professional, human, grounded
-- Neutral and non-salesy
-- No hype, no marketing language
-
-ABOUT HEXANOVA MEDIATEK (INTERNAL CONTEXT – DO NOT QUOTE):
-Hexanova MediaTech builds practical and immersive digital systems across web, mobile, AI, 3D, and AR/VR. 
-The team works with growing organizations to design scalable platforms and interactive experiences, often where execution speed, clarity, and long-term maintainability matter.
-
-TENSION RULES:
-- Imply ONLY ONE situational tension
-- Derive it ONLY from internal context below
-- Never assume it applies to the recipient
-- Frame as something teams in similar environments often think about
-- If context is weak or empty, use a neutral, widely applicable tension
-- Mention the tension subtly in ONE short sentence
-
-COMPANY CONTEXT USAGE RULE:
-- Use company context only to sound credible and relevant
-- NEVER list services or technologies
-- NEVER position Hexanova as a vendor or provider
-- At most one subtle capability may be implied, only if it naturally aligns with the lead’s industry
-- It is acceptable to not reference the company’s work at all
-
-FORMAT (STRICT):
-Return output in EXACTLY this format:
-
-SUBJECT:
-<3–5 word curiosity-driven subject reflecting the tension>
-
-BODY:
-<email body>
-
-STRUCTURE RULES:
-- Include a brief neutral greeting (e.g., “Hi <Name>,” or “Hope you’re having a good week at <Company>.”)
-- Greeting does NOT count as the opening line
-- Opening line: max 1 sentence, observational, neutral
-- Short paragraphs (1–2 lines)
-- Short, clear sentences
-
-STYLE CONSTRAINTS:
-- 60–80 words total
-- No flattery, metrics, bold claims, service lists
-- Do NOT use these words: pain, problem, challenge, issue, struggle, need, solution
-
-CTA:
-- Optional, max 1 sentence
-- Low-pressure (e.g., “If you’re open, we could schedule a quick 10-minute chat.”)
-
-NAMING & SIGNATURE:
-- Mention Hexanova MediaTech at most once
-- End exactly with:
-
-Best regards,
-Hexanova MediaTech
-
-Lead:
-Name: {lead.name}
-Company: {lead.company}
-Industry: {lead.industry}
-
-Internal context (do not quote, may be empty):
-{lead.pain_points}
-Additional internal guidance (DO NOT QUOTE OR PARAPHRASE DIRECTLY):
-- Conversation opener (tone reference only):
-{lead.conversation_opener}
-
-- Negotiation angle (strategic framing only):
-{lead.negotiation_angle}
-IMPORTANT:
-Never reuse or closely paraphrase the conversation opener text.
-Use it only to understand the lead’s role, context, and sensitivity.
-"""
-
-            temperature = 0.35
-
+            content = _call_openrouter(INITIAL_EMAIL, regenerate, variants, **_lead_fields(lead))
         else:
-            prompt = f"""
-You are a senior B2B outreach copywriter writing on behalf of Hexanova MediaTech.
-
-GOAL:
-Write a calm, thoughtful cold email (60–80 words) as a 1-to-1 relevance check — not a pitch.
-
-TONE:
-- Professional, human, grounded
-- Neutral and non-salesy
-- No hype, no marketing language
-
-ABOUT HEXANOVA MEDIATEK (INTERNAL CONTEXT – DO NOT QUOTE):
-Hexanova MediaTech builds practical and immersive digital systems across web, mobile, AI, 3D, and AR/VR. 
-The team works with growing organizations to design scalable platforms and interactive experiences, often where execution speed, clarity, and long-term maintainability matter.
-
-TENSION RULES:
-- Imply ONLY ONE situational tension
-- Derive it ONLY from internal context below
-- Never assume it applies to the recipient
-- Frame as something teams in similar environments often think about
-- If context is weak or empty, use a neutral, widely applicable tension
-- Mention the tension subtly in ONE short sentence
-
-COMPANY CONTEXT USAGE RULE:
-- Use company context only to sound credible and relevant
-- NEVER list services or technologies
-- NEVER position Hexanova as a vendor or provider
-- At most one subtle capability may be implied, only if it naturally aligns with the lead’s industry
-- It is acceptable to not reference the company’s work at all
-
-FORMAT (STRICT):
-Return output in EXACTLY this format:
-
-SUBJECT:
-<3–5 word curiosity-driven subject reflecting the tension>
-
-BODY:
-<email body>
-
-STRUCTURE RULES:
-- Include a brief neutral greeting (e.g., “Hi <Name>,” or “Hope you’re having a good week at <Company>.”)
-- Greeting does NOT count as the opening line
-- Opening line: max 1 sentence, observational, neutral
-- Short paragraphs (1–2 lines)
-- Short, clear sentences
-
-STYLE CONSTRAINTS:
-- 60–80 words total
-- No flattery, metrics, bold claims, service lists
-- Do NOT use these words: pain, problem, challenge, issue, struggle, need, solution
-
-CTA:
-- Optional, max 1 sentence
-- Low-pressure (e.g., “If you’re open, we could schedule a quick 10-minute chat.”)
-
-NAMING & SIGNATURE:
-- Mention Hexanova MediaTech at most once
-- End exactly with:
-
-Best regards,
-Hexanova MediaTech
-
-Lead:
-Name: {lead.name}
-Company: {lead.company}
-Industry: {lead.industry}
-
-Internal context (do not quote, may be empty):
-{lead.pain_points}
-Additional internal guidance (DO NOT QUOTE OR PARAPHRASE DIRECTLY):
-- Conversation opener (tone reference only):
-{lead.conversation_opener}
-
-- Negotiation angle (strategic framing only):
-{lead.negotiation_angle}
-IMPORTANT:
-Never reuse or closely paraphrase the conversation opener text.
-Use it only to understand the lead’s role, context, and sensitivity.
-"""
-
-            temperature = 0.3
-
-        content = _call_openrouter(prompt, temperature)
-        return _parse_subject_body(content)
+            content = _call_openrouter(
+                FOLLOWUP_EMAIL,
+                regenerate,
+                variants,
+                followup_number=(lead.followup_count or 0) + 1,
+                previous_emails=previous_emails,
+                **_lead_fields(lead),
+            )
+
+        return _draft_result(content, variants)
 
     except EmailGenerationError as e:
-        # 🔒 graceful fallback
+        # 🔒 graceful fallback for unusable output (LLM failures raise)
         print(f"❌ Email generation failed: {e}")
 
         fallback_subject = "Quick note"
@@ -270,47 +158,26 @@ Use it only to understand the lead’s role, context, and sensitivity.
             "Hexanova MediaTech"
         )
 
+        if variants > 1:
+            return [(fallback_subject, fallback_body)]
         return fallback_subject, fallback_body
 
 
 # ------------------------------------------------------------------------------
 # Reply Email Generator
 # ------------------------------------------------------------------------------
-def generate_reply_email(lead, reply_text):
+def generate_reply_email(lead, reply_text, regenerate=False, variants=1):
+    """(subject, body), or a list of them when variants > 1"""
     try:
-        prompt = f"""
-You are replying to an inbound email.
-
-STRICT OUTPUT CONTRACT:
-Return ONLY in this format:
-
-SUBJECT:
-<subject>
-
-BODY:
-<body>
-
-Rules:
-- Under 90 words
-- Respect intent
-- No selling
-- Start with: Hi {lead.name},
-- End exactly with:
-
-Best regards,
-Hexanova MediaTech
-
-Lead:
-Name: {lead.name}
-Company: {lead.company}
-
-Reply:
-\"\"\"
-{reply_text}
-\"\"\"
-"""
-        content = _call_openrouter(prompt, temperature=0.2)
-        return _parse_subject_body(content)
+        content = _call_openrouter(
+            REPLY_EMAIL,
+            regenerate,
+            variants,
+            name=lead.name,
+            company=lead.company,
+            reply_text=reply_text,
+        )
+        return _draft_result(content, variants)
 
     except EmailGenerationError as e:
         print(f"❌ Reply generation failed: {e}")
@@ -323,4 +190,6 @@ Reply:
             "Hexanova MediaTech"
         )
 
+        if variants > 1:
+            return [(fallback_subject, fallback_body)]
         return fallback_subject, fallback_body
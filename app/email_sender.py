@@ -1,30 +1,207 @@
 # email_sender.py
 import smtplib
 import socket
+import threading
+import time
+import atexit
+from collections import deque
+from contextlib import contextmanager
 from email.mime.text import MIMEText
+from email.utils import make_msgid
 from typing import Optional
 
-from config import get_smtp_config
+from config import get_smtp_config, get_int_env
+from rate_limiter import get_rate_limiter, is_throttle_response
 
 SMTP_HOST = "smtp.gmail.com"
 # SMTP_PORT = 465
 SMTP_PORT = 587
 SMTP_TIMEOUT = 60  # seconds
 
+SMTP_POOL_SIZE = get_int_env("SMTP_POOL_SIZE", 3)
+SMTP_MAX_IDLE = 240        # Gmail drops idle sessions after ~5 minutes
+SMTP_NOOP_AFTER = 10       # health-check connections idle longer than this
+
 
 class EmailSendError(Exception):
     pass
 
 
+class _TracksData:
+    """Records whether DATA was sent, i.e. whether the server may already have the message"""
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class PooledSMTP_SSL(_TracksData, smtplib.SMTP_SSL):
+    pass
+
+
+class PooledSMTP(_TracksData, smtplib.SMTP):
+    """Plain SMTP, for local relays and test servers"""
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of logged-in SMTP connections.
+    Idle connections are health-checked with NOOP before reuse. A send
+    that finds its connection dropped before DATA is retried once on a
+    fresh one; after DATA the server may have accepted it, so no retry.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        *,
+        max_size: int = SMTP_POOL_SIZE,
+        timeout: int = SMTP_TIMEOUT,
+        connection_class=PooledSMTP_SSL,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.connection_class = connection_class
+
+        self._slots = threading.BoundedSemaphore(max(1, max_size))
+        self._idle = deque()   # (server, last_used)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        server = self.connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_alive(server) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self):
+        now = time.monotonic()
+
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            idle_for = now - last_used
+            if idle_for > SMTP_MAX_IDLE:
+                self._close(server)
+                continue
+            if idle_for > SMTP_NOOP_AFTER and not self._is_alive(server):
+                self._close(server)
+                continue
+            return server
+
+        return self._connect()
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except Exception:
+            # never hand a connection in an unknown state back to the pool
+            if server is not None:
+                self._close(server)
+            server = None
+            raise
+        finally:
+            if server is not None:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+            self._slots.release()
+
+    def send_message(self, msg):
+        for attempt in range(2):
+            data_started = False
+            try:
+                with self.connection() as server:
+                    server.data_started = False
+                    try:
+                        server.send_message(msg)
+                    finally:
+                        data_started = server.data_started
+                return
+            except smtplib.SMTPServerDisconnected:
+                # 🔒 a drop after DATA may follow delivery; retrying could send twice
+                if attempt or data_started:
+                    raise
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for server, _ in idle:
+            self._close(server)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Process-wide pool shared by the dashboard and the worker jobs"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                smtp_email, smtp_password = get_smtp_config()
+                _pool = SMTPConnectionPool(
+                    SMTP_HOST,
+                    SMTP_PORT,
+                    smtp_email,
+                    smtp_password,
+                )
+                atexit.register(_pool.close)
+
+    return _pool
+
+
+def new_message_id() -> str:
+    smtp_email, _ = get_smtp_config()
+    domain = (smtp_email or "").rsplit("@", 1)[-1] or None
+    return make_msgid(domain=domain)
+
+
 def send_email(
     to: str,
     subject: str,
     body: str,
     *,
+    message_id: Optional[str] = None,
     raise_on_failure: bool = False
 ) -> bool:
     """
-    Sends an email safely.
+    Sends an email safely over the shared SMTP pool.
     Returns True if sent, False if failed.
     """
     smtp_email, smtp_password = get_smtp_config()
@@ -40,14 +217,20 @@ def send_email(
         msg["From"] = smtp_email      # ✅ CHANGED
         msg["To"] = to
         msg["Subject"] = subject
+        msg["Message-ID"] = message_id or new_message_id()
+
+        # ⏳ pace per sender account and recipient domain
+        limiter = get_rate_limiter()
+        limiter.acquire(smtp_email, to)
+
+        try:
+            get_smtp_pool().send_message(msg)
+        except smtplib.SMTPException as e:
+            if is_throttle_response(e):
+                limiter.on_throttled(smtp_email, to)
+            raise
 
-        with smtplib.SMTP_SSL(
-            SMTP_HOST,
-            SMTP_PORT,
-            timeout=SMTP_TIMEOUT
-        ) as server:
-            server.login(smtp_email, smtp_password)  # ✅ CHANGED
-            server.send_message(msg)
+        limiter.on_success(smtp_email, to)
 
         print(f"✅ Email sent to {to}")
         return True
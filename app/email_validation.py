@@ -0,0 +1,197 @@
+# email_validation.py
+"""
+Email validation stage for lead imports.
+
+Syntax is checked in memory per lead. Deliverability (MX / A lookups)
+is checked once per domain: results are memoized in an LRU with TTL,
+and the uncached domains of each batch are resolved on a worker pool.
+
+Resolvers are pluggable: "dns" (email_validator's own deliverability
+rules over dnspython) or "stub" for offline runs and tests.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.resolver
+
+from email_validator import validate_email, EmailNotValidError, EmailUndeliverableError
+from email_validator.deliverability import caching_resolver, validate_email_deliverability
+
+from config import get_env, get_int_env
+
+EMAIL_CHECK_DELIVERABILITY = (get_env("EMAIL_CHECK_DELIVERABILITY") or "1") == "1"
+EMAIL_RESOLVER = (get_env("EMAIL_RESOLVER") or "dns").lower()   # dns | stub
+EMAIL_VALIDATION_WORKERS = get_int_env("EMAIL_VALIDATION_WORKERS", 16)
+EMAIL_DOMAIN_CACHE_SIZE = get_int_env("EMAIL_DOMAIN_CACHE_SIZE", 50000)
+EMAIL_DOMAIN_CACHE_TTL = get_int_env("EMAIL_DOMAIN_CACHE_TTL", 6 * 3600)
+EMAIL_DNS_TIMEOUT = get_int_env("EMAIL_DNS_TIMEOUT", 5)
+
+
+def check_syntax(email):
+    """Normalized address, or None if the syntax is invalid"""
+    try:
+        return validate_email(email, check_deliverability=False).normalized
+    except EmailNotValidError:
+        return None
+
+
+# ------------------------------------------------------------------------------
+# Resolvers: is_deliverable(domain) -> True | False | None (unknown)
+# ------------------------------------------------------------------------------
+class DnsResolver:
+    def __init__(self, timeout=EMAIL_DNS_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _resolver(self):
+        # dnspython resolvers are not shared between threads
+        if not hasattr(self._local, "resolver"):
+            self._local.resolver = caching_resolver(timeout=self.timeout)
+        return self._local.resolver
+
+    def is_deliverable(self, domain):
+        try:
+            info = validate_email_deliverability(domain, domain, dns_resolver=self._resolver())
+        except EmailUndeliverableError as e:
+            # resolver failures (not a DNS answer) are unknown, like timeouts
+            cause = e.__cause__
+            if cause is not None and not isinstance(cause, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+                return None
+            return False
+        return None if "unknown-deliverability" in info else True
+
+
+class StubResolver:
+    """Offline resolver: fixed answers per domain, optional fake latency"""
+
+    def __init__(self, domains=None, default=True, delay=0.0):
+        self.domains = {d.lower(): ok for d, ok in (domains or {}).items()}
+        self.default = default
+        self.delay = delay
+        self.lookups = 0
+
+    def is_deliverable(self, domain):
+        self.lookups += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.domains.get(domain, self.default)
+
+
+RESOLVERS = {
+    "dns": DnsResolver,
+    "stub": StubResolver,
+}
+
+
+# ------------------------------------------------------------------------------
+# Domain cache
+# ------------------------------------------------------------------------------
+class DomainCache:
+    """Thread-safe LRU of domain -> deliverable with a TTL per entry"""
+
+    def __init__(self, max_size=EMAIL_DOMAIN_CACHE_SIZE, ttl=EMAIL_DOMAIN_CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, domain):
+        """(hit, value)"""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires <= self.clock():
+                del self._entries[domain]
+                return False, None
+            self._entries.move_to_end(domain)
+            return True, value
+
+    def put(self, domain, value):
+        with self._lock:
+            self._entries[domain] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = DomainCache()
+
+
+# ------------------------------------------------------------------------------
+# Stage
+# ------------------------------------------------------------------------------
+class ValidationStage:
+    """
+    Filters batches of normalized lead rows down to deliverable ones.
+    One stage per import, so its counters are that import's stats.
+    """
+
+    def __init__(self, resolver=None, cache=None, workers=None, check_deliverability=None):
+        if check_deliverability is None:
+            check_deliverability = EMAIL_CHECK_DELIVERABILITY
+        self.check_deliverability = check_deliverability
+        self.resolver = resolver or RESOLVERS[EMAIL_RESOLVER]()
+        self.cache = cache if cache is not None else _cache
+        self.workers = max(1, workers or EMAIL_VALIDATION_WORKERS)
+
+        self.emails = 0
+        self.undeliverable = 0
+        self.cache_hits = 0
+        self.lookups = 0
+        self.seconds = 0.0
+
+    def _resolve(self, domains):
+        if len(domains) <= 1:
+            return [self.resolver.is_deliverable(d) for d in domains]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(domains))) as pool:
+            return list(pool.map(self.resolver.is_deliverable, domains))
+
+    def filter(self, rows):
+        """Rows whose domain accepts mail (unknown counts as deliverable)"""
+        if not self.check_deliverability or not rows:
+            self.emails += len(rows)
+            return rows
+
+        started = time.monotonic()
+        verdicts = {}
+        missing = []
+
+        for domain in {row["email"].rsplit("@", 1)[1] for row in rows}:
+            hit, value = self.cache.get(domain)
+            if hit:
+                verdicts[domain] = value
+            else:
+                missing.append(domain)
+
+        self.cache_hits += len(verdicts)
+        self.lookups += len(missing)
+
+        for domain, value in zip(missing, self._resolve(missing)):
+            verdicts[domain] = value
+            if value is not None:   # don't pin timeouts in the cache
+                self.cache.put(domain, value)
+
+        kept = [row for row in rows if verdicts[row["email"].rsplit("@", 1)[1]] is not False]
+
+        self.emails += len(rows)
+        self.undeliverable += len(rows) - len(kept)
+        self.seconds += time.monotonic() - started
+        return kept
+
+    def stats(self):
+        checked = self.cache_hits + self.lookups
+        return {
+            "emails": self.emails,
+            "undeliverable": self.undeliverable,
+            "domain_lookups": self.lookups,
+            "cache_hit_rate": round(self.cache_hits / checked, 3) if checked else 0.0,
+            "emails_per_sec": round(self.emails / self.seconds) if self.seconds else None,
+        }
@@ -1,59 +1,63 @@
 # followup_scheduler.py
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime, timedelta, timezone
 from database import get_session_local
 from models import Lead
-from email_generator import generate_email
+from email_generator import generate_email, JOB_DRAFT_VARIANTS
+from draft_variants import save_drafts
+from draft_engine import run_drafts
+from llm_guard import llm_available
+from leases import claim_leads, owned_lead, release, record_draft_failure, clear_draft_failure
+from lead_state import due, schedule_next_action, FOLLOWUP
 
 scheduler = BackgroundScheduler()
 
-MAX_FOLLOWUPS = 3
-FOLLOWUP_DELAY = timedelta(minutes=5)  # change for prod
 
 
 def check_followups():
+    # ⏸️ paused while the LLM circuit breaker is open
+    if not llm_available():
+        return
+
     SessionLocal = get_session_local()
     session = SessionLocal()
-    now_utc = datetime.now(timezone.utc)
 
-    try:
-        leads = (
-            session.query(Lead)
-            .filter(
-                Lead.status.in_(["EMAIL_SENT", "FOLLOWUP_SENT"]),
-                Lead.last_email_sent.isnot(None),
-                Lead.followup_count < MAX_FOLLOWUPS,
-                Lead.draft_ready == False,   # 🔒 prevent duplicate drafts
-            )
-            .with_for_update(skip_locked=True)
-            .all()
-        )
+    def save_draft(job, result, error):
+        if error:
+            print(f"❌ Follow-up draft failed for {job.email}: {error}")
+            record_draft_failure(session, job, error)
+            return
 
-        for lead in leads:
-            sent_time = lead.last_email_sent
-            if sent_time.tzinfo is None:
-                sent_time = sent_time.replace(tzinfo=timezone.utc)
+        lead = owned_lead(session, job.id)
+        if not lead:
+            print(f"⚠️ Lease lost for {job.email}, dropping draft")
+            session.rollback()
+            return
 
-            # ⏳ wait before follow-up
-            if now_utc - sent_time < FOLLOWUP_DELAY:
-                continue
+        # ✅ SAVE AS DRAFT (NO SENDING)
+        save_drafts(session, lead, "followup", result)
+        lead.regenerate_draft = False
+        clear_draft_failure(lead)
+        lead.status = "DRAFT_READY"
+        schedule_next_action(lead)
+        release(lead)
 
-            try:
-                subject, body = generate_email(lead, followup=True)
-
-                # ✅ SAVE AS DRAFT (NO SENDING)
-                lead.draft_subject = subject
-                lead.draft_body = body
-                lead.draft_type = "followup"
-                lead.draft_ready = True
-                lead.status = "DRAFT_READY"
+        session.commit()
 
-            except Exception as e:
-                print(f"❌ Follow-up draft failed for {lead.email}: {e}")
-                session.rollback()
-                continue
+    try:
+        while llm_available():
+            jobs = claim_leads(
+                session,
+                *due(FOLLOWUP),
+                order_by=Lead.next_action_at,
+            )
+            if not jobs:
+                break
 
-        session.commit()
+            run_drafts(
+                jobs,
+                lambda job: generate_email(job, followup=True, variants=JOB_DRAFT_VARIANTS),
+                save_draft,
+            )
 
     except Exception as e:
         session.rollback()
@@ -0,0 +1,201 @@
+# imap_fetch.py
+"""
+Helpers for partial IMAP fetches: parse FETCH responses (including
+BODYSTRUCTURE), locate the text part and decode just that section.
+"""
+import base64
+import quopri
+import re
+
+_LITERAL = re.compile(rb"\{(\d+)\}\r\n")
+
+
+# ------------------------------------------------------------------------------
+# FETCH response parsing
+# ------------------------------------------------------------------------------
+def _join_response(data):
+    """imaplib splits literals into (prefix, literal) tuples; glue them back"""
+    chunks = []
+    for item in data:
+        if isinstance(item, tuple):
+            chunks.append(item[0] + b"\r\n" + item[1])
+        elif item:
+            chunks.append(item)
+    return b" ".join(chunks)
+
+
+def _parse(buf, pos=0, depth=0):
+    items = []
+    length = len(buf)
+
+    while pos < length:
+        ch = buf[pos:pos + 1]
+
+        if ch in (b" ", b"\r", b"\n"):
+            pos += 1
+
+        elif ch == b"(":
+            sub, pos = _parse(buf, pos + 1, depth + 1)
+            items.append(sub)
+
+        elif ch == b")":
+            if depth:
+                return items, pos + 1
+            pos += 1
+
+        elif ch == b'"':
+            end = pos + 1
+            out = bytearray()
+            while end < length and buf[end:end + 1] != b'"':
+                if buf[end:end + 1] == b"\\":
+                    end += 1
+                out += buf[end:end + 1]
+                end += 1
+            items.append(bytes(out))
+            pos = end + 1
+
+        elif ch == b"{":
+            match = _LITERAL.match(buf, pos)
+            if not match:
+                raise ValueError("Malformed IMAP literal")
+            start = match.end()
+            size = int(match.group(1))
+            items.append(buf[start:start + size])
+            pos = start + size
+
+        else:
+            # atom; BODY[...] sections may contain spaces and parens
+            end = pos
+            while end < length and buf[end:end + 1] not in (b" ", b"(", b")", b"\r", b"\n"):
+                if buf[end:end + 1] == b"[":
+                    end = buf.index(b"]", end)
+                end += 1
+            atom = buf[pos:end]
+            items.append(None if atom.upper() == b"NIL" else atom)
+            pos = end
+
+    return items, pos
+
+
+def parse_fetch(data):
+    """
+    Parses the data of a UID FETCH into {uid: {ITEM: value}}.
+    Section keys are normalised, e.g. 'BODY[1]<0>' -> 'BODY[1]'.
+    """
+    tokens, _ = _parse(_join_response(data))
+    results = {}
+
+    # tokens alternate: <seq> [item value item value ...]
+    for i in range(0, len(tokens) - 1, 2):
+        pairs = tokens[i + 1]
+        if not isinstance(pairs, list):
+            continue
+
+        items = {}
+        for j in range(0, len(pairs) - 1, 2):
+            key = pairs[j].decode("ascii", "ignore").upper()
+            key = re.sub(r"<\d+>$", "", key)
+            items[key] = pairs[j + 1]
+
+        uid = items.get("UID")
+        if uid is not None:
+            results[int(uid)] = items
+
+    return results
+
+
+# ------------------------------------------------------------------------------
+# BODYSTRUCTURE
+# ------------------------------------------------------------------------------
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "ignore")
+    return ""
+
+
+def _is_attachment(part):
+    for field in part[7:]:
+        if isinstance(field, list) and field and _text(field[0]).lower() == "attachment":
+            return True
+    return False
+
+
+def _walk(structure, section=""):
+    """Yields (section, part) for every leaf part of a BODYSTRUCTURE"""
+    if not structure:
+        return
+
+    if isinstance(structure[0], list):
+        # child parts come first; the subtype and extension data follow
+        children = []
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            children.append(child)
+
+        for index, child in enumerate(children, 1):
+            child_section = f"{section}.{index}" if section else str(index)
+            yield from _walk(child, child_section)
+        return
+
+    yield section, structure
+
+
+def _describe(section, part):
+    params = part[2] if isinstance(part[2], list) else []
+    params = {
+        _text(params[i]).lower(): _text(params[i + 1])
+        for i in range(0, len(params) - 1, 2)
+    }
+
+    return (
+        section or "1",
+        _text(part[5]).lower() or "7bit",
+        params.get("charset") or "utf-8",
+    )
+
+
+def find_text_part(structure):
+    """
+    Returns (section, encoding, charset) of the first text/plain,
+    non-attachment part, or None. A single-part message of any text/*
+    type counts, matching extract_body().
+    """
+    for section, part in _walk(structure):
+        content_type = _text(part[0]).lower()
+        subtype = _text(part[1]).lower()
+
+        if content_type != "text" or (subtype != "plain" and section):
+            continue
+        if _is_attachment(part):
+            continue
+
+        return _describe(section, part)
+
+    return None
+
+
+def find_part(structure, content_type):
+    """(section, encoding, charset) of the first part of the given type"""
+    for section, part in _walk(structure):
+        if f"{_text(part[0])}/{_text(part[1])}".lower() == content_type:
+            return _describe(section, part)
+    return None
+
+
+def decode_part(raw, encoding, charset):
+    if not raw:
+        return ""
+
+    if encoding == "base64":
+        # a size-capped fetch can cut a quantum in half
+        raw = re.sub(rb"\s+", b"", raw)
+        raw = raw[: len(raw) - len(raw) % 4]
+        raw = base64.b64decode(raw)
+    elif encoding == "quoted-printable":
+        raw = quopri.decodestring(raw)
+
+    try:
+        return raw.decode(charset, errors="ignore")
+    except LookupError:
+        return raw.decode("utf-8", errors="ignore")
@@ -0,0 +1,219 @@
+# inbound_worker.py
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import or_, and_
+
+import metrics
+from config import get_int_env
+from database import get_session_local
+from models import Lead, InboundMessage
+from intent_analyzer import analyze_replies
+from email_generator import generate_reply_email, JOB_DRAFT_VARIANTS
+from draft_variants import save_drafts
+from llm_client import LLMError
+from llm_guard import llm_available
+from lead_state import schedule_next_action
+
+INBOUND_BATCH_SIZE = get_int_env("INBOUND_BATCH_SIZE", 20)
+INBOUND_WORKERS = get_int_env("INBOUND_WORKERS", 4)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=1)           # multiplied by attempt number
+PROCESSING_TIMEOUT = timedelta(minutes=10)   # reclaim rows of a worker that died
+
+
+def _claim_batch(session, now):
+    rows = (
+        session.query(InboundMessage, Lead)
+        .join(Lead, Lead.id == InboundMessage.lead_id)
+        .filter(
+            or_(
+                and_(
+                    InboundMessage.status == "PENDING",
+                    or_(
+                        InboundMessage.next_attempt_at.is_(None),
+                        InboundMessage.next_attempt_at <= now,
+                    ),
+                ),
+                and_(
+                    InboundMessage.status == "PROCESSING",
+                    InboundMessage.claimed_at < now - PROCESSING_TIMEOUT,
+                ),
+            )
+        )
+        .order_by(InboundMessage.id)
+        .limit(INBOUND_BATCH_SIZE)
+        .with_for_update(of=InboundMessage, skip_locked=True)
+        .all()
+    )
+
+    batch = []
+    for message, lead in rows:
+        message.status = "PROCESSING"
+        message.claimed_at = now
+        message.attempts += 1
+
+        received_at = message.received_at
+        if received_at.tzinfo is None:
+            received_at = received_at.replace(tzinfo=timezone.utc)
+        metrics.observe("inbound_queue_wait_seconds", (now - received_at).total_seconds())
+
+        batch.append(
+            SimpleNamespace(
+                id=message.id,
+                lead_id=lead.id,
+                text=message.body,
+                attempts=message.attempts,
+                # plain snapshot: ORM objects must not cross threads
+                lead=SimpleNamespace(
+                    id=lead.id,
+                    name=lead.name,
+                    email=lead.email,
+                    company=lead.company,
+                ),
+            )
+        )
+
+    session.commit()
+    return batch
+
+
+def _classify_batch(batch):
+    """Stage two: intents for the whole claimed batch, batched into few LLM requests"""
+    started = time.monotonic()
+    intents = analyze_replies([item.text for item in batch])
+    metrics.observe("inbound_classify_seconds", time.monotonic() - started)
+    return intents
+
+
+def _draft(item, intent):
+    """Stage three: runs in the worker pool, no DB access"""
+    started = time.monotonic()
+
+    draft = None
+    if intent != "Not Interested":
+        draft = generate_reply_email(item.lead, item.text, variants=JOB_DRAFT_VARIANTS)
+
+    metrics.observe("inbound_draft_seconds", time.monotonic() - started)
+    return intent, draft
+
+
+def _apply_result(session, item, intent, draft):
+    lead = (
+        session.query(Lead)
+        .filter_by(id=item.lead_id)
+        .with_for_update()
+        .first()
+    )
+    message = session.get(InboundMessage, item.id)
+
+    if lead:
+        lead.intent = intent
+        lead.awaiting_reply = False
+        lead.last_email_sent = datetime.now(timezone.utc)
+
+        # 🎯 sentiment & state
+        if intent == "Not Interested":
+            lead.sentiment = "negative"
+            lead.status = "CLOSED"
+        elif intent in ("Interested", "Call Request"):
+            lead.sentiment = "positive"
+            lead.status = "QUALIFIED"
+        else:
+            lead.sentiment = "neutral"
+            lead.status = "QUALIFIED"
+
+        # ✍️ AI REPLY DRAFT (NO AUTO-SEND)
+        if draft and not lead.draft_ready:
+            save_drafts(session, lead, "reply", draft)
+            lead.status = "DRAFT_READY"
+
+        schedule_next_action(lead)
+
+    if message:
+        message.status = "DONE"
+        message.processed_at = datetime.now(timezone.utc)
+        message.last_error = None
+        message.next_attempt_at = None
+
+    session.commit()
+
+
+def _record_failure(session, item, error):
+    message = session.get(InboundMessage, item.id)
+    if message:
+        if isinstance(error, LLMError) and error.transient:
+            # provider outage: not the message's fault, keep its attempts
+            message.attempts = max(0, message.attempts - 1)
+            message.status = "PENDING"
+        else:
+            message.status = "FAILED" if item.attempts >= MAX_ATTEMPTS else "PENDING"
+        message.last_error = str(error)
+
+        # ⏳ back off instead of being claimed again by this same run
+        if message.status == "PENDING":
+            message.next_attempt_at = datetime.now(timezone.utc) + RETRY_DELAY * max(1, item.attempts)
+    session.commit()
+
+
+def process_inbound_messages():
+    """
+    Classifies each claimed batch of replies in batched LLM requests, then
+    drafts responses with a bounded pool of concurrent LLM calls. Each
+    result is committed as it completes.
+    """
+    # ⏸️ paused while the LLM circuit breaker is open
+    if not llm_available():
+        return
+
+    SessionLocal = get_session_local()
+    session = SessionLocal()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, INBOUND_WORKERS)) as pool:
+            while llm_available():
+                batch = _claim_batch(session, datetime.now(timezone.utc))
+                if not batch:
+                    break
+
+                try:
+                    intents = _classify_batch(batch)
+                except Exception as e:
+                    # only transient LLM errors get here; retry the batch on the next run
+                    print(f"❌ Failed classifying {len(batch)} replies: {e}")
+                    for item in batch:
+                        _record_failure(session, item, e)
+                    break
+
+                futures = {
+                    pool.submit(_draft, item, intent): item
+                    for item, intent in zip(batch, intents)
+                }
+
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        intent, draft = future.result()
+                        _apply_result(session, item, intent, draft)
+                        metrics.incr("inbound_processed")
+                    except Exception as e:
+                        session.rollback()
+                        print(f"❌ Failed processing reply {item.id}: {e}")
+                        _record_failure(session, item, e)
+
+                metrics.set_gauge(
+                    "inbound_pending",
+                    session.query(InboundMessage)
+                    .filter(InboundMessage.status == "PENDING")
+                    .count(),
+                )
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Inbound worker error: {e}")
+
+    finally:
+        session.close()
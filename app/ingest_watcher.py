@@ -0,0 +1,202 @@
+# ingest_watcher.py
+"""
+Drop-folder lead ingestion. Every file dropped into LEADS_DROP_DIR is
+imported once, tracked in ingestion_files by content checksum:
+
+- completed files are never read again (even if renamed or touched)
+- checkpoints (byte offset / records) commit with each batch, so a
+  restart resumes mid-file instead of starting over
+- files still being written (mtime newer than the settle time) wait
+  for the next scan
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+from config import get_env, get_int_env
+from database import get_session_local
+from models import IngestionFile
+from leases import WORKER_ID
+from lead_sources import FORMATS
+from lead_ingestion import ingest_leads
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LEADS_DROP_DIR = get_env("LEADS_DROP_DIR") or os.path.join(ROOT_DIR, "data", "incoming")
+LEADS_DROP_SETTLE_SECONDS = get_int_env("LEADS_DROP_SETTLE_SECONDS", 30)
+INGEST_CLAIM_TIMEOUT = timedelta(minutes=get_int_env("INGEST_CLAIM_MINUTES", 10))
+INGEST_MAX_ATTEMPTS = get_int_env("INGEST_MAX_ATTEMPTS", 3)
+
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tracked_file(session, path, size, mtime):
+    """Existing row for this file, or a new PENDING one. None if a race lost."""
+    # ⚡ unchanged path/size/mtime: skip hashing
+    for row in session.query(IngestionFile).filter_by(path=path, size=size).all():
+        if _utc(row.mtime) == mtime:
+            return row
+
+    checksum = file_checksum(path)
+    row = session.query(IngestionFile).filter_by(checksum=checksum).first()
+    if row is not None:
+        # same content moved or touched: remember where it is now
+        row.path, row.size, row.mtime = path, size, mtime
+        session.commit()
+        return row
+
+    row = IngestionFile(
+        path=path,
+        checksum=checksum,
+        size=size,
+        mtime=mtime,
+        status="PENDING",
+        byte_offset=0,
+        records_done=0,
+        inserted=0,
+        duplicate=0,
+        invalid=0,
+        attempts=0,
+    )
+    try:
+        session.add(row)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return None
+    return row
+
+
+def _claim(session, file_id):
+    now = datetime.now(timezone.utc)
+    claimed = (
+        session.query(IngestionFile)
+        .filter(
+            IngestionFile.id == file_id,
+            IngestionFile.status != "DONE",
+            IngestionFile.attempts < INGEST_MAX_ATTEMPTS,
+            or_(
+                IngestionFile.claimed_at.is_(None),
+                IngestionFile.claimed_at < now - INGEST_CLAIM_TIMEOUT,
+                IngestionFile.claimed_by == WORKER_ID,
+            ),
+        )
+        .update(
+            {
+                "status": "PROCESSING",
+                "claimed_by": WORKER_ID,
+                "claimed_at": now,
+                "attempts": IngestionFile.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    session.commit()
+    return claimed == 1
+
+
+def ingest_file(path):
+    """Imports one file with checkpoints. Returns the file's report, or None if skipped."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    mtime = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+    session = get_session_local()()
+    try:
+        row = _tracked_file(session, path, stat.st_size, mtime)
+        if row is None or row.status == "DONE" or not _claim(session, row.id):
+            return None
+
+        session.refresh(row)
+        base = {"inserted": row.inserted, "duplicate": row.duplicate, "invalid": row.invalid}
+        file_id = row.id
+
+        if row.byte_offset or row.records_done:
+            print(f"⏩ Resuming {path} at byte {row.byte_offset} / record {row.records_done}")
+
+        def checkpoint(batch_session, report, position):
+            byte_offset, records_done = position or (None, None)
+            values = {key: base[key] + report[key] for key in base}
+            values["claimed_at"] = datetime.now(timezone.utc)
+            if byte_offset is not None:
+                values["byte_offset"] = byte_offset
+            if records_done is not None:
+                values["records_done"] = records_done
+            batch_session.query(IngestionFile).filter_by(id=file_id).update(
+                values, synchronize_session=False
+            )
+
+        try:
+            report = ingest_leads(
+                path,
+                checkpoint=(row.byte_offset, row.records_done),
+                on_batch=checkpoint,
+            )
+        except Exception as e:
+            session.rollback()
+            session.query(IngestionFile).filter_by(id=file_id).update(
+                {"status": "FAILED", "last_error": str(e)[:2000], "claimed_at": None},
+                synchronize_session=False,
+            )
+            session.commit()
+            metrics.incr("ingest_files_failed")
+            print(f"❌ Ingestion of {path} failed: {e}")
+            return None
+
+        session.query(IngestionFile).filter_by(id=file_id).update(
+            {
+                "status": "DONE",
+                "last_error": None,
+                "claimed_at": None,
+                "finished_at": datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+        session.commit()
+        metrics.incr("ingest_files_done")
+        return report
+
+    finally:
+        session.close()
+
+
+def scan_drop_folder(directory=None):
+    """Scheduler job: imports new or unfinished files from the drop folder"""
+    directory = directory or LEADS_DROP_DIR
+    if not os.path.isdir(directory):
+        return 0
+
+    settle_before = datetime.now(timezone.utc).timestamp() - LEADS_DROP_SETTLE_SECONDS
+    imported = 0
+
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.startswith(".") or not os.path.isfile(path):
+            continue
+        if os.path.splitext(name)[1].lower() not in FORMATS:
+            continue
+        if os.stat(path).st_mtime > settle_before:
+            continue   # ⏳ probably still being copied in
+
+        try:
+            if ingest_file(path) is not None:
+                imported += 1
+        except Exception as e:
+            print(f"❌ Drop folder scan failed for {path}: {e}")
+
+    return imported
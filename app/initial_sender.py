@@ -4,34 +4,66 @@ from datetime import datetime, timezone
 from sqlalchemy.exc import SQLAlchemyError
 from database import get_session_local
 from models import Lead, EmailLog
-from email_generator import generate_email
+from email_generator import generate_email, JOB_DRAFT_VARIANTS
+from draft_variants import save_drafts
 from email_sender import send_email
+from draft_engine import run_drafts
+from llm_guard import llm_available
+from leases import claim_leads, owned_lead, release, record_draft_failure, clear_draft_failure
+from lead_state import due, schedule_next_action, INITIAL_DRAFT
 
 def generate_initial_drafts():
+    # ⏸️ paused while the LLM circuit breaker is open
+    if not llm_available():
+        return
+
     SessionLocal = get_session_local()
     session = SessionLocal()
 
-    leads = (
-        session.query(Lead)
-        .filter(
-            Lead.status == "NEW",
-            Lead.draft_ready == False
-        )
-        .with_for_update(skip_locked=True)
-        .all()
-    )
-
-    for lead in leads:
-        subject, body = generate_email(lead, followup=False)
-
-        lead.draft_subject = subject
-        lead.draft_body = body
-        lead.draft_type = "initial"
-        lead.draft_ready = True
+    def save_draft(job, result, error):
+        if error:
+            print(f"❌ Initial draft failed for {job.email}: {error}")
+            record_draft_failure(session, job, error)
+            return
+
+        lead = owned_lead(session, job.id)
+        if not lead:
+            print(f"⚠️ Lease lost for {job.email}, dropping draft")
+            session.rollback()
+            return
+
+        save_drafts(session, lead, "initial", result)
+        lead.regenerate_draft = False
+        clear_draft_failure(lead)
         lead.status = "DRAFT_READY"
-
-    session.commit()
-    session.close()
+        schedule_next_action(lead)
+        release(lead)
+
+        # ✅ per-lead commit; completed work survives later failures
+        session.commit()
+
+    try:
+        while llm_available():
+            jobs = claim_leads(
+                session,
+                *due(INITIAL_DRAFT),
+                order_by=Lead.next_action_at,
+            )
+            if not jobs:
+                break
+
+            run_drafts(
+                jobs,
+                lambda job: generate_email(job, followup=False, variants=JOB_DRAFT_VARIANTS),
+                save_draft,
+            )
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Initial draft generation error: {e}")
+
+    finally:
+        session.close()
 
 # def send_initial_emails():
 #     session = SessionLocal()
@@ -1,10 +1,17 @@
 # intent_analyzer.py
-import requests
-from requests.exceptions import RequestException, Timeout
-from config import get_openrouter_config
+import json
+
+from llm_client import LLMError
+from llm_cache import cached_completion, cache_key, get as cache_get, put as cache_put, LLM_CACHE
+from llm_router import complete as route_completion, route_model, INTENT as INTENT_ROUTE
+from intent_fastpath import classify as fastpath_classify
+from prompts import INTENT, INTENT_BATCH
+from config import get_int_env
+import metrics
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 TIMEOUT_SECONDS = 20
+BATCH_TIMEOUT_SECONDS = 30
+INTENT_BATCH_SIZE = get_int_env("INTENT_BATCH_SIZE", 20)
 
 ALLOWED_INTENTS = {
     "interested": "Interested",
@@ -15,83 +22,208 @@ ALLOWED_INTENTS = {
 }
 
 
-def analyze_reply(text: str) -> str:
-    cfg = get_openrouter_config() 
-    if not text or not text.strip():
-        return "Question"
+def _normalize_label(content):
+    """ALLOWED_INTENTS label found in model output, or None"""
+    content = (content or "").lower()
 
-    prompt = f"""
-You are an email intent classifier.
+    # 🔒 CRITICAL FIX
+    if "not interested" in content:
+        return "Not Interested"
 
-Allowed labels (return EXACTLY one):
-- Interested
-- Pricing
-- Call Request
-- Question
-- Not Interested
+    for key in sorted(ALLOWED_INTENTS, key=len, reverse=True):
+        if key in content:
+            return ALLOWED_INTENTS[key]
 
-Reply text:
-{text}
+    return None
 
-Return only the label.
-"""
 
-    try:
-        response = requests.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {cfg['api_key']}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": cfg["model"],
-                "messages": [
-                    {"role": "system", "content": "You classify email intent."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0,
-            },
-            timeout=TIMEOUT_SECONDS,
-        )
+def _fastpath(text):
+    """(label, handled): empty replies and offline fast-path hits need no LLM"""
+    if not text or not text.strip():
+        return "Question", True
 
-        if response.status_code != 200:
-            print(f"❌ OpenRouter error {response.status_code}: {response.text}")
-            return "Question"
+    # ⚡ offline fast path; only ambiguous replies reach the LLM
+    label, source = fastpath_classify(text)
+    if label:
+        metrics.incr("intent_fastpath_hits")
+        metrics.incr(f"intent_fastpath_{source}_hits")
+        return label, True
 
-        data = response.json()
-        choices = data.get("choices")
+    return None, False
 
-        if not choices:
-            print("❌ OpenRouter response missing choices")
-            return "Question"
 
-        content = (
-            choices[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
-            .lower()
-        )
+def analyze_reply(text: str) -> str:
+    """One of ALLOWED_INTENTS; raises a transient LLMError while the provider is unavailable"""
+    label, handled = _fastpath(text)
+    if handled:
+        return label
+
+    metrics.incr("intent_llm_calls")
 
-        # 🔒 CRITICAL FIX
-        if "not interested" in content:
-            return "Not Interested"
+    messages = INTENT.render(text=text)
+
+    try:
+        content = cached_completion(
+            INTENT,
+            messages,
+            lambda: route_completion(
+                INTENT_ROUTE,
+                messages,
+                temperature=INTENT.temperature,
+                timeout=TIMEOUT_SECONDS,
+                tag=INTENT.key,
+            ),
+            model=route_model(INTENT_ROUTE),
+        )
 
-        for key in sorted(ALLOWED_INTENTS, key=len, reverse=True):
-            if key in content:
-                return ALLOWED_INTENTS[key]
+        label = _normalize_label(content)
+        if label:
+            return label
 
         print(f"⚠️ Unknown intent output: {content}")
         return "Question"
 
-    except Timeout:
-        print("❌ Intent analysis timed out")
+    except LLMError as e:
+        # ⏸️ provider trouble: let the inbound worker retry the reply
+        # later instead of filing it as a "Question"
+        if e.transient:
+            raise
+        print(f"❌ OpenRouter error during intent analysis: {e}")
         return "Question"
 
-    except RequestException as e:
-        print(f"❌ Network error during intent analysis: {e}")
+    except Exception as e:
+        print(f"❌ Unexpected intent analyzer error: {e}")
         return "Question"
 
+
+# ------------------------------------------------------------------------------
+# Batch classification
+# ------------------------------------------------------------------------------
+def _parse_batch(content, count):
+    """
+    {index: label} from a JSON array response. Items that are missing,
+    out of range or carry an unknown label are left out.
+    """
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end < start:
+        return {}
+
+    try:
+        items = json.loads(content[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    labels = {}
+    for position, item in enumerate(items):
+        if isinstance(item, dict):
+            index, value = item.get("id"), item.get("intent")
+        else:
+            index, value = position, item   # bare ["label", ...] in input order
+
+        if not isinstance(index, int) or not 0 <= index < count or not isinstance(value, str):
+            continue
+        label = _normalize_label(value)
+        if label:
+            labels[index] = label
+
+    return labels
+
+
+def _single_key(text, model):
+    # per-reply cache entries are shared with analyze_reply
+    return cache_key(INTENT, model, INTENT.render(text=text))
+
+
+def _classify_chunk(texts, model):
+    """Labels for one batch request; None where the response was unusable"""
+    payload = json.dumps(
+        [{"id": i, "text": text} for i, text in enumerate(texts)],
+        ensure_ascii=False,
+    )
+    messages = INTENT_BATCH.render(replies=payload)
+
+    metrics.incr("intent_llm_batches")
+    metrics.incr("intent_llm_batch_items", len(texts))
+
+    try:
+        content = route_completion(
+            INTENT_ROUTE,
+            messages,
+            temperature=INTENT_BATCH.temperature,
+            timeout=BATCH_TIMEOUT_SECONDS,
+            tag=INTENT_BATCH.key,
+        )
+    except LLMError as e:
+        if e.transient:
+            raise
+        print(f"❌ OpenRouter error during batch intent analysis: {e}")
+        return [None] * len(texts)
+
+    labels = _parse_batch(content, len(texts))
+    if len(labels) < len(texts):
+        print(f"⚠️ Batch intent output covered {len(labels)}/{len(texts)} replies")
+
+    return [labels.get(i) for i in range(len(texts))]
+
+
+def analyze_replies(texts) -> list:
+    """
+    analyze_reply for many replies: ambiguous ones go to the LLM
+    INTENT_BATCH_SIZE per request, and only items the batch response
+    didn't label fall back to a single analyze_reply call.
+    Raises a transient LLMError like analyze_reply.
+    """
+    results = [None] * len(texts)
+    pending = []   # indexes that need the LLM
+
+    for i, text in enumerate(texts):
+        label, handled = _fastpath(text)
+        if handled:
+            results[i] = label
+        else:
+            pending.append(i)
+
+    if len(pending) < 2:
+        for i in pending:
+            results[i] = analyze_reply(texts[i])
+        return results
+
+    try:
+        model = route_model(INTENT_ROUTE)
     except Exception as e:
         print(f"❌ Unexpected intent analyzer error: {e}")
-        return "Question"
+        return [label or "Question" for label in results]
+
+    # 🔁 replies already classified (e.g. retried messages) skip the request
+    if LLM_CACHE:
+        uncached = []
+        for i in pending:
+            try:
+                label = _normalize_label(cache_get(_single_key(texts[i], model)))
+            except Exception as e:
+                print(f"⚠️ LLM cache read failed: {e}")
+                label = None
+            if label:
+                metrics.incr("llm_cache_hits")
+                results[i] = label
+            else:
+                uncached.append(i)
+        pending = uncached
+
+    for start in range(0, len(pending), INTENT_BATCH_SIZE):
+        chunk = pending[start:start + INTENT_BATCH_SIZE]
+        labels = _classify_chunk([texts[i] for i in chunk], model)
+
+        for i, label in zip(chunk, labels):
+            if label is None:
+                metrics.incr("intent_batch_fallbacks")
+                results[i] = analyze_reply(texts[i])
+                continue
+
+            results[i] = label
+            if LLM_CACHE:
+                cache_put(_single_key(texts[i], model), INTENT, model, label)
+
+    return results
@@ -0,0 +1,230 @@
+# intent_fastpath.py
+"""
+Offline first pass for intent classification.
+
+Keyword rules catch the unambiguous replies; a small bag-of-words
+logistic model (data/intent_model.json) handles the rest when it is
+confident. Anything else returns None and goes to the LLM.
+
+    python app/intent_fastpath.py train data/intent_fixtures.jsonl
+    python app/intent_fastpath.py eval data/intent_fixtures.jsonl
+"""
+import json
+import math
+import os
+import re
+import sys
+
+from config import get_env
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+MODEL_PATH = os.path.join(DATA_DIR, "intent_model.json")
+
+FASTPATH_ENABLED = (get_env("INTENT_FASTPATH") or "1") != "0"
+MODEL_THRESHOLD = float(get_env("INTENT_FASTPATH_THRESHOLD") or 0.85)
+
+LABELS = ["Interested", "Pricing", "Call Request", "Question", "Not Interested"]
+
+# A rule label is only used when it is the single label with a hit;
+# replies that hit several labels are mixed signals and go to the LLM.
+RULES = [
+    ("Not Interested", re.compile(
+        r"\b(unsubscribe|opt(?:[- ])?out|take me off|stop (?:emailing|contacting|sending)"
+        r"|not interested|no interest|(?:do not|don'?t) (?:contact|email|follow up)|we'?ll pass"
+        r"|not (?:a|the right) fit|not relevant)\b"
+        # "remove me" only as a list request, not "remove me from the cc"
+        r"|\bremove (?:me|my (?:email|address|details))"
+        r"(?: from (?:your |this |the |all )?(?:\w+ )?(?:list|lists|database|emails|mailings|outreach))?"
+        r"\s*(?:[.!]|$)"
+        # a refusal at the start of a sentence, not "no, thanks for the note"
+        r"|(?:^|[.!?]\s+)no,? thank(?:s| you)\b(?! for)",
+        re.MULTILINE,
+    )),
+    ("Call Request", re.compile(
+        r"\b(hop on a call|jump on a call|(?:schedule|set up|book) (?:a |some )?(?:quick |short )?(?:call|meeting|chat|demo|time)"
+        r"|calendar invite|meeting invite|calendly|give me a (?:ring|call)|call me|free (?:on|this|next)"
+        # "zoom" only as a call, not "zoom in on the numbers"
+        r"|(?:over|on|via) zoom|(?:a |quick )?zoom (?:call|meeting|link|chat)"
+        r"|available for a call|what time works|when works for you)\b"
+    )),
+    ("Pricing", re.compile(
+        r"\b(pricing|price list|how much|what (?:does|would) (?:it|this|that) cost|your rates?|hourly rate"
+        r"|ballpark"
+        # "quote" / "fees" only about the offer, not "quote our CEO" or "fees for cancellation"
+        r"|(?:a|your|price|pricing) quote|quote (?:for|on) (?:a|the|this|your)"
+        r"|your (?:\w+ )?fees?|(?:fixed|flat|monthly|annual|setup|set-up|one-time|license|licensing|subscription) fees?)\b"
+    )),
+]
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+_model = None
+
+
+def _tokens(text: str):
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _rule_hits(text: str):
+    lowered = text.lower()
+    return [label for label, pattern in RULES if pattern.search(lowered)]
+
+
+# ------------------------------------------------------------------------------
+# Linear model
+# ------------------------------------------------------------------------------
+def _load_model():
+    global _model
+
+    if _model is None:
+        try:
+            with open(MODEL_PATH, "r", encoding="utf-8") as f:
+                _model = json.load(f)
+        except FileNotFoundError:
+            _model = {}
+
+    return _model
+
+
+def _probabilities(model, text):
+    labels = model["labels"]
+    scores = list(model["bias"])
+
+    for token in _tokens(text):
+        weights = model["weights"].get(token)
+        if weights:
+            for i, w in enumerate(weights):
+                scores[i] += w
+
+    peak = max(scores)
+    exps = [math.exp(s - peak) for s in scores]
+    total = sum(exps)
+    return {label: e / total for label, e in zip(labels, exps)}
+
+
+def classify(text: str, model=None):
+    """
+    Returns (label, source) where source is "rules" or "model",
+    or (None, None) when the reply should go to the LLM.
+    """
+    if not FASTPATH_ENABLED or not text or not text.strip():
+        return None, None
+
+    hits = _rule_hits(text)
+    if len(hits) == 1:
+        return hits[0], "rules"
+    if hits:
+        # ⚖️ mixed signals ("not now, but what's your pricing?"): let the LLM decide
+        return None, None
+
+    model = model if model is not None else _load_model()
+    if model:
+        probs = _probabilities(model, text)
+        label, prob = max(probs.items(), key=lambda kv: kv[1])
+        if prob >= MODEL_THRESHOLD:
+            return label, "model"
+
+    return None, None
+
+
+def train(examples, epochs=60, lr=0.5, l2=0.01):
+    """Multinomial logistic regression with plain SGD"""
+    labels = LABELS
+    index = {label: i for i, label in enumerate(labels)}
+    bias = [0.0] * len(labels)
+    weights = {}
+
+    for _ in range(epochs):
+        for text, label in examples:
+            model = {"labels": labels, "bias": bias, "weights": weights}
+            probs = _probabilities(model, text)
+
+            for i, name in enumerate(labels):
+                grad = probs[name] - (1.0 if index[label] == i else 0.0)
+                bias[i] -= lr * grad
+                for token in _tokens(text):
+                    w = weights.setdefault(token, [0.0] * len(labels))
+                    w[i] -= lr * (grad + l2 * w[i])
+
+    weights = {
+        token: [round(w, 4) for w in ws]
+        for token, ws in weights.items()
+        if max(abs(w) for w in ws) >= 1e-3
+    }
+    return {
+        "version": 1,
+        "labels": labels,
+        "bias": [round(b, 4) for b in bias],
+        "weights": weights,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Evaluation harness
+# ------------------------------------------------------------------------------
+def load_fixtures(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [
+            (item["text"], item["label"])
+            for item in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+def evaluate(examples, folds=5):
+    """
+    Fast-path hit rate (= LLM calls saved) and accuracy on those hits.
+    The model is scored by k-fold cross-validation so it is never
+    evaluated on replies it was trained on.
+    """
+    hits = correct = 0
+    by_source = {}
+
+    for fold in range(folds):
+        train_set = [ex for i, ex in enumerate(examples) if i % folds != fold]
+        test_set = [ex for i, ex in enumerate(examples) if i % folds == fold]
+        model = train(train_set)
+
+        for text, expected in test_set:
+            label, source = classify(text, model)
+            if label is None:
+                continue
+            hits += 1
+            by_source[source] = by_source.get(source, 0) + 1
+            if label == expected:
+                correct += 1
+            else:
+                print(f"   ✗ {expected!r} -> {label!r} ({source}): {text}")
+
+    total = len(examples)
+    return {
+        "total": total,
+        "fastpath_hits": hits,
+        "hit_rate": hits / total if total else 0.0,
+        "fastpath_accuracy": correct / hits if hits else 0.0,
+        "llm_calls_saved": hits,
+        "by_source": by_source,
+    }
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in ("train", "eval"):
+        print(__doc__)
+        return 1
+
+    examples = load_fixtures(argv[2])
+
+    if argv[1] == "train":
+        model = train(examples)
+        with open(MODEL_PATH, "w", encoding="utf-8") as f:
+            json.dump(model, f, sort_keys=True)
+        print(f"✅ Model written to {MODEL_PATH} ({len(model['weights'])} features)")
+        return 0
+
+    report = evaluate(examples)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,66 +1,343 @@
 # lead_ingestion.py for pain point is string
+"""
+Bulk lead import. Rows are validated in memory and written in batches:
 
-import json
+  batch  INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id
+  copy   COPY into a temp staging table, then one merging INSERT (Postgres)
+
+Each file gets a report of inserted / duplicate / invalid rows. Files
+are streamed (see lead_sources.py), so any size can be imported:
+
+    cd app && python -m lead_ingestion ../data/leads.json more.jsonl --mode copy
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from email_validator import validate_email, EmailNotValidError
-from database import get_session_local
+
+import metrics
+from config import get_env, get_int_env
+from database import get_session_local, sync_schema
+from lead_sources import iter_positioned, prefetch, READERS
+from email_validation import check_syntax, ValidationStage, RESOLVERS
 from models import Lead
+from lead_state import INITIAL_DRAFT
+from notifications import notify, LEADS_NEW
 
+LEADS_INGEST_MODE = (get_env("LEADS_INGEST_MODE") or "batch").lower()  # batch | copy
+LEADS_BATCH_SIZE = get_int_env("LEADS_BATCH_SIZE", 1000)
+LEADS_COPY_CHUNK = get_int_env("LEADS_COPY_CHUNK", 50000)
 
-def ingest_leads(json_path):
-    SessionLocal = get_session_local()
-    session = SessionLocal()
+# columns taken from the source file, in COPY order
+LEAD_FIELDS = (
+    "name", "email", "company", "industry",
+    "pain_points", "conversation_opener", "negotiation_angle",
+)
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    # ✅ THIS IS THE FIX
-    leads = data.get("leads", [])
+def normalize_lead(l):
+    """
+    Source record -> insert row, or None if the email is missing or its
+    syntax is invalid. Deliverability is checked per batch (ValidationStage).
+    """
+    email = (l.get("email") or "").strip().lower()
+    if not email or check_syntax(email) is None:
+        return None
 
-    for l in leads:
-        email = (l.get("email") or "").strip().lower()
-        if not email:
-            print("⚠️ Skipping lead with empty email")
-            continue
+    pain = l.get("pain_points")
+    if isinstance(pain, list):
+        pain = ", ".join(pain)
+    elif isinstance(pain, str):
+        pain = pain.strip()
+    else:
+        pain = None
+
+    return {
+        "name": l.get("name"),
+        "email": email,
+        "company": l.get("company"),
+        "industry": l.get("industry"),
+        "pain_points": pain,
+        "conversation_opener": l.get("conversation_opener"),
+        "negotiation_angle": l.get("negotiation_angle"),
+    }
+
+
+def _new_lead_state(now):
+    # same as lead_state.next_action_for() for a fresh NEW lead
+    return {
+        "status": "NEW",
+        "followup_count": 0,
+        "draft_ready": False,
+        "sent_by_human": False,
+        "awaiting_reply": False,
+        "next_action": INITIAL_DRAFT,
+        "next_action_at": now,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Writers: each takes normalized rows and returns the number inserted;
+# the caller commits
+# ------------------------------------------------------------------------------
+def _insert_batch(session, rows):
+    if not rows:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    state = _new_lead_state(now)
+    values = [{**row, **state} for row in rows]
+    dialect = session.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        # executemany: one cached statement, batched into multi-row
+        # INSERTs by the driver layer ("insertmanyvalues")
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            insert(Lead.__table__)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(Lead.id)
+        )
+        return len(session.connection().execute(stmt, values).all())
 
+    # 🐢 no ON CONFLICT support: savepoint per row
+    inserted = 0
+    for value in values:
         try:
-            validate_email(email)
-        except EmailNotValidError:
-            print(f"⚠️ Invalid email skipped: {email}")
+            with session.begin_nested():
+                session.add(Lead(**value))
+            inserted += 1
+        except IntegrityError:
+            pass
+    return inserted
+
+
+def _copy_rows(cursor, rows):
+    # empty unquoted CSV fields load as NULL
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[f] is None else row[f] for f in LEAD_FIELDS])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY lead_staging ({', '.join(LEAD_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def _copy_merge(session, chunks):
+    """
+    COPYs every chunk into a temp table, then merges in one statement.
+    Returns (staged, inserted, position of the last chunk).
+    """
+    connection = session.connection()
+    cursor = connection.connection.cursor()
+    staged = 0
+    position = None
+
+    cursor.execute(
+        "CREATE TEMP TABLE lead_staging ("
+        + ", ".join(f"{f} TEXT" for f in LEAD_FIELDS)
+        + ") ON COMMIT DROP"
+    )
+    for rows, position in chunks:
+        if rows:
+            _copy_rows(cursor, rows)
+        staged += len(rows)
+
+    columns = ", ".join(LEAD_FIELDS)
+    result = session.execute(
+        text(
+            f"INSERT INTO leads ({columns}, status, followup_count, draft_ready, "
+            "sent_by_human, awaiting_reply, next_action, next_action_at) "
+            f"SELECT DISTINCT ON (email) {columns}, "
+            "'NEW', 0, false, false, false, :action, :now "
+            "FROM lead_staging ORDER BY email "
+            "ON CONFLICT (email) DO NOTHING RETURNING id"
+        ),
+        {"action": INITIAL_DRAFT, "now": datetime.now(timezone.utc)},
+    )
+    return staged, len(result.all()), position
+
+
+# ------------------------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------------------------
+def _chunks(items, size, report, validator):
+    """
+    Normalizes (record, position) items into lists of up to `size`
+    deliverable rows, counting invalid ones.
+    Yields (rows, position of the last item read).
+    """
+    rows = []
+    seen = set()
+    position = last_yielded = None
+
+    for record, position in items:
+        report["total"] += 1
+        row = normalize_lead(record)
+        if row is None:
+            report["invalid"] += 1
+            continue
+
+        # duplicates inside one chunk never reach the database
+        if row["email"] in seen:
+            report["duplicate"] += 1
             continue
+        seen.add(row["email"])
+        rows.append(row)
 
-        pain = l.get("pain_points")
-        if isinstance(pain, list):
-            pain = ", ".join(pain)
-        elif isinstance(pain, str):
-            pain = pain.strip()
+        if len(rows) >= size:
+            yield _deliverable(rows, report, validator), position
+            rows, seen = [], set()
+            last_yielded = position
+
+    # trailing rows, or only invalid ones that still move the checkpoint
+    if rows or position != last_yielded:
+        yield _deliverable(rows, report, validator), position
+
+
+def _deliverable(rows, report, validator):
+    kept = validator.filter(rows)
+    report["invalid"] += len(rows) - len(kept)
+    return kept
+
+
+def write_leads(records, source="leads", mode=None, batch_size=None, validator=None):
+    """Writes an iterable of lead dicts and returns the import report"""
+    items = ((record, None) for record in records)
+    return _write(items, source, mode, batch_size, validator=validator)
+
+
+def _write(items, source, mode=None, batch_size=None, on_batch=None, validator=None):
+    """
+    Writes (record, position) items. on_batch(session, report, position)
+    runs inside each batch's transaction, so checkpoints commit
+    atomically with the rows they cover.
+    """
+    mode = (mode or LEADS_INGEST_MODE).lower()
+    report = {"source": source, "total": 0, "inserted": 0, "duplicate": 0, "invalid": 0}
+    validator = validator or ValidationStage()
+    started = time.monotonic()
+
+    session = get_session_local()()
+    try:
+        if mode == "copy" and session.get_bind().dialect.name != "postgresql":
+            print("⚠️ COPY ingestion needs PostgreSQL, falling back to batch inserts")
+            mode = "batch"
+
+        if mode == "copy":
+            staged, report["inserted"], position = _copy_merge(
+                session, _chunks(items, LEADS_COPY_CHUNK, report, validator)
+            )
+            report["duplicate"] += staged - report["inserted"]
+            if on_batch:
+                on_batch(session, report, position)
+            session.commit()
         else:
-            pain = None
-
-        lead = Lead(
-            name=l.get("name"),
-            email=email,
-            company=l.get("company"),
-            industry=l.get("industry"),
-            pain_points=pain,
-            conversation_opener=l.get("conversation_opener"),
-            negotiation_angle=l.get("negotiation_angle"),
-            status="NEW",
-            followup_count=0,
+            for rows, position in _chunks(items, batch_size or LEADS_BATCH_SIZE, report, validator):
+                inserted = _insert_batch(session, rows)
+                report["inserted"] += inserted
+                report["duplicate"] += len(rows) - inserted
+                if on_batch:
+                    on_batch(session, report, position)
+                session.commit()
+
+        # 📣 one wakeup for the whole file
+        if report["inserted"]:
+            notify(session, LEADS_NEW)
+            session.commit()
+
+    except Exception:
+        session.rollback()
+        raise
+
+    finally:
+        session.close()
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    report["rows_per_sec"] = round(report["total"] / max(report["seconds"], 1e-6))
+    report["validation"] = validator.stats()
+
+    metrics.incr("leads_ingested", report["inserted"])
+    metrics.incr("leads_duplicate", report["duplicate"])
+    metrics.incr("leads_invalid", report["invalid"])
+
+    print(
+        f"📥 {source}: {report['inserted']} inserted, {report['duplicate']} duplicate, "
+        f"{report['invalid']} invalid ({report['rows_per_sec']} rows/s, {mode})"
+    )
+    if validator.check_deliverability:
+        v = report["validation"]
+        print(
+            f"   ✉️ validation: {v['emails']} emails, {v['undeliverable']} undeliverable, "
+            f"{v['domain_lookups']} domain lookups, {v['cache_hit_rate']:.0%} cache hits, "
+            f"{v['emails_per_sec']} emails/s"
         )
+    metrics.incr("email_domain_lookups", report["validation"]["domain_lookups"])
+    return report
 
-        try:
-            session.add(lead)
-            session.commit()  # 🔒 commit per lead
 
-        except IntegrityError:
-            session.rollback()
-            print(f"⚠️ Duplicate lead skipped: {email}")
-            continue
+def ingest_leads(
+    path,
+    fmt=None,
+    mode=None,
+    batch_size=None,
+    checkpoint=(0, 0),
+    on_batch=None,
+    validator=None,
+):
+    """
+    Streams a JSON / JSONL / CSV lead file into the database, starting
+    after `checkpoint` (byte_offset, records) - see ingest_watcher.py.
+    """
+    items = prefetch(iter_positioned(path, fmt, *checkpoint))
+    return _write(
+        items, path, mode=mode, batch_size=batch_size, on_batch=on_batch, validator=validator
+    )
+
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m lead_ingestion",
+        description="Import lead files (.json, .jsonl/.ndjson, .csv)",
+    )
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--format", choices=sorted(READERS), help="override detection by extension")
+    parser.add_argument("--mode", choices=("batch", "copy"), help=f"default: {LEADS_INGEST_MODE}")
+    parser.add_argument("--batch-size", type=int, help=f"default: {LEADS_BATCH_SIZE}")
+    parser.add_argument("--resolver", choices=sorted(RESOLVERS), help="domain resolver for deliverability checks")
+    parser.add_argument("--no-deliverability", action="store_true", help="syntax checks only")
+    args = parser.parse_args(argv)
+
+    sync_schema()
+
+    failed = 0
+    for path in args.paths:
+        try:
+            validator = ValidationStage(
+                resolver=RESOLVERS[args.resolver]() if args.resolver else None,
+                check_deliverability=False if args.no_deliverability else None,
+            )
+            ingest_leads(
+                path,
+                fmt=args.format,
+                mode=args.mode,
+                batch_size=args.batch_size,
+                validator=validator,
+            )
         except Exception as e:
-            session.rollback()
-            print(f"❌ Failed to ingest lead {email}: {e}")
-            continue
+            failed += 1
+            print(f"❌ {path}: {e}")
+
+    return 1 if failed else 0
+
 
-    session.close()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# lead_sources.py
+"""
+Streaming lead readers. Every reader yields one dict per lead in
+constant memory, whatever the file size:
+
+  .json         {"count": .., "leads": [...]} or a top-level array
+                (ijson when installed, else an incremental scanner)
+  .jsonl        one object per line (orjson when installed)
+  .ndjson
+  .csv          header row with the lead field names
+"""
+import csv
+import json
+import os
+import queue
+import re
+import threading
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+READ_CHUNK = 1 << 16
+PREFETCH_ITEMS = 5000
+
+FORMATS = {
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+}
+
+_LEADS_KEY = re.compile(r'"leads"\s*:\s*\[')
+_SKIP = re.compile(r"[\s,]*")
+
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unknown lead file format: {path}")
+    return fmt
+
+
+def _scan_json_array(f):
+    """
+    Yields the items of the "leads" array (or of a top-level array)
+    with json.JSONDecoder.raw_decode over a sliding buffer.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(READ_CHUNK)
+
+    # 🔎 find where the array starts
+    stripped = buf.lstrip()
+    if stripped.startswith("["):
+        pos = len(buf) - len(stripped) + 1
+    else:
+        while True:
+            match = _LEADS_KEY.search(buf)
+            if match:
+                pos = match.end()
+                break
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return
+            buf = buf[-64:] + chunk
+
+    while True:
+        pos = _SKIP.match(buf, pos).end()
+
+        if pos < len(buf) and buf[pos] == "]":
+            return
+
+        if pos < len(buf):
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+                yield item
+                continue
+            except json.JSONDecodeError:
+                pass   # item continues in the next chunk
+
+        chunk = f.read(READ_CHUNK)
+        if not chunk:
+            if pos < len(buf):
+                raise ValueError("Truncated JSON lead file")
+            return
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+# ------------------------------------------------------------------------------
+# Positioned readers: yield (lead, (byte_offset, records)) where the position
+# is just past that lead, so an import can resume from a checkpoint.
+# JSON has no usable byte offsets and resumes by skipping `records` items.
+# ------------------------------------------------------------------------------
+def _json_items(path):
+    if ijson is not None:
+        with open(path, "rb") as f:
+            head = f.read(READ_CHUNK).lstrip()
+            f.seek(0)
+            prefix = "item" if head.startswith(b"[") else "leads.item"
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _scan_json_array(f)
+
+
+def iter_json(path, byte_offset=0, records=0):
+    for count, item in enumerate(_json_items(path), 1):
+        if count > records:
+            yield item, (None, count)
+
+
+def iter_jsonl(path, byte_offset=0, records=0):
+    with open(path, "rb") as f:
+        f.seek(byte_offset)
+        for line in f:
+            byte_offset += len(line)
+            if not line.strip():
+                continue
+
+            records += 1
+            try:
+                item = _loads(line)
+            except ValueError:
+                print(f"⚠️ {path}: malformed JSON line at byte {byte_offset - len(line)}")
+                item = {}   # counted as invalid
+            yield item, (byte_offset, records)
+
+
+def iter_csv(path, byte_offset=0, records=0):
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]), [])
+
+        byte_offset = max(byte_offset, len(header_line))
+        f.seek(byte_offset)
+
+        # a record ends at a line break outside quotes ("" escapes keep parity)
+        pending, quotes = [], 0
+        for line in f:
+            byte_offset += len(line)
+            pending.append(line)
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+
+            text = b"".join(pending).decode("utf-8")
+            pending, quotes = [], 0
+            if not text.strip():
+                continue
+
+            values = next(csv.reader([text]), [])
+            records += 1
+            yield {k: (v or None) for k, v in zip(header, values) if k}, (byte_offset, records)
+
+
+READERS = {
+    "json": iter_json,
+    "jsonl": iter_jsonl,
+    "csv": iter_csv,
+}
+
+
+def iter_positioned(path, fmt=None, byte_offset=0, records=0):
+    return READERS[fmt or detect_format(path)](path, byte_offset or 0, records or 0)
+
+
+def iter_leads(path, fmt=None):
+    return (item for item, _ in iter_positioned(path, fmt))
+
+
+def prefetch(items, maxsize=PREFETCH_ITEMS):
+    """
+    Runs the reader on a background thread behind a bounded queue, so
+    parsing overlaps with database writes without buffering the file.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                q.put(item)
+        except Exception as e:
+            q.put(e)
+        finally:
+            q.put(done)
+
+    thread = threading.Thread(target=produce, name="lead-reader", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # consumer gave up early: unblock and stop the producer
+        stop.set()
+        while thread.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                thread.join(0.05)
@@ -0,0 +1,106 @@
+# lead_state.py
+"""
+Precomputed scheduling state. Every state transition calls
+schedule_next_action(lead) so the jobs can pick due leads with one
+indexed range query on (next_action, next_action_at).
+"""
+from datetime import datetime, timedelta, timezone
+
+from models import Lead
+
+MAX_FOLLOWUPS = 3
+FOLLOWUP_DELAY = timedelta(minutes=5)  # change for prod
+POST_REPLY_WAIT = timedelta(hours=24)
+# POST_REPLY_WAIT = timedelta(minutes=2)
+
+INITIAL_DRAFT = "initial_draft"
+FOLLOWUP = "followup"
+POST_REPLY_FOLLOWUP = "post_reply_followup"
+
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def next_action_for(lead, now=None):
+    """(action, due_at) for the lead's current state, or (None, None)"""
+    now = now or datetime.now(timezone.utc)
+
+    if getattr(lead, "draft_error", None):
+        return None, None   # parked until retried from the dashboard
+
+    if lead.status == "NEW" and not lead.draft_ready:
+        return INITIAL_DRAFT, now
+
+    if (
+        lead.status in ("EMAIL_SENT", "FOLLOWUP_SENT")
+        and lead.last_email_sent is not None
+        and (lead.followup_count or 0) < MAX_FOLLOWUPS
+        and not lead.draft_ready
+    ):
+        return FOLLOWUP, _utc(lead.last_email_sent) + FOLLOWUP_DELAY
+
+    if (
+        lead.status == "QUALIFIED"
+        and lead.awaiting_reply
+        and lead.last_ai_reply_sent is not None
+    ):
+        return POST_REPLY_FOLLOWUP, _utc(lead.last_ai_reply_sent) + POST_REPLY_WAIT
+
+    return None, None
+
+
+def status_before_draft(lead):
+    """
+    The status a drafted lead had before its draft was saved; restoring it
+    on discard lets next_action_for schedule a new draft. Replies are
+    drafted per inbound message, so a discarded reply just goes back to
+    QUALIFIED.
+    """
+    if lead.draft_type == "reply":
+        return "QUALIFIED"
+    if lead.draft_type == "initial" or lead.last_email_sent is None:
+        return "NEW"
+    return "FOLLOWUP_SENT" if lead.followup_count else "EMAIL_SENT"
+
+
+def schedule_next_action(lead, now=None):
+    lead.next_action, lead.next_action_at = next_action_for(lead, now)
+
+
+def due(action, now=None):
+    """Filter criteria for leads whose `action` is due"""
+    now = now or datetime.now(timezone.utc)
+    return (Lead.next_action == action, Lead.next_action_at <= now)
+
+
+def backfill_next_actions(session, batch_size=1000):
+    """Computes next_action for rows written before the column existed"""
+    updated = 0
+    last_id = 0
+
+    while True:
+        leads = (
+            session.query(Lead)
+            .filter(
+                Lead.id > last_id,
+                Lead.next_action.is_(None),
+                Lead.status.in_(["NEW", "EMAIL_SENT", "FOLLOWUP_SENT", "QUALIFIED"]),
+            )
+            .order_by(Lead.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not leads:
+            break
+
+        for lead in leads:
+            schedule_next_action(lead)
+            updated += lead.next_action is not None
+
+        last_id = leads[-1].id
+        session.commit()
+
+    return updated
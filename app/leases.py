@@ -0,0 +1,104 @@
+# leases.py
+"""
+Claim-and-lease work acquisition for the scheduler jobs.
+
+A short transaction stamps a chunk of leads with this worker's id and a
+lease expiry, then commits. The slow LLM/SMTP work runs without holding
+row locks and each lead's result is committed on its own. Leases that
+expire (crashed worker, failed draft) are picked up again automatically.
+"""
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+
+import metrics
+from config import get_int_env
+from models import Lead
+from draft_engine import snapshot_lead
+from lead_state import schedule_next_action
+from llm_client import LLMError
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+LEASE_DURATION = timedelta(minutes=get_int_env("LEAD_LEASE_MINUTES", 10))
+CLAIM_CHUNK_SIZE = get_int_env("LEAD_CLAIM_CHUNK", 50)
+MAX_DRAFT_ATTEMPTS = get_int_env("MAX_DRAFT_ATTEMPTS", 3)
+
+
+def claim_leads(session, *criteria, limit=None, order_by=None):
+    """Claims up to `limit` unleased leads matching criteria. Returns snapshots."""
+    now = datetime.now(timezone.utc)
+
+    leads = (
+        session.query(Lead)
+        .filter(
+            *criteria,
+            or_(Lead.lease_until.is_(None), Lead.lease_until < now),
+        )
+        .order_by(order_by if order_by is not None else Lead.id)
+        .limit(limit or CLAIM_CHUNK_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    for lead in leads:
+        lead.claimed_by = WORKER_ID
+        lead.lease_until = now + LEASE_DURATION
+
+    jobs = [snapshot_lead(lead) for lead in leads]
+    session.commit()
+    return jobs
+
+
+def owned_lead(session, lead_id):
+    """The lead, row-locked, if this worker still holds its lease; else None"""
+    return (
+        session.query(Lead)
+        .filter(
+            Lead.id == lead_id,
+            Lead.claimed_by == WORKER_ID,
+            Lead.lease_until >= datetime.now(timezone.utc),
+        )
+        .with_for_update()
+        .first()
+    )
+
+
+def release(lead):
+    lead.claimed_by = None
+    lead.lease_until = None
+
+
+def record_draft_failure(session, job, error):
+    """
+    Provider outages keep the lease: the lead is retried once it expires,
+    without counting against it. Other failures are counted per lead;
+    a non-transient LLMError (bad request, auth) or MAX_DRAFT_ATTEMPTS
+    failures park the lead with draft_error set, lease released and
+    nothing scheduled, until it is retried from the dashboard.
+    """
+    if isinstance(error, LLMError) and error.transient:
+        return
+
+    lead = owned_lead(session, job.id)
+    if not lead:
+        session.rollback()
+        return
+
+    lead.draft_attempts = (lead.draft_attempts or 0) + 1
+
+    if isinstance(error, LLMError) or lead.draft_attempts >= MAX_DRAFT_ATTEMPTS:
+        print(f"🚫 Giving up drafting for {lead.email} after {lead.draft_attempts} attempts: {error}")
+        metrics.incr("draft_failures")
+        lead.draft_error = str(error)[:1000]
+        schedule_next_action(lead)
+        release(lead)
+
+    session.commit()
+
+
+def clear_draft_failure(lead):
+    """After a successful draft, or to retry a parked lead (reschedule it afterwards)"""
+    lead.draft_attempts = None
+    lead.draft_error = None
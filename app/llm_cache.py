@@ -0,0 +1,186 @@
+# llm_cache.py
+"""
+Content-addressed cache for LLM completions.
+
+The key is a hash of (template key, model, temperature, rendered
+messages), so any prompt or template change is a miss. Lookups go to an
+in-process LRU first, then to the llm_cache table, which survives
+restarts and is shared between workers. Only validated responses are
+stored; `regenerate=True` skips the lookup and overwrites the entry.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+import metrics
+from config import get_env, get_int_env
+from database import get_session_local
+from models import LLMCacheEntry
+
+LLM_CACHE = (get_env("LLM_CACHE") or "1") == "1"
+LLM_CACHE_TTL = timedelta(hours=get_int_env("LLM_CACHE_TTL_HOURS", 24 * 7))
+LLM_CACHE_MAX_ROWS = get_int_env("LLM_CACHE_MAX_ROWS", 100000)
+LLM_CACHE_MEMORY_SIZE = get_int_env("LLM_CACHE_MEMORY_SIZE", 2000)
+
+_memory = OrderedDict()   # key -> (content, expires_at)
+_lock = threading.Lock()
+
+
+def cache_key(template, model, messages):
+    payload = json.dumps(
+        [template.key, model, template.temperature, messages],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _remember(key, content, expires_at):
+    with _lock:
+        _memory[key] = (content, expires_at)
+        _memory.move_to_end(key)
+        while len(_memory) > LLM_CACHE_MEMORY_SIZE:
+            _memory.popitem(last=False)
+            metrics.incr("llm_cache_evictions")
+
+
+def get(key):
+    now = datetime.now(timezone.utc)
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                _memory.move_to_end(key)
+                return entry[0]
+            del _memory[key]
+
+    session = get_session_local()()
+    try:
+        row = session.get(LLMCacheEntry, key)
+        if row is None or _utc(row.expires_at) <= now:
+            return None
+        row.hits = (row.hits or 0) + 1
+        row.last_hit_at = now
+        content, expires_at = row.content, _utc(row.expires_at)
+        session.commit()
+    finally:
+        session.close()
+
+    _remember(key, content, expires_at)
+    return content
+
+
+def put(key, template, model, content):
+    now = datetime.now(timezone.utc)
+    expires_at = now + LLM_CACHE_TTL
+
+    session = get_session_local()()
+    try:
+        session.merge(
+            LLMCacheEntry(
+                key=key,
+                template=template.key,
+                model=model,
+                content=content,
+                hits=0,
+                created_at=now,
+                expires_at=expires_at,
+            )
+        )
+        session.commit()
+    except Exception as e:
+        # a concurrent insert of the same key is fine; the cache is best effort
+        session.rollback()
+        print(f"⚠️ LLM cache write failed: {e}")
+    finally:
+        session.close()
+
+    _remember(key, content, expires_at)
+
+
+def cached_completion(template, messages, complete, *, model, validate=None, regenerate=False):
+    """
+    Returns the cached response for these exact messages, or calls
+    complete() and caches its result once validate(content) accepts it.
+    """
+    if not LLM_CACHE:
+        content = complete()
+        if validate:
+            validate(content)
+        return content
+
+    key = cache_key(template, model, messages)
+
+    if regenerate:
+        metrics.incr("llm_cache_bypass")
+    else:
+        try:
+            content = get(key)
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+            content = None
+
+        if content is not None:
+            metrics.incr("llm_cache_hits")
+            metrics.incr(f"llm_cache_hits_{template.key}")
+            return content
+        metrics.incr("llm_cache_misses")
+
+    content = complete()
+    if validate:
+        validate(content)
+    put(key, template, model, content)
+    return content
+
+
+def evict_llm_cache():
+    """Scheduler job: drops expired rows, then the least recently used beyond LLM_CACHE_MAX_ROWS"""
+    now = datetime.now(timezone.utc)
+    session = get_session_local()()
+
+    try:
+        evicted = (
+            session.query(LLMCacheEntry)
+            .filter(LLMCacheEntry.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
+
+        excess = session.query(LLMCacheEntry).count() - LLM_CACHE_MAX_ROWS
+        if excess > 0:
+            oldest = (
+                session.query(LLMCacheEntry.key)
+                .order_by(func.coalesce(LLMCacheEntry.last_hit_at, LLMCacheEntry.created_at))
+                .limit(excess)
+                .subquery()
+            )
+            evicted += (
+                session.query(LLMCacheEntry)
+                .filter(LLMCacheEntry.key.in_(session.query(oldest.c.key)))
+                .delete(synchronize_session=False)
+            )
+
+        session.commit()
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ LLM cache eviction failed: {e}")
+        return 0
+
+    finally:
+        session.close()
+
+    if evicted:
+        metrics.incr("llm_cache_evictions", evicted)
+        print(f"🧹 Evicted {evicted} LLM cache entries")
+    return evicted
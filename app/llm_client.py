@@ -0,0 +1,236 @@
+# llm_client.py
+"""
+Shared OpenRouter client: one keep-alive connection pool, one retry
+policy and cached config for every LLM call in the process. Calls go
+through the circuit breaker and AIMD concurrency limit in llm_guard.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, Timeout
+
+import metrics
+from config import get_openrouter_config, get_env, get_int_env
+from llm_guard import (
+    backoff_delay,
+    parse_retry_after,
+    get_breaker,
+    get_concurrency,
+    LLM_RETRY_MAX_SECONDS,
+)
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+LLM_HTTP2 = get_env("LLM_HTTP2") == "1"          # needs httpx[http2]
+LLM_POOL_SIZE = get_int_env("LLM_POOL_SIZE", 10)
+LLM_MAX_RETRIES = get_int_env("LLM_MAX_RETRIES", 2)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    transient = False   # True: provider trouble, retry later instead of falling back
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMTimeout(LLMError):
+    transient = True
+
+
+class LLMUnavailable(LLMError):
+    """Circuit open, or retries exhausted on 429/5xx/network errors"""
+    transient = True
+
+
+_config = None
+_client = None
+_lock = threading.Lock()
+
+
+def get_config():
+    """OpenRouter config, read from the environment once per process"""
+    global _config
+
+    if _config is None:
+        _config = get_openrouter_config()
+    return _config
+
+
+def _build_requests_session(cfg):
+    # retries are done by chat_completion (jitter, Retry-After, breaker)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=LLM_POOL_SIZE,
+        max_retries=0,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers.update(
+        {
+            "Authorization": f"Bearer {cfg['api_key']}",
+            "Content-Type": "application/json",
+        }
+    )
+    return session
+
+
+def _build_httpx_client(cfg):
+    import httpx
+
+    return httpx.Client(
+        http2=True,
+        transport=httpx.HTTPTransport(http2=True),
+        limits=httpx.Limits(max_connections=LLM_POOL_SIZE),
+        headers={
+            "Authorization": f"Bearer {cfg['api_key']}",
+            "Content-Type": "application/json",
+        },
+    )
+
+
+def _get_client():
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                cfg = get_config()
+                if LLM_HTTP2:
+                    try:
+                        _client = _build_httpx_client(cfg)
+                    except ImportError:
+                        print("⚠️ LLM_HTTP2=1 but httpx[http2] is not installed, using HTTP/1.1")
+                if _client is None:
+                    _client = _build_requests_session(cfg)
+
+    return _client
+
+
+def _post(payload, timeout):
+    client = _get_client()
+
+    if isinstance(client, requests.Session):
+        try:
+            return client.post(OPENROUTER_URL, json=payload, timeout=timeout)
+        except Timeout:
+            raise LLMTimeout("OpenRouter request timed out")
+        except RequestException as e:
+            raise LLMError(f"Network error: {e}")
+
+    import httpx
+
+    try:
+        return client.post(OPENROUTER_URL, json=payload, timeout=timeout)
+    except httpx.TimeoutException:
+        raise LLMTimeout("OpenRouter request timed out")
+    except httpx.HTTPError as e:
+        raise LLMError(f"Network error: {e}")
+
+
+def _send(payload, timeout, sleep=time.sleep):
+    """
+    POSTs with full-jitter exponential backoff on 429/5xx and network
+    errors, honouring Retry-After. Every attempt needs the circuit
+    breaker's permission and an AIMD concurrency slot.
+    Returns the 200 response; raises LLMError / LLMTimeout / LLMUnavailable.
+    """
+    breaker = get_breaker()
+    concurrency = get_concurrency()
+    error = None
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not breaker.allow():
+            metrics.incr("llm_circuit_rejected")
+            raise LLMUnavailable(f"LLM circuit open ({error or 'provider unavailable'})")
+
+        retry_after = None
+        concurrency.acquire()
+        try:
+            response = _post(payload, timeout)
+        except LLMTimeout:
+            # the call already used its whole budget; don't retry
+            breaker.record_failure()
+            raise
+        except LLMError as e:
+            breaker.record_failure()
+            error = e
+        else:
+            if response.status_code == 200:
+                breaker.record_success()
+                concurrency.on_success()
+                return response
+
+            message = f"OpenRouter HTTP {response.status_code}: {response.text}"
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()   # the provider is up; the request is wrong
+                raise LLMError(message, status_code=response.status_code)
+
+            if response.status_code == 429:
+                metrics.incr("llm_throttled")
+                concurrency.on_throttled()
+            breaker.record_failure()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            error = LLMError(message, status_code=response.status_code)
+        finally:
+            concurrency.release()
+
+        if attempt == LLM_MAX_RETRIES:
+            break
+
+        delay = backoff_delay(attempt, retry_after)
+        if delay > LLM_RETRY_MAX_SECONDS:
+            break   # provider asked for a long pause; let the job retry later
+        metrics.incr("llm_retries")
+        sleep(delay)
+
+    raise LLMUnavailable(str(error), status_code=error.status_code)
+
+
+def _record_usage(usage, tag):
+    """Token counts per call; cached_tokens shows how much of the prompt prefix hit the provider cache"""
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+
+    for prefix in ("llm", f"llm_{tag}") if tag else ("llm",):
+        metrics.incr(f"{prefix}_prompt_tokens", prompt_tokens)
+        metrics.incr(f"{prefix}_cached_tokens", cached_tokens)
+        metrics.incr(f"{prefix}_completion_tokens", completion_tokens)
+        metrics.observe(f"{prefix}_prompt_tokens_per_call", prompt_tokens)
+
+
+def chat_completion(messages, *, temperature, timeout, model=None, tag=None) -> str:
+    """
+    Runs one chat completion and returns the stripped message content.
+    `tag` (a prompt template key) labels the token usage metrics.
+    Raises LLMError (LLMTimeout on timeouts) on any failure.
+    """
+    payload = {
+        "model": model or get_config()["model"],
+        "messages": messages,
+        "temperature": temperature,
+        "usage": {"include": True},
+    }
+
+    response = _send(payload, timeout)
+
+    try:
+        data = response.json()
+    except ValueError:
+        raise LLMError("OpenRouter returned invalid JSON")
+
+    _record_usage(data.get("usage") or {}, tag)
+
+    choices = data.get("choices")
+    if not choices:
+        raise LLMError("OpenRouter response missing choices")
+
+    return (
+        (choices[0].get("message") or {}).get("content")
+        or ""
+    ).strip()
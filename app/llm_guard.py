@@ -0,0 +1,228 @@
+# llm_guard.py
+"""
+Provider protection for LLM calls: retry backoff, a circuit breaker that
+pauses LLM work while OpenRouter is down, and AIMD concurrency control
+that shrinks in-flight requests on 429s and grows them while healthy.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import metrics
+from config import get_int_env
+
+LLM_RETRY_BASE_SECONDS = 1.0
+LLM_RETRY_MAX_SECONDS = get_int_env("LLM_RETRY_MAX_SECONDS", 30)
+
+LLM_BREAKER_FAILURES = get_int_env("LLM_BREAKER_FAILURES", 5)       # consecutive failures to open
+LLM_BREAKER_COOLDOWN = get_int_env("LLM_BREAKER_COOLDOWN", 30)      # seconds, doubles per failed probe
+LLM_BREAKER_MAX_COOLDOWN = get_int_env("LLM_BREAKER_MAX_COOLDOWN", 600)
+
+LLM_MAX_CONCURRENCY = get_int_env("LLM_MAX_CONCURRENCY", 10)
+LLM_MIN_CONCURRENCY = 1
+DECREASE_FACTOR = 0.5      # multiplicative decrease on a 429
+DECREASE_INTERVAL = 2.0    # at most one decrease per burst of 429s
+
+
+def backoff_delay(attempt, retry_after=None, rng=random.random):
+    """
+    Full-jitter exponential backoff for retry `attempt` (0-based).
+    A Retry-After from the provider is a floor, not a suggestion.
+    """
+    delay = rng() * min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures.
+    open -> half-open once the cooldown passes; one probe call is let
+    through. Success closes the circuit, failure reopens it with a
+    doubled cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold=LLM_BREAKER_FAILURES,
+        cooldown=LLM_BREAKER_COOLDOWN,
+        max_cooldown=LLM_BREAKER_MAX_COOLDOWN,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge("llm_circuit_open", 0 if state == self.CLOSED else 1)
+
+    def available(self) -> bool:
+        """True unless the circuit is open and still cooling down (no side effects)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return True
+            return self.clock() - self.opened_at >= self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the probe in half-open state"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.cooldown:
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._probing = False
+
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("✅ LLM circuit closed, provider is answering again")
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._probing = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN:
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.failures < self.failure_threshold:
+                return
+
+            if self.state != self.OPEN:
+                metrics.incr("llm_circuit_trips")
+                print(f"🔌 LLM circuit open for {self.cooldown}s after {self.failures} failures")
+
+            self.opened_at = self.clock()
+            self._probing = False
+            self._set_state(self.OPEN)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight requests: +1 per `limit` successes
+    (about one step per round of calls), halved on a 429.
+    """
+
+    def __init__(
+        self,
+        max_limit=LLM_MAX_CONCURRENCY,
+        min_limit=LLM_MIN_CONCURRENCY,
+        clock=time.monotonic,
+    ):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.clock = clock
+        self._last_decrease = -DECREASE_INTERVAL
+        self._cond = threading.Condition()
+        metrics.set_gauge("llm_concurrency_limit", self.limit)
+
+    def acquire(self):
+        with self._cond:
+            waited = False
+            while self.in_flight >= int(self.limit):
+                if not waited:
+                    metrics.incr("llm_concurrency_waits")
+                    waited = True
+                self._cond.wait()
+            self.in_flight += 1
+            metrics.set_gauge("llm_in_flight", self.in_flight)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            metrics.set_gauge("llm_in_flight", self.in_flight)
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            before = int(self.limit)
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            metrics.set_gauge("llm_concurrency_limit", self.limit)
+            if int(self.limit) > before:
+                self._cond.notify()
+
+    def on_throttled(self):
+        with self._cond:
+            now = self.clock()
+            if now - self._last_decrease < DECREASE_INTERVAL:
+                return
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+            metrics.set_gauge("llm_concurrency_limit", self.limit)
+
+
+_breaker = None
+_concurrency = None
+_lock = threading.Lock()
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+
+    return _breaker
+
+
+def get_concurrency() -> AdaptiveConcurrency:
+    global _concurrency
+
+    if _concurrency is None:
+        with _lock:
+            if _concurrency is None:
+                _concurrency = AdaptiveConcurrency()
+
+    return _concurrency
+
+
+def llm_available() -> bool:
+    """For scheduler jobs: skip LLM work while the circuit is open"""
+    return get_breaker().available()
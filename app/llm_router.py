@@ -0,0 +1,116 @@
+# llm_router.py
+"""
+Per-task model routing with hedged requests.
+
+Each route ("draft", "intent") has its own model, so intent classification
+can run on a fast, cheap model while drafts use a quality one. When the
+route also has a hedge model, a backup request goes to it once the
+primary has been in flight longer than the route's observed p95 latency,
+and whichever answers first wins.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import metrics
+from config import get_env, get_int_env
+from llm_client import chat_completion, get_config, LLM_POOL_SIZE
+from llm_guard import llm_available
+
+DRAFT = "draft"
+INTENT = "intent"
+
+LLM_HEDGE = (get_env("LLM_HEDGE") or "1") == "1"
+LLM_HEDGE_QUANTILE = 0.95
+LLM_HEDGE_MIN_SAMPLES = get_int_env("LLM_HEDGE_MIN_SAMPLES", 20)
+LLM_HEDGE_DEFAULT_SECONDS = get_int_env("LLM_HEDGE_DEFAULT_SECONDS", 8)   # until the p95 is known
+LLM_HEDGE_MIN_SECONDS = 1.0
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_route(route):
+    """{"model": ..., "hedge_model": ... or None} for a route"""
+    return get_config()["routes"][route]
+
+
+def route_model(route):
+    """Primary model of a route, which also keys cached responses"""
+    return get_route(route)["model"]
+
+
+def hedge_delay(route):
+    """Seconds to wait for the primary before hedging: the route's p95"""
+    p95, samples = metrics.quantile(f"llm_{route}_primary_seconds", LLM_HEDGE_QUANTILE)
+    if p95 is None or samples < LLM_HEDGE_MIN_SAMPLES:
+        return LLM_HEDGE_DEFAULT_SECONDS
+    return max(LLM_HEDGE_MIN_SECONDS, p95)
+
+
+def _get_pool():
+    global _pool
+
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=2 * LLM_POOL_SIZE,
+                    thread_name_prefix="llm-route",
+                )
+    return _pool
+
+
+def _timed_call(route, role, model, messages, temperature, timeout, tag):
+    started = time.monotonic()
+    content = chat_completion(
+        messages,
+        temperature=temperature,
+        timeout=timeout,
+        model=model,
+        tag=tag,
+    )
+    # only answered calls: the p95 is a latency, not a timeout rate
+    metrics.histogram(f"llm_{route}_{role}_seconds", time.monotonic() - started)
+    return content
+
+
+def _hedged(route, cfg, messages, temperature, timeout, tag):
+    pool = _get_pool()
+    primary = pool.submit(_timed_call, route, "primary", cfg["model"], messages, temperature, timeout, tag)
+
+    done, _ = wait([primary], timeout=hedge_delay(route))
+    if done or not llm_available():
+        return primary.result()
+
+    metrics.incr(f"llm_{route}_hedges")
+    backup = pool.submit(_timed_call, route, "hedge", cfg["hedge_model"], messages, temperature, timeout, tag)
+    pending = {primary, backup}
+
+    # first successful answer wins; the loser finishes in the background
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is backup:
+                    metrics.incr(f"llm_{route}_hedge_wins")
+                return future.result()
+
+    return primary.result()   # both failed: surface the primary's error
+
+
+def complete(route, messages, *, temperature, timeout, tag=None) -> str:
+    """
+    chat_completion on the route's model, hedged to its backup model when
+    one is configured. Raises LLMError like chat_completion.
+    """
+    cfg = get_route(route)
+    started = time.monotonic()
+
+    if LLM_HEDGE and cfg["hedge_model"]:
+        content = _hedged(route, cfg, messages, temperature, timeout, tag)
+    else:
+        content = _timed_call(route, "primary", cfg["model"], messages, temperature, timeout, tag)
+
+    metrics.histogram(f"llm_{route}_seconds", time.monotonic() - started)
+    return content
@@ -1,33 +1,52 @@
+import os
 import time
 import sys
 
-from database import get_engine, Base
-from lead_ingestion import ingest_leads
+from database import get_engine, get_session_local, sync_schema
+from ingest_watcher import ingest_file, scan_drop_folder, LEADS_DROP_DIR
 from initial_sender import generate_initial_drafts
 from followup_scheduler import start_scheduler
-from reply_listener import listen_replies
+from reply_listener import listen_replies, start_idle_listener, REPLY_LISTENER_MODE
 from post_reply_followup import check_post_reply_followups
+from outbox import dispatch_outbox
+from inbound_worker import process_inbound_messages
+from metrics import log_metrics
+from llm_cache import evict_llm_cache
+from lead_state import backfill_next_actions
+from notifications import notifications_supported, start_notification_listener
 
 
 def bootstrap_database():
     try:
         engine = get_engine()
-        Base.metadata.create_all(engine)
+        sync_schema(engine)
         print("✅ Database schema ready")
+
+        session = get_session_local()()
+        try:
+            updated = backfill_next_actions(session)
+        finally:
+            session.close()
+        if updated:
+            print(f"✅ Scheduled next actions for {updated} existing leads")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
         sys.exit(1)
 
 
 def bootstrap_ingestion():
+    # the legacy leads file goes through the same checkpointing,
+    # so restarts no longer re-read it
     try:
-        ingest_leads("data/leads.json")
+        ingest_file("data/leads.json")
         print("✅ Lead ingestion completed")
     except FileNotFoundError:
         print("⚠️ Leads file not found, skipping ingestion")
     except Exception as e:
         print(f"❌ Lead ingestion failed: {e}")
 
+    os.makedirs(LEADS_DROP_DIR, exist_ok=True)
+
 
 def bootstrap_initial_drafts():
     try:
@@ -40,28 +59,60 @@ def bootstrap_initial_drafts():
 def bootstrap_scheduler():
     scheduler = start_scheduler()
 
+    # 📣 With Postgres NOTIFY wakeups the intervals below are only a
+    # safety net for missed notifications
+    push = notifications_supported()
+
     # ✍️ Generate initial email drafts periodically
     scheduler.add_job(
         generate_initial_drafts,
         trigger="interval",
-        minutes=10,
+        minutes=30 if push else 10,
         max_instances=1,
         coalesce=True,
         id="initial_draft_generator",
         replace_existing=True,
     )
 
-    # 🔁 Listen for incoming replies (draft replies only)
+    # 📥 Import new files from the lead drop folder
+    scheduler.add_job(
+        scan_drop_folder,
+        trigger="interval",
+        minutes=1,
+        max_instances=1,
+        coalesce=True,
+        id="ingest_watcher",
+        replace_existing=True,
+    )
+
+    # 📡 Push mode: one long-lived IMAP IDLE session
+    idle_thread = None
+    if REPLY_LISTENER_MODE == "idle":
+        idle_thread = start_idle_listener()
+
+    # 🔁 Listen for incoming replies (draft replies only);
+    # with IDLE running this is only a slow safety net
     scheduler.add_job(
         listen_replies,
         trigger="interval",
-        minutes=2,
+        minutes=15 if idle_thread else 2,
         max_instances=1,
         coalesce=True,
         id="reply_listener",
         replace_existing=True,
     )
 
+    # 🧠 Classify queued replies and draft responses
+    scheduler.add_job(
+        process_inbound_messages,
+        trigger="interval",
+        seconds=120 if push else 15,
+        max_instances=1,
+        coalesce=True,
+        id="inbound_worker",
+        replace_existing=True,
+    )
+
     # ⏰ Generate post-reply follow-up drafts
     scheduler.add_job(
         check_post_reply_followups,
@@ -73,6 +124,41 @@ def bootstrap_scheduler():
         replace_existing=True,
     )
 
+    # 📤 Deliver queued emails (dashboard sends + follow-ups)
+    scheduler.add_job(
+        dispatch_outbox,
+        trigger="interval",
+        seconds=60 if push else 10,
+        max_instances=1,
+        coalesce=True,
+        id="outbox_dispatcher",
+        replace_existing=True,
+    )
+
+    # 🧹 Expire and trim the LLM response cache
+    scheduler.add_job(
+        evict_llm_cache,
+        trigger="interval",
+        hours=1,
+        max_instances=1,
+        coalesce=True,
+        id="llm_cache_eviction",
+        replace_existing=True,
+    )
+
+    # 📈 Periodic metrics snapshot in the worker log
+    scheduler.add_job(
+        log_metrics,
+        trigger="interval",
+        minutes=5,
+        id="metrics_logger",
+        replace_existing=True,
+    )
+
+    # 📡 Run jobs as soon as their work is committed
+    if push:
+        start_notification_listener(scheduler)
+
     print("✅ Scheduler started")
     return scheduler
 
@@ -0,0 +1,104 @@
+# metrics.py
+"""
+In-process counters, gauges and timings.
+Worker jobs record here; main.py prints a snapshot periodically.
+"""
+import bisect
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}   # name -> [count, total, max]
+_histograms = {}   # name -> bucket counts, last one is the overflow
+
+# upper bounds (seconds) of the latency buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 1.5, 2, 3, 4, 5, 6, 8, 10, 13, 16, 20, 25, 30, 45, 60)
+
+
+def incr(name: str, value: float = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+def add_gauge(name: str, delta: float):
+    with _lock:
+        _gauges[name] = _gauges.get(name, 0) + delta
+
+
+def observe(name: str, value: float):
+    with _lock:
+        timing = _timings.setdefault(name, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += value
+        timing[2] = max(timing[2], value)
+
+
+def histogram(name: str, value: float):
+    """Adds a sample to a latency histogram (LATENCY_BUCKETS)"""
+    with _lock:
+        counts = _histograms.setdefault(name, [0] * (len(LATENCY_BUCKETS) + 1))
+        counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+
+
+def _quantile(counts, q):
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+            if i == len(LATENCY_BUCKETS):
+                return lower
+            # linear interpolation inside the bucket
+            return lower + (LATENCY_BUCKETS[i] - lower) * (rank - seen) / count
+        seen += count
+    return LATENCY_BUCKETS[-1]
+
+
+def quantile(name: str, q: float):
+    """(estimate, sample count) of the q-quantile of a histogram; estimate is None when empty"""
+    with _lock:
+        counts = list(_histograms.get(name) or ())
+    return _quantile(counts, q), sum(counts)
+
+
+def get(name: str, default: float = 0):
+    with _lock:
+        if name in _counters:
+            return _counters[name]
+        return _gauges.get(name, default)
+
+
+def snapshot() -> dict:
+    with _lock:
+        data = dict(_counters)
+        data.update(_gauges)
+        for name, (count, total, peak) in _timings.items():
+            data[f"{name}_count"] = count
+            data[f"{name}_avg"] = total / count if count else 0.0
+            data[f"{name}_max"] = peak
+        for name, counts in _histograms.items():
+            data[f"{name}_count"] = sum(counts)
+            for q in (50, 95, 99):
+                data[f"{name}_p{q}"] = _quantile(counts, q / 100)
+    return data
+
+
+def log_metrics():
+    data = snapshot()
+    if not data:
+        return
+
+    print("📈 Metrics: " + ", ".join(
+        f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+        for name, value in sorted(data.items())
+    ))
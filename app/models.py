@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, Index
 from datetime import datetime, timezone
 from database import Base
 
@@ -21,6 +21,8 @@ try:
         draft_body = Column(Text)
         draft_type = Column(String(50))   # initial | followup | reply
         draft_ready = Column(Boolean, default=False)
+        regenerate_draft = Column(Boolean)   # discarded: next draft bypasses the LLM cache
+        draft_variant = Column(Integer)      # DraftVariant.position shown as the draft
     
         sent_by_human = Column(Boolean, default=False)
 
@@ -33,6 +35,20 @@ try:
         intent = Column(String(50))
         sentiment = Column(String(50))
 
+        # 🔒 work lease (see leases.py)
+        claimed_by = Column(String(100))
+        lease_until = Column(DateTime(timezone=True))
+        draft_attempts = Column(Integer)     # failed draft attempts in a row
+        draft_error = Column(Text)           # set: drafting gave up, nothing is scheduled
+
+        # ⏰ precomputed by lead_state.schedule_next_action
+        next_action = Column(String(50))
+        next_action_at = Column(DateTime(timezone=True))
+
+        __table_args__ = (
+            Index("ix_leads_next_action", "next_action", "next_action_at"),
+        )
+
 
     class EmailLog(Base):
         __tablename__ = "email_logs"
@@ -47,6 +63,126 @@ try:
             default=lambda: datetime.now(timezone.utc),
             nullable=False,
         )
+        message_id = Column(String(255), index=True)   # RFC 5322 Message-ID
+
+
+    class OutboxEmail(Base):
+        __tablename__ = "outbox"
+
+        id = Column(Integer, primary_key=True)
+        lead_id = Column(Integer, nullable=False, index=True)
+        to_email = Column(String(150), nullable=False)
+        subject = Column(Text, nullable=False)
+        body = Column(Text, nullable=False)
+        type = Column(String(50), nullable=False)
+        message_id = Column(String(255))   # fixed at enqueue so retries reuse it
+
+        status = Column(String(20), default="PENDING", nullable=False, index=True)  # PENDING | SENDING | SENT | FAILED
+        attempts = Column(Integer, default=0, nullable=False)
+        last_error = Column(Text)
+        next_attempt_at = Column(DateTime(timezone=True))
+        claimed_at = Column(DateTime(timezone=True))
+        sent_at = Column(DateTime(timezone=True))
+        created_at = Column(
+            DateTime(timezone=True),
+            default=lambda: datetime.now(timezone.utc),
+            nullable=False,
+        )
+
+
+    class MailboxSyncState(Base):
+        __tablename__ = "mailbox_sync_state"
+
+        folder = Column(String(255), primary_key=True)
+        uidvalidity = Column(BigInteger, nullable=False)
+        last_uid = Column(BigInteger, default=0, nullable=False)
+        failed_uid = Column(BigInteger)     # first UID that failed; the sync stops there
+        failed_attempts = Column(Integer)
+        updated_at = Column(
+            DateTime(timezone=True),
+            default=lambda: datetime.now(timezone.utc),
+            onupdate=lambda: datetime.now(timezone.utc),
+        )
+
+
+    class InboundMessage(Base):
+        __tablename__ = "inbound_messages"
+
+        id = Column(Integer, primary_key=True)
+        lead_id = Column(Integer, nullable=False, index=True)
+        message_id = Column(String(255), unique=True, nullable=False)
+        from_email = Column(String(150))
+        subject = Column(Text)
+        body = Column(Text, nullable=False)
+
+        status = Column(String(20), default="PENDING", nullable=False, index=True)  # PENDING | PROCESSING | DONE | FAILED
+        attempts = Column(Integer, default=0, nullable=False)
+        last_error = Column(Text)
+        next_attempt_at = Column(DateTime(timezone=True))   # retry backoff
+        received_at = Column(
+            DateTime(timezone=True),
+            default=lambda: datetime.now(timezone.utc),
+            nullable=False,
+        )
+        claimed_at = Column(DateTime(timezone=True))
+        processed_at = Column(DateTime(timezone=True))
+
+
+    class IngestionFile(Base):
+        __tablename__ = "ingestion_files"
+
+        id = Column(Integer, primary_key=True)
+        path = Column(String(500), nullable=False, index=True)
+        checksum = Column(String(64), unique=True, nullable=False)   # sha256 of the content
+        size = Column(BigInteger, nullable=False)
+        mtime = Column(DateTime(timezone=True))
+
+        status = Column(String(20), default="PENDING", nullable=False)  # PENDING | PROCESSING | DONE | FAILED
+        byte_offset = Column(BigInteger, default=0, nullable=False)    # resume point (JSONL / CSV)
+        records_done = Column(BigInteger, default=0, nullable=False)   # resume point (JSON)
+        inserted = Column(Integer, default=0, nullable=False)
+        duplicate = Column(Integer, default=0, nullable=False)
+        invalid = Column(Integer, default=0, nullable=False)
+        attempts = Column(Integer, default=0, nullable=False)
+        last_error = Column(Text)
+
+        claimed_by = Column(String(100))
+        claimed_at = Column(DateTime(timezone=True))
+        finished_at = Column(DateTime(timezone=True))
+        created_at = Column(
+            DateTime(timezone=True),
+            default=lambda: datetime.now(timezone.utc),
+            nullable=False,
+        )
+
+
+    class LLMCacheEntry(Base):
+        __tablename__ = "llm_cache"
+
+        key = Column(String(64), primary_key=True)   # sha256, see llm_cache.cache_key
+        template = Column(String(100), index=True)
+        model = Column(String(200))
+        content = Column(Text, nullable=False)
+        hits = Column(Integer, default=0, nullable=False)
+        created_at = Column(DateTime(timezone=True), nullable=False)
+        last_hit_at = Column(DateTime(timezone=True))
+        expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+    class DraftVariant(Base):
+        __tablename__ = "draft_variants"
+
+        id = Column(Integer, primary_key=True)
+        lead_id = Column(Integer, nullable=False, index=True)
+        position = Column(Integer, nullable=False)   # 0 is the LLM's first variant
+        subject = Column(Text, nullable=False)
+        body = Column(Text, nullable=False)
+        created_at = Column(
+            DateTime(timezone=True),
+            default=lambda: datetime.now(timezone.utc),
+            nullable=False,
+        )
+
 
 except Exception as e:
     raise RuntimeError(f"Model definition error: {e}")
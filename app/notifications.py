@@ -0,0 +1,112 @@
+# notifications.py
+"""
+Postgres LISTEN/NOTIFY wakeups. Producers call notify() inside their
+transaction (delivered on commit); a listener thread in the worker runs
+the matching scheduler job right away. Interval polling stays as a slow
+safety net, and everything is a no-op on non-Postgres databases.
+"""
+import select
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+import metrics
+from database import get_engine
+
+LEADS_NEW = "leads_new"
+OUTBOX_PENDING = "outbox_pending"
+INBOUND_PENDING = "inbound_pending"
+
+# channel -> scheduler job id (see main.bootstrap_scheduler)
+CHANNEL_JOBS = {
+    LEADS_NEW: "initial_draft_generator",
+    OUTBOX_PENDING: "outbox_dispatcher",
+    INBOUND_PENDING: "inbound_worker",
+}
+
+LISTEN_POLL_SECONDS = 30
+RECONNECT_BACKOFF_MAX = 60
+
+
+def notifications_supported(engine=None) -> bool:
+    engine = engine or get_engine()
+    return engine.dialect.name == "postgresql"
+
+
+def notify(session, channel, payload=""):
+    """Queues a NOTIFY in the session's transaction"""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload},
+    )
+
+
+def _trigger(scheduler, job_id):
+    try:
+        scheduler.modify_job(job_id, next_run_time=datetime.now(timezone.utc))
+        metrics.incr(f"notify_wakeups_{job_id}")
+    except Exception as e:
+        print(f"⚠️ Could not wake job {job_id}: {e}")
+
+
+def _listen(scheduler, channel_jobs):
+    engine = get_engine()
+    backoff = 1
+
+    while True:
+        conn = None
+        try:
+            conn = engine.raw_connection()
+            conn.detach()   # dedicated connection, never returned to the pool
+            dbapi = conn.driver_connection
+            dbapi.autocommit = True
+
+            with dbapi.cursor() as cursor:
+                for channel in channel_jobs:
+                    cursor.execute(f"LISTEN {channel}")
+
+            print("📡 Listening for database notifications")
+            backoff = 1
+
+            while True:
+                if select.select([dbapi], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    continue
+
+                dbapi.poll()
+                channels = set()
+                while dbapi.notifies:
+                    channels.add(dbapi.notifies.pop(0).channel)
+
+                for channel in channels:
+                    if channel in channel_jobs:
+                        _trigger(scheduler, channel_jobs[channel])
+
+        except Exception as e:
+            print(f"❌ Notification listener error: {e} (reconnecting in {backoff}s)")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def start_notification_listener(scheduler, channel_jobs=None):
+    if not notifications_supported():
+        return None
+
+    thread = threading.Thread(
+        target=_listen,
+        args=(scheduler, channel_jobs or CHANNEL_JOBS),
+        name="pg-notify-listener",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,206 @@
+# outbox.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, and_
+
+from config import get_int_env
+from database import get_session_local
+from models import OutboxEmail, EmailLog, Lead
+from lead_state import schedule_next_action
+from draft_variants import save_drafts
+import metrics
+from notifications import notify, OUTBOX_PENDING
+from email_sender import send_email, new_message_id, EmailSendError, SMTP_POOL_SIZE
+
+OUTBOX_BATCH_SIZE = get_int_env("OUTBOX_BATCH_SIZE", 20)
+OUTBOX_SEND_WORKERS = get_int_env("OUTBOX_SEND_WORKERS", SMTP_POOL_SIZE)
+
+MAX_SEND_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=2)        # multiplied by attempt number
+SENDING_TIMEOUT = timedelta(minutes=10)   # reclaim rows of a dispatcher that died mid-send
+
+
+def enqueue_email(session, lead, subject, body, email_type):
+    """
+    Queues an outbound email inside the caller's transaction.
+    Nothing is sent until the dispatcher picks the row up after commit.
+    """
+    row = OutboxEmail(
+        lead_id=lead.id,
+        to_email=lead.email,
+        subject=subject,
+        body=body,
+        type=email_type,
+        message_id=new_message_id(),
+        status="PENDING",
+        attempts=0,
+    )
+    session.add(row)
+    notify(session, OUTBOX_PENDING)   # 📣 wakes the dispatcher on commit
+    return row
+
+
+def _claim_batch(session, now):
+    rows = (
+        session.query(OutboxEmail)
+        .filter(
+            or_(
+                and_(
+                    OutboxEmail.status == "PENDING",
+                    or_(
+                        OutboxEmail.next_attempt_at.is_(None),
+                        OutboxEmail.next_attempt_at <= now,
+                    ),
+                ),
+                and_(
+                    OutboxEmail.status == "SENDING",
+                    OutboxEmail.claimed_at < now - SENDING_TIMEOUT,
+                ),
+            )
+        )
+        .order_by(OutboxEmail.id)
+        .limit(OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    batch = []
+    for row in rows:
+        row.status = "SENDING"
+        row.claimed_at = now
+        row.attempts += 1
+        batch.append(
+            {
+                "id": row.id,
+                "lead_id": row.lead_id,
+                "to": row.to_email,
+                "subject": row.subject,
+                "body": row.body,
+                "type": row.type,
+                "message_id": row.message_id,
+            }
+        )
+
+    # 🔓 row locks are released here, before any SMTP work
+    session.commit()
+    return batch
+
+
+def _send(item):
+    try:
+        send_email(
+            item["to"],
+            item["subject"],
+            item["body"],
+            message_id=item["message_id"],
+            raise_on_failure=True,
+        )
+        return item, None
+    except EmailSendError as e:
+        return item, str(e)
+
+
+def _mark_send_failed(session, row):
+    """
+    The email was never delivered: undo what queuing it did to the lead
+    (no follow-ups or post-reply wait for it) and put it back on the
+    dashboard as a draft under SEND_FAILED, ready to edit and resend.
+    """
+    metrics.incr("outbox_failed")
+    print(f"🚫 Giving up on {row.to_email} after {row.attempts} attempts: {row.last_error}")
+
+    lead = (
+        session.query(Lead)
+        .filter_by(id=row.lead_id)
+        .with_for_update()
+        .first()
+    )
+    if lead is None:
+        return
+
+    if row.type == "followup":
+        lead.followup_count = max(0, (lead.followup_count or 0) - 1)
+    elif row.type == "reply":
+        lead.awaiting_reply = False
+
+    save_drafts(session, lead, row.type, (row.subject, row.body))
+    lead.status = "SEND_FAILED"
+    schedule_next_action(lead)
+
+
+def _record_results(session, results):
+    now = datetime.now(timezone.utc)
+
+    for item, error in results:
+        row = session.get(OutboxEmail, item["id"])
+        if row is None:
+            continue
+
+        if error is None:
+            row.status = "SENT"
+            row.sent_at = now
+            row.last_error = None
+            session.add(
+                EmailLog(
+                    lead_id=item["lead_id"],
+                    subject=item["subject"],
+                    body=item["body"],
+                    type=item["type"],
+                    message_id=item["message_id"],
+                    timestamp=now,
+                )
+            )
+        elif row.attempts >= MAX_SEND_ATTEMPTS:
+            row.status = "FAILED"
+            row.last_error = error
+            _mark_send_failed(session, row)
+        else:
+            row.status = "PENDING"
+            row.last_error = error
+            row.next_attempt_at = now + RETRY_DELAY * row.attempts
+
+    session.commit()
+
+
+def send_errors_by_lead(session, lead_ids):
+    """{lead_id: last_error} of each lead's most recent FAILED email"""
+    if not lead_ids:
+        return {}
+
+    rows = (
+        session.query(OutboxEmail.lead_id, OutboxEmail.last_error)
+        .filter(OutboxEmail.lead_id.in_(lead_ids), OutboxEmail.status == "FAILED")
+        .order_by(OutboxEmail.id)
+        .all()
+    )
+    return dict(rows)   # later rows win
+
+
+def dispatch_outbox():
+    """
+    Drains the outbox in batches. Safe to run from several worker
+    processes at once: each batch is claimed with SKIP LOCKED.
+    """
+    SessionLocal = get_session_local()
+    session = SessionLocal()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, OUTBOX_SEND_WORKERS)) as pool:
+            while True:
+                batch = _claim_batch(session, datetime.now(timezone.utc))
+                if not batch:
+                    break
+
+                results = list(pool.map(_send, batch))
+                _record_results(session, results)
+
+                sent = sum(1 for _, error in results if error is None)
+                print(f"📤 Outbox batch: {sent}/{len(results)} sent")
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Outbox dispatcher error: {e}")
+
+    finally:
+        session.close()
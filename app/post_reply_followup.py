@@ -1,60 +1,64 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from database import get_session_local
 from models import Lead
 from email_generator import generate_email
-from email_sender import send_email
-
-WAIT_TIME = timedelta(hours=24)
-# WAIT_TIME = timedelta(minutes=2)
+from outbox import enqueue_email
+from draft_engine import run_drafts
+from llm_guard import llm_available
+from leases import claim_leads, owned_lead, release, record_draft_failure, clear_draft_failure
+from lead_state import due, schedule_next_action, POST_REPLY_FOLLOWUP
 
 def check_post_reply_followups():
+    # ⏸️ paused while the LLM circuit breaker is open
+    if not llm_available():
+        return
+
     SessionLocal = get_session_local()
     session = SessionLocal()
-    now = datetime.now(timezone.utc)
-
-    try:
-        leads = (
-            session.query(Lead)
-            .filter(
-                Lead.awaiting_reply == True,
-                Lead.last_ai_reply_sent.isnot(None),
-                Lead.status == "QUALIFIED"
-            )
-            .with_for_update(skip_locked=True)
-            .all()
-        )
 
-        for lead in leads:
-            sent_time = lead.last_ai_reply_sent
-            if sent_time.tzinfo is None:
-                sent_time = sent_time.replace(tzinfo=timezone.utc)
+    def queue_followup(job, result, error):
+        if error:
+            print(f"❌ Post-reply follow-up failed for {job.email}: {error}")
+            record_draft_failure(session, job, error)
+            return
 
-            if now - sent_time < WAIT_TIME:
-                continue
+        lead = owned_lead(session, job.id)
+        if not lead:
+            print(f"⚠️ Lease lost for {job.email}, dropping follow-up")
+            session.rollback()
+            return
 
-            subject, body = generate_email(lead, followup=True)
+        subject, body = result
+        enqueue_email(session, lead, subject, body, "followup")
 
-            sent = send_email(
-                lead.email,
-                subject,
-                body,
-                raise_on_failure=False
-            )
+        lead.awaiting_reply = False
+        lead.last_email_sent = datetime.now(timezone.utc)
+        lead.followup_count += 1
+        lead.regenerate_draft = False
+        clear_draft_failure(lead)
 
-            # if sent:
-            #     lead.awaiting_reply = False
-            #     lead.last_email_sent = now
-            #     lead.followup_count += 1
-            if sent:
-                lead.awaiting_reply = False
-                lead.last_email_sent = now
-                lead.followup_count += 1
+        # ✅ MARK FOLLOW-UP STATE
+        lead.status = "FOLLOWED_UP"
+        schedule_next_action(lead)
+        release(lead)
 
-                # ✅ MARK FOLLOW-UP STATE
-                lead.status = "FOLLOWED_UP"
+        session.commit()
 
+    try:
+        while llm_available():
+            jobs = claim_leads(
+                session,
+                *due(POST_REPLY_FOLLOWUP),
+                order_by=Lead.next_action_at,
+            )
+            if not jobs:
+                break
 
-        session.commit()
+            run_drafts(
+                jobs,
+                lambda job: generate_email(job, followup=True),
+                queue_followup,
+            )
 
     except Exception as e:
         session.rollback()
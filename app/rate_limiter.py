@@ -0,0 +1,158 @@
+# rate_limiter.py
+import smtplib
+import threading
+import time
+
+import metrics
+from config import get_int_env
+
+SMTP_SEND_RATE_PER_MIN = get_int_env("SMTP_SEND_RATE_PER_MIN", 20)
+SMTP_SEND_BURST = get_int_env("SMTP_SEND_BURST", 5)
+SMTP_DOMAIN_RATE_PER_MIN = get_int_env("SMTP_DOMAIN_RATE_PER_MIN", 10)
+SMTP_DOMAIN_BURST = get_int_env("SMTP_DOMAIN_BURST", 3)
+
+MIN_RATE_FACTOR = 0.05     # never slow below 5% of the configured rate
+SLOWDOWN_FACTOR = 0.5      # multiplicative decrease on a throttle response
+RECOVERY_STEP = 0.02       # additive increase per successful send
+
+THROTTLE_CODES = {421, 450, 451, 452, 454}
+
+
+def is_throttle_response(exc: Exception) -> bool:
+    if isinstance(exc, smtplib.SMTPDataError):
+        return True
+    return (
+        isinstance(exc, smtplib.SMTPResponseException)
+        and exc.smtp_code in THROTTLE_CODES
+    )
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations: take() always succeeds and returns
+    how long the caller must wait before its token is valid.
+    The effective rate shrinks on throttling and recovers on success.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float, clock=time.monotonic):
+        self.base_rate = rate_per_sec
+        self.capacity = capacity
+        self.factor = 1.0
+        self.clock = clock
+
+        self.tokens = capacity
+        self.updated = clock()
+
+    @property
+    def rate(self) -> float:
+        return self.base_rate * self.factor
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def slow_down(self):
+        self._refill(self.clock())
+        self.factor = max(MIN_RATE_FACTOR, self.factor * SLOWDOWN_FACTOR)
+        # drop any saved-up burst so the next send really waits
+        self.tokens = min(self.tokens, 0.0)
+
+    def recover(self):
+        self._refill(self.clock())
+        self.factor = min(1.0, self.factor + RECOVERY_STEP)
+
+
+class SendRateLimiter:
+    """Paces sends per sender account and per recipient domain"""
+
+    def __init__(
+        self,
+        *,
+        account_rate_per_min: float = SMTP_SEND_RATE_PER_MIN,
+        account_burst: float = SMTP_SEND_BURST,
+        domain_rate_per_min: float = SMTP_DOMAIN_RATE_PER_MIN,
+        domain_burst: float = SMTP_DOMAIN_BURST,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.account_rate = account_rate_per_min / 60.0
+        self.account_burst = account_burst
+        self.domain_rate = domain_rate_per_min / 60.0
+        self.domain_burst = domain_burst
+        self.clock = clock
+        self.sleep = sleep
+
+        self._accounts = {}
+        self._domains = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _domain(recipient: str) -> str:
+        return recipient.rsplit("@", 1)[-1].strip().lower()
+
+    def _buckets(self, account: str, recipient: str):
+        domain = self._domain(recipient)
+
+        if account not in self._accounts:
+            self._accounts[account] = TokenBucket(
+                self.account_rate, self.account_burst, self.clock
+            )
+        if domain not in self._domains:
+            self._domains[domain] = TokenBucket(
+                self.domain_rate, self.domain_burst, self.clock
+            )
+
+        return self._accounts[account], self._domains[domain]
+
+    def acquire(self, account: str, recipient: str) -> float:
+        """Blocks until both buckets allow a send. Returns seconds waited."""
+        with self._lock:
+            buckets = self._buckets(account, recipient)
+            wait = max(bucket.take() for bucket in buckets)
+
+        if wait <= 0:
+            return 0.0
+
+        metrics.add_gauge("smtp_send_waiting", 1)
+        try:
+            self.sleep(wait)
+        finally:
+            metrics.add_gauge("smtp_send_waiting", -1)
+            metrics.incr("smtp_send_wait_seconds", wait)
+
+        return wait
+
+    def on_success(self, account: str, recipient: str):
+        with self._lock:
+            for bucket in self._buckets(account, recipient):
+                bucket.recover()
+
+    def on_throttled(self, account: str, recipient: str):
+        metrics.incr("smtp_throttled")
+        with self._lock:
+            for bucket in self._buckets(account, recipient):
+                bucket.slow_down()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> SendRateLimiter:
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = SendRateLimiter()
+
+    return _limiter
@@ -1,17 +1,34 @@
 # reply_listener.py
 import imaplib
+import re
+import threading
+import time
 import email
 from email.utils import parseaddr
-from datetime import datetime, timezone
 
 from database import get_session_local
-from models import Lead, EmailLog
-from intent_analyzer import analyze_reply
-from email_generator import generate_reply_email
-from config import get_imap_config
+import metrics
+from models import Lead, EmailLog, InboundMessage, MailboxSyncState
+from lead_state import schedule_next_action
+from notifications import notify, INBOUND_PENDING
+from config import get_imap_config, get_env
+from imap_fetch import parse_fetch, find_text_part, find_part, decode_part
+from automated_mail import detect_automated, failed_recipients, HEADER_FIELDS as AUTOMATED_HEADER_FIELDS
 
 IMAP_SERVER = "imap.gmail.com"
 IMAP_FOLDER = "INBOX"
+REPLY_LISTENER_MODE = (get_env("REPLY_LISTENER_MODE") or "idle").lower()  # idle | poll
+
+IDLE_TIMEOUT = 25 * 60        # re-IDLE before the server's 29 minute limit
+IDLE_BACKOFF_MIN = 5          # seconds
+IDLE_BACKOFF_MAX = 300
+
+FETCH_BATCH_SIZE = 50
+MAX_MESSAGE_ATTEMPTS = 5       # a message failing this often is skipped so the rest flow
+MAX_BODY_BYTES = 64 * 1024     # only the start of the text part is needed
+HEADER_FIELDS = "FROM SUBJECT MESSAGE-ID IN-REPLY-TO REFERENCES " + AUTOMATED_HEADER_FIELDS
+
+_sync_lock = threading.Lock()
 
 
 def extract_body(msg):
@@ -31,6 +48,10 @@ def extract_body(msg):
     except Exception:
         return ""
 
+    return strip_quoted(body)
+
+
+def strip_quoted(body):
     for sep in ["\nOn ", "\n>"]:
         if sep in body:
             body = body.split(sep)[0]
@@ -38,6 +59,392 @@ def extract_body(msg):
     return body.strip()
 
 
+def _get_uidvalidity(mail):
+    _, data = mail.response("UIDVALIDITY")
+    if data and data[0]:
+        return int(data[0])
+
+    status, data = mail.status(IMAP_FOLDER, "(UIDVALIDITY)")
+    match = re.search(rb"UIDVALIDITY (\d+)", data[0] or b"") if status == "OK" else None
+    if not match:
+        raise RuntimeError("Server did not report UIDVALIDITY")
+    return int(match.group(1))
+
+
+def _get_uidnext(mail):
+    status, data = mail.status(IMAP_FOLDER, "(UIDNEXT)")
+    match = re.search(rb"UIDNEXT (\d+)", data[0] or b"") if status == "OK" else None
+    if not match:
+        raise RuntimeError("Server did not report UIDNEXT")
+    return int(match.group(1))
+
+
+def _new_uids(mail, session):
+    """
+    Returns (state, uids) for messages above the persisted high-water mark.
+    On first sync, or when UIDVALIDITY changed, falls back to a one-off
+    UNSEEN search; Message-ID checks keep that from duplicating work.
+    The mark then starts just below the first unseen UID (or at the
+    current end of the folder), never at 0, so a retry after a failed
+    message doesn't walk the whole mailbox.
+    """
+    uidvalidity = _get_uidvalidity(mail)
+    state = session.get(MailboxSyncState, IMAP_FOLDER)
+
+    if state is None or state.uidvalidity != uidvalidity:
+        if state is None:
+            state = MailboxSyncState(folder=IMAP_FOLDER)
+            session.add(state)
+        state.uidvalidity = uidvalidity
+        state.last_uid = 0
+        state.failed_uid = None
+        state.failed_attempts = None
+        criteria = "(UNSEEN)"
+    else:
+        criteria = f"UID {state.last_uid + 1}:*"
+
+    status, data = mail.uid("SEARCH", None, criteria)
+    uids = []
+    if status == "OK" and data and data[0]:
+        uids = sorted(int(uid) for uid in data[0].split())
+
+    if criteria == "(UNSEEN)":
+        state.last_uid = uids[0] - 1 if uids else _get_uidnext(mail) - 1
+
+    # "n:*" always matches the newest message, even when its UID is below n
+    return state, [uid for uid in uids if uid > state.last_uid]
+
+
+def _processed_ids(session, message_ids):
+    if not message_ids:
+        return set()
+    rows = (
+        session.query(EmailLog.message_id)
+        .filter(EmailLog.message_id.in_(message_ids))
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _fetch_batch(mail, uids, uidvalidity):
+    """
+    Two round trips per batch instead of one full download per message:
+    headers + BODYSTRUCTURE for every UID, then only the text section
+    (capped at MAX_BODY_BYTES) grouped by section path.
+    Bounces get their delivery-status part fetched instead of the text.
+    Returns {uid: (headers, message_id, part, automated_kind)}.
+    """
+    uid_set = ",".join(str(uid) for uid in uids)
+    status, data = mail.uid(
+        "FETCH",
+        uid_set,
+        f"(UID BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])",
+    )
+    if status != "OK":
+        raise RuntimeError(f"Header fetch failed: {status}")
+
+    messages = {}
+    for uid, items in parse_fetch(data).items():
+        raw_headers = next(
+            (value for key, value in items.items() if key.startswith("BODY[HEADER")),
+            b"",
+        )
+        headers = email.message_from_bytes(raw_headers or b"")
+
+        message_id = (headers.get("Message-ID") or "").strip()
+        if not message_id:
+            message_id = f"<{uidvalidity}.{uid}@{IMAP_FOLDER.lower()}>"
+
+        structure = items.get("BODYSTRUCTURE")
+        kind = detect_automated(headers)
+        if kind == "bounce":
+            part = find_part(structure, "message/delivery-status")
+        else:
+            part = find_text_part(structure)
+
+        messages[uid] = (headers, message_id, part, kind)
+
+    return messages
+
+
+def _thread_refs(headers):
+    """Referenced Message-IDs, most specific first"""
+    refs = re.findall(r"<[^<>\s]+>", headers.get("In-Reply-To") or "")
+    refs += reversed(re.findall(r"<[^<>\s]+>", headers.get("References") or ""))
+    return refs
+
+
+def _match_leads(session, messages):
+    """
+    Resolves {uid: lead_id} for a fetched batch with one indexed lookup on
+    EmailLog.message_id for In-Reply-To/References, then one on Lead.email
+    for messages that did not thread onto anything we sent.
+    """
+    refs = {uid: _thread_refs(message[0]) for uid, message in messages.items()}
+    all_refs = {ref for uid_refs in refs.values() for ref in uid_refs}
+
+    threads = {}
+    if all_refs:
+        threads = dict(
+            session.query(EmailLog.message_id, EmailLog.lead_id)
+            .filter(EmailLog.message_id.in_(all_refs))
+            .all()
+        )
+
+    matched = {}
+    unmatched = {}
+    for uid, uid_refs in refs.items():
+        lead_id = next((threads[ref] for ref in uid_refs if ref in threads), None)
+        if lead_id is not None:
+            matched[uid] = lead_id
+        else:
+            sender = parseaddr(messages[uid][0].get("From"))[1].strip().lower()
+            if sender:
+                unmatched[uid] = sender
+
+    if unmatched:
+        by_email = dict(
+            session.query(Lead.email, Lead.id)
+            .filter(Lead.email.in_(set(unmatched.values())))
+            .all()
+        )
+        for uid, sender in unmatched.items():
+            if sender in by_email:
+                matched[uid] = by_email[sender]
+
+    return matched
+
+
+def _fetch_texts(mail, parts):
+    """
+    parts: {uid: (section, encoding, charset)} -> {uid: text}.
+    Raises like _fetch_batch when a section fetch is refused.
+    """
+    by_section = {}
+    for uid, (section, _, _) in parts.items():
+        by_section.setdefault(section, []).append(uid)
+
+    texts = {}
+    for section, uids in by_section.items():
+        status, data = mail.uid(
+            "FETCH",
+            ",".join(str(uid) for uid in uids),
+            f"(UID BODY.PEEK[{section}]<0.{MAX_BODY_BYTES}>)",
+        )
+        if status != "OK":
+            # 🚫 never ingest these as empty replies: the sync stops below them
+            raise RuntimeError(f"Text fetch failed for section {section}: {status}")
+
+        for uid, items in parse_fetch(data).items():
+            if uid not in parts:
+                continue
+            _, encoding, charset = parts[uid]
+            raw = items.get(f"BODY[{section}]")
+            texts[uid] = decode_part(raw, encoding, charset)
+
+    return texts
+
+
+def _record_bounce(session, headers, dsn_text, message_id):
+    """Marks every lead a DSN reports as failed; no LLM work"""
+    failed = failed_recipients(dsn_text, headers)
+    metrics.incr("inbound_bounces")
+
+    if not failed:
+        print(f"⚠️ Bounce without a parseable recipient: {headers.get('Subject', '')}")
+        return
+
+    leads = (
+        session.query(Lead)
+        .filter(Lead.email.in_(failed))
+        .with_for_update()
+        .all()
+    )
+
+    for lead in leads:
+        print(f"📭 Bounced: {lead.email}")
+        lead.status = "BOUNCED"
+        lead.draft_ready = False
+        lead.awaiting_reply = False
+        schedule_next_action(lead)
+
+        session.add(
+            EmailLog(
+                lead_id=lead.id,
+                subject=headers.get("Subject", ""),
+                body=f"Delivery failed for {lead.email}",
+                type="bounce",
+                message_id=message_id,
+            )
+        )
+
+
+def _record_auto_reply(session, headers, text, message_id, lead_id):
+    """Logs an auto-reply on the timeline without queuing it for the LLM"""
+    metrics.incr("inbound_auto_replies")
+
+    if lead_id is None:
+        return
+
+    session.add(
+        EmailLog(
+            lead_id=lead_id,
+            subject=headers.get("Subject", ""),
+            body=strip_quoted(text) or "(auto-reply)",
+            type="auto_reply",
+            message_id=message_id,
+        )
+    )
+
+
+def _ingest_message(session, headers, reply_text, message_id, lead_id):
+    """
+    Stage one of the inbound pipeline: record the reply and queue it for
+    the classification workers. No LLM calls happen here.
+    """
+    from_email = parseaddr(headers.get("From"))[1]
+
+    if not from_email or not reply_text:
+        return
+
+    if lead_id is None:
+        print(f"⚠️ No lead found for {from_email}")
+        return
+
+    print(f"📩 Reply from {from_email}")
+
+    subject = headers.get("Subject", "")
+
+    # 📥 Log inbound reply
+    session.add(
+        EmailLog(
+            lead_id=lead_id,
+            subject=subject,
+            body=reply_text,
+            type="reply",
+            message_id=message_id,
+        )
+    )
+
+    session.add(
+        InboundMessage(
+            lead_id=lead_id,
+            message_id=message_id,
+            from_email=from_email,
+            subject=subject,
+            body=reply_text,
+            status="PENDING",
+        )
+    )
+    notify(session, INBOUND_PENDING)
+
+
+def _record_failed_uid(session, state, uid):
+    """
+    Counts a failed attempt at `uid`. Returns True when the message has
+    failed MAX_MESSAGE_ATTEMPTS times and the mark was moved past it.
+    """
+    try:
+        if state.failed_uid == uid:
+            state.failed_attempts = (state.failed_attempts or 0) + 1
+        else:
+            state.failed_uid = uid
+            state.failed_attempts = 1
+
+        skip = state.failed_attempts >= MAX_MESSAGE_ATTEMPTS
+        if skip:
+            print(f"🚫 Skipping UID {uid} after {state.failed_attempts} failed attempts")
+            metrics.incr("inbound_ingest_skipped")
+            state.last_uid = max(state.last_uid, uid)
+            state.failed_uid = None
+            state.failed_attempts = None
+
+        session.commit()
+        return skip
+
+    except Exception:
+        session.rollback()
+        return False
+
+
+def _process_mailbox(mail, session):
+    """
+    Processes messages above the folder's UID high-water mark on an
+    already selected IMAP session. Messages are fetched with BODY.PEEK
+    so the mailbox flags are left untouched. The mark only moves past a
+    message once it is processed: the first failure ends the sync there.
+    """
+    state, uids = _new_uids(mail, session)
+    uidvalidity = state.uidvalidity
+    session.commit()
+
+    for i in range(0, len(uids), FETCH_BATCH_SIZE):
+        batch = uids[i:i + FETCH_BATCH_SIZE]
+        started = time.monotonic()
+
+        try:
+            messages = _fetch_batch(mail, batch, uidvalidity)
+            seen = _processed_ids(session, [m[1] for m in messages.values()])
+            lead_ids = _match_leads(session, messages)
+            texts = _fetch_texts(
+                mail,
+                {
+                    uid: part
+                    for uid, (_, message_id, part, _) in messages.items()
+                    if part and message_id not in seen
+                },
+            )
+        except Exception as e:
+            session.rollback()
+            print(f"❌ IMAP fetch failed for UIDs {batch[0]}-{batch[-1]}: {e}")
+            break
+
+        for uid in batch:
+            try:
+                if uid in messages:
+                    headers, message_id, _, kind = messages[uid]
+                    text = texts.get(uid, "")
+
+                    if message_id in seen:
+                        pass
+                    elif kind == "bounce":
+                        _record_bounce(session, headers, text, message_id)
+                    elif kind:
+                        _record_auto_reply(session, headers, text, message_id, lead_ids.get(uid))
+                    else:
+                        _ingest_message(
+                            session, headers, strip_quoted(text), message_id, lead_ids.get(uid)
+                        )
+
+                # ✅ result and high-water mark commit together
+                state.last_uid = max(state.last_uid, uid)
+                if state.failed_uid == uid:
+                    state.failed_uid = None
+                    state.failed_attempts = None
+                session.commit()
+
+            except Exception as e:
+                session.rollback()
+                print(f"❌ Failed processing reply (UID {uid}): {e}")
+
+                if not _record_failed_uid(session, state, uid):
+                    # ⏸️ the mark stays below this UID: the next sync fetches it again
+                    return
+
+        metrics.observe("inbound_ingest_batch_seconds", time.monotonic() - started)
+
+
+def _sync_mailbox(mail):
+    # 🔒 the IDLE thread and the fallback poller never sync at the same time
+    with _sync_lock:
+        SessionLocal = get_session_local()
+        session = SessionLocal()
+        try:
+            _process_mailbox(mail, session)
+        finally:
+            session.close()
+
+
 def listen_replies():
     print("🔍 Checking for new replies...")
 
@@ -52,8 +459,6 @@ def listen_replies():
         print("⚠️ IMAP not configured, skipping reply listener")
         return
 
-    SessionLocal = get_session_local()
-    session = SessionLocal()
     mail = None
 
     try:
@@ -61,85 +466,12 @@ def listen_replies():
         mail.login(IMAP_EMAIL, IMAP_PASSWORD)
         mail.select(IMAP_FOLDER)
 
-        status, data = mail.search(None, "(UNSEEN)")
-        if status != "OK" or not data or not data[0]:
-            return
-
-        for num in data[0].split():
-            try:
-                _, msg_data = mail.fetch(num, "(RFC822)")
-                msg = email.message_from_bytes(msg_data[0][1])
-
-                from_email = parseaddr(msg.get("From"))[1]
-                reply_text = extract_body(msg)
-
-                if not from_email or not reply_text:
-                    continue
-
-                lead = (
-                    session.query(Lead)
-                    .filter_by(email=from_email)
-                    .with_for_update()
-                    .first()
-                )
-
-                if not lead:
-                    print(f"⚠️ No lead found for {from_email}")
-                    continue
-
-                print(f"📩 Reply from {from_email}")
-
-                # 📥 Log inbound reply
-                session.add(
-                    EmailLog(
-                        lead_id=lead.id,
-                        subject=msg.get("Subject", ""),
-                        body=reply_text,
-                        type="reply",
-                    )
-                )
-
-                intent = analyze_reply(reply_text)
-                lead.intent = intent
-                lead.awaiting_reply = False
-                lead.last_email_sent = datetime.now(timezone.utc)
-
-                # 🎯 sentiment & state
-                if intent == "Not Interested":
-                    lead.sentiment = "negative"
-                    lead.status = "CLOSED"
-                elif intent in ("Interested", "Call Request"):
-                    lead.sentiment = "positive"
-                    lead.status = "QUALIFIED"
-                else:
-                    lead.sentiment = "neutral"
-                    lead.status = "QUALIFIED"
-
-                # ✍️ Generate AI REPLY DRAFT (NO AUTO-SEND)
-                if intent != "Not Interested" and not lead.draft_ready:
-                    subject, body = generate_reply_email(lead, reply_text)
-
-                    lead.draft_subject = subject
-                    lead.draft_body = body
-                    lead.draft_type = "reply"
-                    lead.draft_ready = True
-                    lead.status = "DRAFT_READY"
-
-                session.commit()
-
-                # ✅ mark email as seen
-                mail.store(num, "+FLAGS", "\\Seen")
-
-            except Exception as e:
-                session.rollback()
-                print(f"❌ Failed processing reply: {e}")
-                continue
+        _sync_mailbox(mail)
 
     except Exception as e:
         print(f"❌ IMAP listener error: {e}")
 
     finally:
-        session.close()
         if mail:
             try:
                 mail.logout()
@@ -147,3 +479,69 @@ def listen_replies():
                 pass
 
         print("✅ Reply check completed")
+
+
+# ------------------------------------------------------------------------------
+# IDLE push mode
+# ------------------------------------------------------------------------------
+def run_idle_listener(stop_event=None):
+    """
+    Holds one authenticated IMAP session and syncs whenever the server
+    pushes a change. Re-IDLEs before the server's 29 minute cutoff and
+    reconnects with exponential backoff on any failure.
+    """
+    import imaplib2
+
+    IMAP_EMAIL, IMAP_PASSWORD = get_imap_config()
+    stop_event = stop_event or threading.Event()
+    backoff = IDLE_BACKOFF_MIN
+
+    while not stop_event.is_set():
+        mail = None
+        try:
+            mail = imaplib2.IMAP4_SSL(IMAP_SERVER)
+            mail.login(IMAP_EMAIL, IMAP_PASSWORD)
+            mail.select(IMAP_FOLDER)
+            print("📡 IMAP IDLE session established")
+            backoff = IDLE_BACKOFF_MIN
+
+            # catch up on anything that arrived while disconnected
+            _sync_mailbox(mail)
+
+            while not stop_event.is_set():
+                mail.idle(timeout=IDLE_TIMEOUT)
+                _sync_mailbox(mail)
+
+        except Exception as e:
+            print(f"❌ IMAP IDLE error: {e} (reconnecting in {backoff}s)")
+            stop_event.wait(backoff)
+            backoff = min(backoff * 2, IDLE_BACKOFF_MAX)
+
+        finally:
+            if mail:
+                try:
+                    mail.logout()
+                except Exception:
+                    pass
+
+
+def start_idle_listener():
+    """Starts the IDLE listener thread. Returns None if IDLE is unavailable."""
+    try:
+        IMAP_EMAIL, IMAP_PASSWORD = get_imap_config()
+        import imaplib2  # noqa: F401
+    except Exception as e:
+        print(f"⚠️ IMAP IDLE unavailable ({e}), using interval polling")
+        return None
+
+    if not IMAP_EMAIL or not IMAP_PASSWORD:
+        print("⚠️ IMAP not configured, skipping IDLE listener")
+        return None
+
+    thread = threading.Thread(
+        target=run_idle_listener,
+        name="imap-idle-listener",
+        daemon=True,
+    )
+    thread.start()
+    return thread
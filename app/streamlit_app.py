@@ -4,8 +4,13 @@ from sqlalchemy import text
 from datetime import datetime, timezone
 
 from database import get_engine, get_session_local
-from models import Lead, EmailLog
-from email_sender import send_email
+from models import Lead, EmailLog, InboundMessage
+from outbox import enqueue_email, send_errors_by_lead
+from lead_state import schedule_next_action, status_before_draft
+from leases import clear_draft_failure
+from email_generator import generate_email, generate_reply_email, DRAFT_VARIANTS
+from draft_variants import variants_by_lead, select_variant, save_drafts, clear_variants
+from llm_client import LLMError
 
 # Initialize DB (lazy + safe for Streamlit)
 engine = get_engine()
@@ -47,6 +52,15 @@ if page == "📧 Email Preview & Send":
         .order_by(Lead.id.desc())
         .all()
     )
+    variants = variants_by_lead(session, [lead.id for lead in drafts])
+    send_errors = send_errors_by_lead(
+        session, [lead.id for lead in drafts if lead.status == "SEND_FAILED"]
+    )
+
+    def reset_draft_widgets(lead_id):
+        # widgets keep their own state; drop it so the new draft shows
+        for prefix in ("sub", "body", "variant"):
+            st.session_state.pop(f"{prefix}_{lead_id}", None)
 
     if not drafts:
         st.info("No emails pending preview.")
@@ -57,6 +71,32 @@ if page == "📧 Email Preview & Send":
                 expanded=True
             ):
 
+                # 🚫 SEND FAILED (the outbox gave up; nothing was delivered)
+                if lead.status == "SEND_FAILED":
+                    st.error(
+                        f"Sending failed: {send_errors.get(lead.id) or 'unknown error'}. "
+                        "Edit and resend, or discard."
+                    )
+
+                # 🔀 VARIANTS (stored alternates, switching needs no LLM call)
+                lead_variants = variants.get(lead.id, [])
+                current = min(lead.draft_variant or 0, max(len(lead_variants) - 1, 0))
+                if len(lead_variants) > 1:
+                    choice = st.radio(
+                        "Variant",
+                        range(len(lead_variants)),
+                        index=current,
+                        format_func=lambda i, vs=lead_variants: f"{i + 1}. {vs[i].subject}",
+                        horizontal=True,
+                        key=f"variant_{lead.id}",
+                    )
+                    if choice != current:
+                        select_variant(lead, lead_variants[choice])
+                        session.commit()
+                        current = choice
+                        st.session_state.pop(f"sub_{lead.id}", None)
+                        st.session_state.pop(f"body_{lead.id}", None)
+
                 subject = st.text_input(
                     "Subject",
                     lead.draft_subject,
@@ -70,57 +110,130 @@ if page == "📧 Email Preview & Send":
                     key=f"body_{lead.id}"
                 )
 
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
 
                 # ✅ SEND EMAIL
                 with col1:
                     if st.button("✅ Send Email", key=f"send_{lead.id}"):
 
-                        sent = send_email(
-                            to=lead.email,
-                            subject=subject,
-                            body=body
+                        # 📤 queued in the same transaction as the state change;
+                        # the worker's outbox dispatcher does the SMTP send
+                        enqueue_email(
+                            session,
+                            lead,
+                            subject,
+                            body,
+                            lead.draft_type
                         )
 
-                        if sent:
-                            lead.draft_ready = False
-                            lead.sent_by_human = True
-                            lead.last_email_sent = datetime.now(timezone.utc)
-
-                            if lead.draft_type == "initial":
-                                lead.status = "EMAIL_SENT"
-                                lead.followup_count = 0
+                        lead.draft_ready = False
+                        clear_variants(session, lead)
+                        lead.sent_by_human = True
+                        lead.last_email_sent = datetime.now(timezone.utc)
 
-                            elif lead.draft_type == "followup":
-                                lead.status = "FOLLOWUP_SENT"
-                                lead.followup_count += 1
+                        if lead.draft_type == "initial":
+                            lead.status = "EMAIL_SENT"
+                            lead.followup_count = 0
 
-                            elif lead.draft_type == "reply":
-                                lead.awaiting_reply = True
-                                lead.last_ai_reply_sent = datetime.now(timezone.utc)
+                        elif lead.draft_type == "followup":
+                            lead.status = "FOLLOWUP_SENT"
+                            lead.followup_count += 1
 
-                            session.add(
-                                EmailLog(
-                                    lead_id=lead.id,
-                                    subject=subject,
-                                    body=body,
-                                    type=lead.draft_type
-                                )
-                            )
+                        elif lead.draft_type == "reply":
+                            lead.awaiting_reply = True
+                            lead.last_ai_reply_sent = datetime.now(timezone.utc)
 
-                            session.commit()
-                            st.success("Email sent successfully ✅")
+                        schedule_next_action(lead)
+                        session.commit()
+                        st.success("Email queued for sending ✅")
 
                 # ❌ DISCARD DRAFT
                 with col2:
                     if st.button("❌ Discard Draft", key=f"discard_{lead.id}"):
+                        # 🔁 back to the state it was drafted from, so a job drafts it again
+                        lead.status = status_before_draft(lead)
+                        lead.regenerate_draft = lead.draft_type != "reply"   # don't get the cached draft back
                         lead.draft_ready = False
                         lead.draft_subject = None
                         lead.draft_body = None
                         lead.draft_type = None
+                        clear_variants(session, lead)
+                        schedule_next_action(lead)
                         session.commit()
                         st.warning("Draft discarded")
 
+                # 🔄 REGENERATE (next stored variant, else a fresh set bypassing the LLM cache)
+                with col3:
+                    if st.button("🔄 Regenerate", key=f"regen_{lead.id}"):
+                        if current + 1 < len(lead_variants):
+                            select_variant(lead, lead_variants[current + 1])
+                            session.commit()
+                            reset_draft_widgets(lead.id)
+                            st.rerun()
+
+                        draft, error = None, None
+                        with st.spinner("Generating a new draft..."):
+                            try:
+                                if lead.draft_type == "reply":
+                                    inbound = (
+                                        session.query(InboundMessage)
+                                        .filter_by(lead_id=lead.id)
+                                        .order_by(InboundMessage.id.desc())
+                                        .first()
+                                    )
+                                    if inbound:
+                                        draft = generate_reply_email(
+                                            lead,
+                                            inbound.body,
+                                            regenerate=True,
+                                            variants=DRAFT_VARIANTS,
+                                        )
+                                    else:
+                                        error = "No inbound reply found to regenerate from"
+                                else:
+                                    draft = generate_email(
+                                        lead,
+                                        followup=lead.draft_type == "followup",
+                                        regenerate=True,
+                                        variants=DRAFT_VARIANTS,
+                                    )
+                            except LLMError as e:
+                                error = f"LLM unavailable, try again shortly ({e})"
+
+                        if draft:
+                            save_drafts(session, lead, lead.draft_type, draft)
+                            lead.regenerate_draft = False
+                            session.commit()
+                            reset_draft_widgets(lead.id)
+                            st.rerun()
+                        else:
+                            st.error(error)
+
+    # 🚫 DRAFT FAILURES (the jobs gave up; nothing is scheduled until retried)
+    failed = (
+        session.query(Lead)
+        .filter(Lead.draft_error.isnot(None))
+        .order_by(Lead.id.desc())
+        .all()
+    )
+    if failed:
+        st.markdown("---")
+        st.subheader("🚫 Draft Failures")
+
+        for lead in failed:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.error(
+                    f"{lead.name} | {lead.email} | `{lead.status}` | "
+                    f"{lead.draft_attempts or 0} attempts: {lead.draft_error}"
+                )
+            with col2:
+                if st.button("🔁 Retry", key=f"retry_{lead.id}"):
+                    clear_draft_failure(lead)
+                    schedule_next_action(lead)
+                    session.commit()
+                    st.rerun()
+
     session.close()
 
 # =================================================
@@ -158,7 +271,8 @@ elif page == "📌 Leads Table":
         sentiment,
 
         last_email_sent,
-        last_ai_reply_sent
+        last_ai_reply_sent,
+        draft_error
     FROM leads
     ORDER BY id ASC
     """
@@ -314,7 +428,9 @@ elif page == "📨 Mail Chats":
                     "initial": "📤 Initial",
                     "reply": "📩 Reply",
                     "ai_reply": "🤖 AI Reply",
-                    "followup": "⏰ Follow-up"
+                    "followup": "⏰ Follow-up",
+                    "auto_reply": "🏖️ Auto-reply",
+                    "bounce": "📭 Bounce"
                 }.get(row["type"], "✉️ Email")
 
                 with st.expander(f"{icon} | {row['timestamp']}"):
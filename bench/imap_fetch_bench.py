@@ -0,0 +1,235 @@
+# bench/imap_fetch_bench.py
+"""
+Partial IMAP fetches (headers + BODYSTRUCTURE, then the text part only)
+vs one full RFC822 download per message, against an in-process IMAP
+stand-in serving realistic replies: plain text, HTML alternatives, long
+quoted threads and PDF / image attachments.
+
+    python bench/imap_fetch_bench.py --messages 500 --rtt-ms 30 --mbps 50
+
+Every FETCH costs one round trip plus its response bytes at the given
+bandwidth, so the timings include the network shape, not just parsing.
+"""
+import argparse
+import email
+import os
+import random
+import re
+import sys
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import reply_listener  # noqa: E402
+from reply_listener import extract_body, strip_quoted, FETCH_BATCH_SIZE  # noqa: E402
+
+
+# ------------------------------------------------------------------------------
+# Mailbox
+# ------------------------------------------------------------------------------
+REPLY = "Hi,\n\nThanks for reaching out. {line}\n\nBest,\nSam\n"
+LINES = [
+    "Could you share pricing for a small team?",
+    "Not the right time for us, maybe next quarter.",
+    "Happy to hop on a call next Tuesday.",
+    "What would the timeline look like for a pilot?",
+]
+
+
+def _quoted_thread(rng, depth):
+    return "".join(
+        f"\nOn Mon, 3 Jun 2024 at 10:0{i} Someone wrote:\n" + "> earlier message text\n" * rng.randint(5, 40)
+        for i in range(depth)
+    )
+
+
+def make_message(rng, i):
+    text = REPLY.format(line=rng.choice(LINES)) + _quoted_thread(rng, rng.randint(0, 4))
+    kind = rng.random()
+
+    if kind < 0.45:
+        msg = MIMEText(text, "plain", "utf-8")
+    else:
+        msg = MIMEMultipart("mixed")
+        alternative = MIMEMultipart("alternative")
+        alternative.attach(MIMEText(text, "plain", "utf-8"))
+        alternative.attach(MIMEText("<html><body>" + text.replace("\n", "<br>") * 3 + "</body></html>", "html", "utf-8"))
+        msg.attach(alternative)
+
+        if kind > 0.7:
+            size = rng.choice([80_000, 250_000, 900_000])
+            attachment = MIMEApplication(rng.randbytes(size), "pdf")
+            attachment.add_header("Content-Disposition", "attachment", filename=f"deck{i}.pdf")
+            msg.attach(attachment)
+
+    msg["From"] = f"Lead {i} <lead{i}@example.com>"
+    msg["To"] = "outreach@example.com"
+    msg["Subject"] = "Re: Quick question"
+    msg["Message-ID"] = f"<reply{i}@example.com>"
+    msg["In-Reply-To"] = f"<sent{i}@example.com>"
+    msg["References"] = f"<sent{i}@example.com>"
+    return msg
+
+
+# ------------------------------------------------------------------------------
+# IMAP stand-in
+# ------------------------------------------------------------------------------
+def _quote(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _params(part):
+    params = [(k, v) for k, v in part.get_params()[1:]] if part.get_params() else []
+    if not params:
+        return "NIL"
+    return "(" + " ".join(f"{_quote(k.upper())} {_quote(v)}" for k, v in params) + ")"
+
+
+def bodystructure(part):
+    if part.is_multipart():
+        children = "".join(bodystructure(child) for child in part.get_payload())
+        return f"({children} {_quote(part.get_content_subtype().upper())})"
+
+    payload = part.get_payload().encode()
+    encoding = (part.get("Content-Transfer-Encoding") or "7bit").upper()
+    fields = [
+        _quote(part.get_content_maintype().upper()),
+        _quote(part.get_content_subtype().upper()),
+        _params(part),
+        "NIL",
+        "NIL",
+        _quote(encoding),
+        str(len(payload)),
+    ]
+    if part.get_content_maintype() == "text":
+        fields.append(str(payload.count(b"\n")))
+    fields.append("NIL")   # md5
+
+    disposition = part.get("Content-Disposition")
+    if disposition:
+        fields.append(f"({_quote(disposition.split(';')[0].strip().upper())} NIL)")
+    else:
+        fields.append("NIL")
+    fields.append("NIL")   # language
+    return "(" + " ".join(fields) + ")"
+
+
+def _section(msg, section):
+    part = msg
+    for index in section.split("."):
+        if part.is_multipart():
+            part = part.get_payload()[int(index) - 1]
+    return part.get_payload().encode()
+
+
+class IMAPStandIn:
+    """Answers UID FETCH like imaplib would return it; counts traffic"""
+
+    def __init__(self, messages, rtt=0.0, bytes_per_sec=None):
+        self.messages = messages      # {uid: (Message, raw bytes)}
+        self.rtt = rtt
+        self.bytes_per_sec = bytes_per_sec
+        self.round_trips = 0
+        self.bytes = 0
+
+    def uid(self, command, uid_set, spec):
+        assert command == "FETCH"
+        data = []
+        for seq, uid in enumerate(int(u) for u in uid_set.split(",")):
+            msg, raw = self.messages[uid]
+            data.extend(self._fetch_one(seq + 1, uid, msg, raw, spec))
+
+        size = sum(len(p[0]) + len(p[1]) if isinstance(p, tuple) else len(p) for p in data)
+        self.round_trips += 1
+        self.bytes += size
+        delay = self.rtt + (size / self.bytes_per_sec if self.bytes_per_sec else 0)
+        if delay:
+            time.sleep(delay)
+        return "OK", data
+
+    def _fetch_one(self, seq, uid, msg, raw, spec):
+        if spec == "(RFC822)":
+            return [(f"{seq} (UID {uid} RFC822 {{{len(raw)}}}".encode(), raw), b")"]
+
+        match = re.search(r"BODY\.PEEK\[HEADER\.FIELDS \(([^)]*)\)\]", spec)
+        if match:
+            wanted = match.group(1).split()
+            headers = "".join(
+                f"{name}: {value}\r\n"
+                for name, value in msg.items()
+                if name.upper() in wanted
+            ).encode() + b"\r\n"
+            prefix = (
+                f"{seq} (UID {uid} BODYSTRUCTURE {bodystructure(msg)} "
+                f"BODY[HEADER.FIELDS ({match.group(1)})] {{{len(headers)}}}"
+            )
+            return [(prefix.encode(), headers), b")"]
+
+        match = re.search(r"BODY\.PEEK\[([\d.]+)\]<0\.(\d+)>", spec)
+        body = _section(msg, match.group(1))[: int(match.group(2))]
+        prefix = f"{seq} (UID {uid} BODY[{match.group(1)}]<0> {{{len(body)}}}"
+        return [(prefix.encode(), body), b")"]
+
+
+# ------------------------------------------------------------------------------
+# Runs
+# ------------------------------------------------------------------------------
+def run_full(mail, uids):
+    texts = {}
+    for uid in uids:
+        _, data = mail.uid("FETCH", str(uid), "(RFC822)")
+        texts[uid] = extract_body(email.message_from_bytes(data[0][1]))
+    return texts
+
+
+def run_partial(mail, uids):
+    texts = {}
+    for i in range(0, len(uids), FETCH_BATCH_SIZE):
+        batch = uids[i:i + FETCH_BATCH_SIZE]
+        messages = reply_listener._fetch_batch(mail, batch, 1)
+        parts = {uid: m[2] for uid, m in messages.items() if m[2]}
+        for uid, text in reply_listener._fetch_texts(mail, parts).items():
+            texts[uid] = strip_quoted(text)
+    return texts
+
+
+def _report(label, mail, seconds, count):
+    print(
+        f"{label:<8} {count} msgs  {seconds:6.2f}s  {count / seconds:8.1f} msgs/s  "
+        f"{mail.bytes / 1e6:8.2f} MB  {mail.bytes / count / 1024:7.1f} KB/msg  "
+        f"{mail.round_trips:5d} round trips"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rtt-ms", type=float, default=20)
+    parser.add_argument("--mbps", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    messages = {}
+    for i in range(args.messages):
+        msg = make_message(rng, i)
+        messages[100 + i] = (msg, msg.as_bytes())
+    uids = sorted(messages)
+
+    shape = dict(rtt=args.rtt_ms / 1000, bytes_per_sec=args.mbps * 1e6 / 8)
+    results = {}
+    for label, run in (("rfc822", run_full), ("partial", run_partial)):
+        mail = IMAPStandIn(messages, **shape)
+        started = time.perf_counter()
+        results[label] = run(mail, uids)
+        _report(label, mail, time.perf_counter() - started, len(uids))
+
+    same = sum(results["rfc822"][uid] == results["partial"].get(uid) for uid in uids)
+    print(f"identical reply text for {same}/{len(uids)} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# bench/lead_ingestion_bench.py
+"""
+Lead import throughput: the old per-row commit loop vs batched
+ON CONFLICT inserts vs COPY + merge, on one generated lead file with
+some duplicate and invalid rows.
+
+    python bench/lead_ingestion_bench.py --rows 20000 --format jsonl
+    python bench/lead_ingestion_bench.py --url postgresql+psycopg2://... --modes batch,copy
+
+Runs on a throwaway sqlite file unless --url points at a scratch
+database. COPY needs PostgreSQL and is skipped elsewhere. Deliverability
+(DNS) checks are off; --no-syntax also swaps the email_validator syntax
+check for a trivial one, leaving only parsing and the writes.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ.setdefault("OPENROUTER_MODEL", "bench-model")
+
+import database  # noqa: E402
+import lead_ingestion  # noqa: E402
+from models import Lead  # noqa: E402
+from lead_sources import iter_leads  # noqa: E402
+from email_validation import ValidationStage  # noqa: E402
+from lead_ingestion import ingest_leads, normalize_lead  # noqa: E402
+
+DOMAIN = "bench.example.com"
+INDUSTRIES = ["Logistics", "Retail", "Healthcare", "Fintech", "Manufacturing"]
+
+
+# ------------------------------------------------------------------------------
+# Lead file
+# ------------------------------------------------------------------------------
+def make_leads(rng, count, duplicate_rate, invalid_rate):
+    for i in range(count):
+        roll = rng.random()
+        if roll < invalid_rate:
+            email = f"broken-{i}@@{DOMAIN}"
+        elif roll < invalid_rate + duplicate_rate and i:
+            email = f"lead{rng.randrange(i)}@{DOMAIN}"
+        else:
+            email = f"lead{i}@{DOMAIN}"
+
+        yield {
+            "name": f"Lead {i}",
+            "email": email,
+            "company": f"Company {i % 5000}",
+            "industry": rng.choice(INDUSTRIES),
+            "pain_points": ["manual reporting", "slow onboarding"][: rng.randint(1, 2)],
+            "conversation_opener": "Saw your post about scaling the ops team.",
+            "negotiation_angle": "Pilot first, then annual.",
+        }
+
+
+def write_file(path, fmt, leads):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for lead in leads:
+                f.write(json.dumps(lead) + "\n")
+        elif fmt == "json":
+            json.dump({"leads": list(leads)}, f)
+        else:
+            writer = csv.writer(f)
+            fields = ["name", "email", "company", "industry", "pain_points", "conversation_opener", "negotiation_angle"]
+            writer.writerow(fields)
+            for lead in leads:
+                lead["pain_points"] = ", ".join(lead["pain_points"])
+                writer.writerow([lead[k] for k in fields])
+
+
+# ------------------------------------------------------------------------------
+# Modes
+# ------------------------------------------------------------------------------
+def per_row(path, fmt):
+    """The import before batching: one INSERT and one commit per lead"""
+    report = {"total": 0, "inserted": 0, "duplicate": 0, "invalid": 0}
+    session = database.get_session_local()()
+    try:
+        for record in iter_leads(path, fmt):
+            report["total"] += 1
+            row = normalize_lead(record)
+            if row is None:
+                report["invalid"] += 1
+                continue
+            try:
+                session.add(Lead(**row, status="NEW", followup_count=0))
+                session.commit()
+                report["inserted"] += 1
+            except IntegrityError:
+                session.rollback()
+                report["duplicate"] += 1
+    finally:
+        session.close()
+    return report
+
+
+def bulk(mode):
+    def run(path, fmt):
+        return ingest_leads(path, fmt=fmt, mode=mode, validator=ValidationStage(check_deliverability=False))
+    return run
+
+
+MODES = {"per-row": per_row, "batch": bulk("batch"), "copy": bulk("copy")}
+
+
+def _reset(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM leads WHERE email LIKE :pattern"), {"pattern": f"%@{DOMAIN}"})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--format", choices=("jsonl", "json", "csv"), default="jsonl")
+    parser.add_argument("--modes", default="per-row,batch,copy")
+    parser.add_argument("--duplicates", type=float, default=0.05)
+    parser.add_argument("--invalid", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="scratch database URL (default: temporary sqlite file)")
+    parser.add_argument("--no-syntax", action="store_true", help="skip email_validator syntax checks")
+    args = parser.parse_args(argv)
+
+    if args.no_syntax:
+        lead_ingestion.check_syntax = lambda email: email if email.count("@") == 1 else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"leads.{args.format}")
+        write_file(path, args.format, make_leads(random.Random(args.seed), args.rows, args.duplicates, args.invalid))
+        print(f"{args.rows} leads, {os.path.getsize(path) / 1e6:.1f} MB {args.format}")
+
+        engine = create_engine(args.url or f"sqlite:///{os.path.join(tmp, 'leads.db')}")
+        database._engine, database._SessionLocal = engine, None
+        database.sync_schema(engine)
+
+        results = {}
+        for mode in args.modes.split(","):
+            if mode == "copy" and engine.dialect.name != "postgresql":
+                print(f"{mode:<8} skipped: needs PostgreSQL (--url postgresql+psycopg2://...)")
+                continue
+
+            _reset(engine)
+            started = time.perf_counter()
+            report = MODES[mode](path, args.format)
+            seconds = time.perf_counter() - started
+            results[mode] = report["total"] / seconds
+            print(
+                f"{mode:<8} {seconds:7.2f}s  {results[mode]:9.0f} rows/s  "
+                f"{report['inserted']} inserted, {report['duplicate']} duplicate, {report['invalid']} invalid"
+            )
+
+        _reset(engine)
+        engine.dispose()
+
+    if "per-row" in results:
+        for mode, rate in results.items():
+            if mode != "per-row":
+                print(f"{mode}: {rate / results['per-row']:.1f}x the per-row rate")
+
+
+if __name__ == "__main__":
+    main()
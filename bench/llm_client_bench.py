@@ -0,0 +1,171 @@
+# bench/llm_client_bench.py
+"""
+Shared keep-alive LLM client vs a new connection per call, against a
+local OpenRouter stand-in (HTTPS with a throwaway self-signed cert when
+openssl is available, else plain HTTP).
+
+    python bench/llm_client_bench.py --calls 300 --threads 4 --handshake-ms 30
+
+--handshake-ms delays every new connection to stand in for the TCP + TLS
+round trips to the real API; --server-ms is the model's own latency.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ.setdefault("OPENROUTER_MODEL", "bench-model")
+os.environ["LLM_CACHE"] = "0"
+
+import llm_client  # noqa: E402
+
+RESPONSE = json.dumps({
+    "choices": [{"message": {"content": "SUBJECT: Hi\n\nBODY:\nHello there."}}],
+    "usage": {"prompt_tokens": 900, "completion_tokens": 80},
+}).encode()
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # else delayed ACKs add ~40 ms per reused call
+    handshake_delay = 0.0
+    server_delay = 0.0
+    connections = 0
+
+    def setup(self):
+        StandIn.connections += 1
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server_delay:
+            time.sleep(self.server_delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed(directory):
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _serve(cert):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    scheme = "http"
+    if cert:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*cert)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/api/v1/chat/completions"
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a senior B2B outreach copywriter. " * 40},
+    {"role": "user", "content": "Lead: Jane, Acme, logistics"},
+]
+
+
+def per_call(url):
+    # what every generator did before: a fresh requests.post per call
+    response = requests.post(
+        url,
+        headers={"Authorization": "Bearer bench", "Content-Type": "application/json"},
+        json={"model": "bench-model", "messages": MESSAGES, "temperature": 0.3},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def shared(url):
+    return llm_client.chat_completion(MESSAGES, temperature=0.3, timeout=30)
+
+
+def _run(label, call, url, calls, threads):
+    latencies = []
+
+    def one(_):
+        started = time.perf_counter()
+        call(url)
+        latencies.append(time.perf_counter() - started)
+
+    StandIn.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<9} {calls} calls  {calls / seconds:7.1f} calls/s  "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms  p95 {p95 * 1000:6.1f} ms  "
+        f"{StandIn.connections:4d} connections"
+    )
+    return statistics.median(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=20)
+    parser.add_argument("--server-ms", type=float, default=0)
+    parser.add_argument("--plain-http", action="store_true")
+    args = parser.parse_args(argv)
+
+    StandIn.handshake_delay = args.handshake_ms / 1000
+    StandIn.server_delay = args.server_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert = None if args.plain_http else _self_signed(tmp)
+        if cert:
+            os.environ["REQUESTS_CA_BUNDLE"] = cert[0]
+        server, url = _serve(cert)
+        llm_client.OPENROUTER_URL = url
+        print(f"stand-in at {url}")
+
+        try:
+            baseline = _run("per-call", per_call, url, args.calls, args.threads)
+            pooled = _run("shared", shared, url, args.calls, args.threads)
+        finally:
+            server.shutdown()
+
+    print(f"p50 latency {baseline / pooled:.1f}x lower with the shared client")
+
+
+if __name__ == "__main__":
+    socket.setdefaulttimeout(30)
+    main()
@@ -0,0 +1,222 @@
+# bench/scheduler_tick_bench.py
+"""
+Cost of one scheduler tick over a large leads table: the indexed
+(next_action, next_action_at) claim the jobs use now vs the old candidate
+scan that loaded every sent lead and checked due times in Python.
+
+    python bench/scheduler_tick_bench.py --leads 1000000 --due 500
+
+Runs on a throwaway sqlite file unless --url points at a scratch database
+(the leads table there is filled, not cleared).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, insert, or_, text, update
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ.setdefault("OPENROUTER_MODEL", "bench-model")
+
+from database import Base  # noqa: E402
+from models import Lead  # noqa: E402
+from lead_state import (  # noqa: E402
+    FOLLOWUP, FOLLOWUP_DELAY, INITIAL_DRAFT, MAX_FOLLOWUPS, due, next_action_for,
+)
+from leases import CLAIM_CHUNK_SIZE, claim_leads  # noqa: E402
+
+INSERT_BATCH = 50_000
+
+
+# ------------------------------------------------------------------------------
+# Table
+# ------------------------------------------------------------------------------
+def _lead(rng, i, now, due_ids):
+    lead = {
+        "id": i,
+        "email": f"lead{i}@example.com",
+        "name": f"Lead {i}",
+        "company": "Acme",
+        "status": "NEW",
+        "draft_ready": False,
+        "followup_count": 0,
+        "awaiting_reply": False,
+        "last_email_sent": None,
+        "last_ai_reply_sent": None,
+    }
+
+    if i in due_ids:
+        if i % 2:
+            lead.update(status="EMAIL_SENT", last_email_sent=now - FOLLOWUP_DELAY - timedelta(minutes=1))
+        return lead   # even ids stay NEW: due for an initial draft
+
+    kind = rng.random()
+    if kind < 0.45:
+        lead.update(status=rng.choice(["NOT_INTERESTED", "CLOSED", "BOUNCED", "QUALIFIED"]))
+    elif kind < 0.50:
+        lead.update(status="DRAFT_READY", draft_ready=True)
+    elif kind < 0.70:
+        # follow-ups used up
+        lead.update(status="FOLLOWUP_SENT", followup_count=MAX_FOLLOWUPS, last_email_sent=now - timedelta(days=rng.randint(1, 90)))
+    else:
+        # waiting out the follow-up delay
+        lead.update(
+            status=rng.choice(["EMAIL_SENT", "FOLLOWUP_SENT"]),
+            followup_count=rng.randint(0, MAX_FOLLOWUPS - 1),
+            last_email_sent=now - FOLLOWUP_DELAY * rng.random() + timedelta(hours=1),
+        )
+
+    return lead
+
+
+def populate(engine, count, due_count, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    due_ids = set(rng.sample(range(1, count + 1), due_count))
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        rows = []
+        for i in range(1, count + 1):
+            lead = _lead(rng, i, now, due_ids)
+            lead["next_action"], lead["next_action_at"] = next_action_for(SimpleNamespace(**lead), now)
+            rows.append(lead)
+            if len(rows) == INSERT_BATCH:
+                conn.execute(insert(Lead), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Lead), rows)
+
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+
+# ------------------------------------------------------------------------------
+# Ticks
+# ------------------------------------------------------------------------------
+def scan_followups(session):
+    """The follow-up job before next_action_at: every candidate, due check in Python"""
+    now = datetime.now(timezone.utc)
+    leads = (
+        session.query(Lead)
+        .filter(
+            Lead.status.in_(["EMAIL_SENT", "FOLLOWUP_SENT"]),
+            Lead.last_email_sent.isnot(None),
+            Lead.followup_count < MAX_FOLLOWUPS,
+            Lead.draft_ready == False,   # noqa: E712
+        )
+        .all()
+    )
+    due_leads = [
+        lead for lead in leads
+        if now - lead.last_email_sent.replace(tzinfo=timezone.utc) >= FOLLOWUP_DELAY
+    ]
+    return due_leads[:CLAIM_CHUNK_SIZE]
+
+
+def scan_initial(session):
+    """The initial-draft job before next_action_at"""
+    leads = (
+        session.query(Lead)
+        .filter(Lead.status == "NEW", Lead.draft_ready == False)   # noqa: E712
+        .all()
+    )
+    return leads[:CLAIM_CHUNK_SIZE]
+
+
+def indexed(action):
+    """The select claim_leads runs, without the lease writes"""
+    def tick(session):
+        return (
+            session.query(Lead)
+            .filter(*due(action), or_(Lead.lease_until.is_(None), Lead.lease_until < datetime.now(timezone.utc)))
+            .order_by(Lead.next_action_at)
+            .limit(CLAIM_CHUNK_SIZE)
+            .all()
+        )
+    return tick
+
+
+def claim(action):
+    def tick(session):
+        return claim_leads(session, *due(action), order_by=Lead.next_action_at)
+    return tick
+
+
+def _release_all(session):
+    session.execute(update(Lead).where(Lead.claimed_by.isnot(None)).values(claimed_by=None, lease_until=None))
+    session.commit()
+
+
+def _time(Session, tick, repeat):
+    timings = []
+    for _ in range(repeat):
+        session = Session()
+        try:
+            started = time.perf_counter()
+            claimed = tick(session)
+            timings.append(time.perf_counter() - started)
+            session.rollback()
+            _release_all(session)
+        finally:
+            session.close()
+    return statistics.median(timings), len(claimed)
+
+
+def _plan(engine, action):
+    if engine.dialect.name != "sqlite":
+        return ""
+    query = (
+        "EXPLAIN QUERY PLAN SELECT id FROM leads WHERE next_action = :action "
+        "AND next_action_at <= :now ORDER BY next_action_at LIMIT 50"
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(text(query), {"action": action, "now": datetime.now(timezone.utc)}).all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--due", type=int, default=500, help="leads due for a draft, split initial / follow-up")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="scratch database URL (default: temporary sqlite file)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.url or f"sqlite:///{os.path.join(tmp, 'leads.db')}")
+        Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        started = time.perf_counter()
+        populate(engine, args.leads, args.due, args.seed)
+        print(f"{args.leads} leads, {args.due} due, loaded in {time.perf_counter() - started:.1f}s")
+        print(f"plan: {_plan(engine, FOLLOWUP)}")
+
+        for label, scan, action in (
+            ("followup", scan_followups, FOLLOWUP),
+            ("initial", scan_initial, INITIAL_DRAFT),
+        ):
+            scan_seconds, scan_count = _time(Session, scan, args.repeat)
+            index_seconds, index_count = _time(Session, indexed(action), args.repeat)
+            claim_seconds, _ = _time(Session, claim(action), args.repeat)
+            print(
+                f"{label:<9} scan {scan_seconds * 1000:9.1f} ms  "
+                f"indexed {index_seconds * 1000:7.1f} ms  ({scan_seconds / index_seconds:6.1f}x, "
+                f"{scan_count}/{index_count} leads)  claim + lease commit {claim_seconds * 1000:7.1f} ms"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
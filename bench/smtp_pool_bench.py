@@ -0,0 +1,101 @@
+# bench/smtp_pool_bench.py
+"""
+Pooled vs unpooled SMTP sends against a local aiosmtpd sink.
+
+    python bench/smtp_pool_bench.py --messages 500 --threads 3 --handshake-ms 20
+
+--handshake-ms delays every EHLO to stand in for the TLS + login round
+trips a real provider adds to each new connection.
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from email_sender import SMTPConnectionPool, PooledSMTP  # noqa: E402
+
+
+class Sink:
+    def __init__(self, handshake_ms):
+        self.handshake = handshake_ms / 1000
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        if self.handshake:
+            await asyncio.sleep(self.handshake)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _message(i):
+    msg = MIMEText(f"Benchmark message {i}\n" + "x" * 800)
+    msg["From"] = "bench@example.com"
+    msg["To"] = f"lead{i}@example.com"
+    msg["Subject"] = f"bench {i}"
+    return msg
+
+
+def _send_unpooled(host, port, msg):
+    with smtplib.SMTP(host, port, timeout=30) as server:
+        server.send_message(msg)
+
+
+def _run(label, send, messages, threads):
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(send, (_message(i) for i in range(messages))))
+    else:
+        for i in range(messages):
+            send(_message(i))
+    seconds = time.perf_counter() - started
+    print(f"{label:<10} {messages} msgs in {seconds:.2f}s  {messages / seconds:8.1f} msgs/s  "
+          f"{seconds / messages * 1000:6.2f} ms/msg")
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--handshake-ms", type=float, default=10)
+    args = parser.parse_args(argv)
+
+    sink = Sink(args.handshake_ms)
+    host, port = "127.0.0.1", _free_port()
+    controller = Controller(sink, hostname=host, port=port)
+    controller.start()
+
+    try:
+        unpooled = _run("unpooled", lambda m: _send_unpooled(host, port, m), args.messages, args.threads)
+
+        pool = SMTPConnectionPool(host, port, None, None, max_size=args.threads, connection_class=PooledSMTP)
+        pooled = _run("pooled", pool.send_message, args.messages, args.threads)
+        pool.close()
+    finally:
+        controller.stop()
+
+    print(f"speedup    {unpooled / pooled:.1f}x  (sink received {sink.received})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+# keep a developer's .env from reaching the code under test
+os.environ["OPENROUTER_API_KEY"] = "test-key"
+os.environ["OPENROUTER_MODEL"] = "test-model"
+os.environ.pop("DATABASE_URL", None)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh sqlite database behind database.get_session_local(); yields the sessionmaker"""
+    from sqlalchemy import create_engine
+    import database
+    import models  # noqa: F401  (registers the tables)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    database.Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_SessionLocal", None)
+
+    yield database.get_session_local()
+
+    engine.dispose()
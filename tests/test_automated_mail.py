@@ -0,0 +1,59 @@
+# tests/test_automated_mail.py
+import os
+from email.message import Message
+
+import pytest
+
+from automated_mail import detect_automated, failed_recipients, check_fixtures
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fixtures", "automated")
+
+
+def _headers(**fields):
+    msg = Message()
+    for name, value in fields.items():
+        msg[name.replace("_", "-")] = value
+    return msg
+
+
+@pytest.mark.parametrize(
+    "fields, kind",
+    [
+        ({"Content_Type": 'multipart/report; report-type="delivery-status"'}, "bounce"),
+        ({"Content_Type": 'multipart/report; report-type="disposition-notification"'}, "auto_reply"),
+        ({"X_Failed_Recipients": "x@y.com"}, "bounce"),
+        ({"From": "Mail Delivery Subsystem <MAILER-DAEMON@googlemail.com>"}, "bounce"),
+        ({"Auto_Submitted": "auto-replied"}, "auto_reply"),
+        ({"Auto_Submitted": "no", "From": "a@b.com"}, None),
+        ({"Precedence": "bulk"}, "auto_reply"),
+        ({"Return_Path": "<>", "Subject": "Undeliverable: hello"}, "bounce"),
+        ({"Return_Path": "<>", "Subject": "Thanks"}, "auto_reply"),
+        ({"X_Auto_Response_Suppress": "All", "Subject": "Automatic reply: hi"}, "auto_reply"),
+        ({"X_Auto_Response_Suppress": "All", "Subject": "Re: hi"}, None),
+        ({"From": "Jane <jane@acme.com>", "Subject": "Re: Quick question"}, None),
+    ],
+)
+def test_detect_automated(fields, kind):
+    assert detect_automated(_headers(**fields)) == kind
+
+
+def test_failed_recipients_reads_failed_blocks_only():
+    dsn = (
+        "Reporting-MTA: dns; mx.example.com\n"
+        "\n"
+        "Final-Recipient: rfc822; Gone@Example.com\n"
+        "Action: failed\n"
+        "Status: 5.1.1\n"
+        "\n"
+        "Final-Recipient: rfc822; <later@example.com>\n"
+        "Action: delayed\n"
+        "Status: 4.4.1\n"
+    )
+    headers = _headers(X_Failed_Recipients="other@example.com, not-an-address")
+
+    assert failed_recipients(dsn, headers) == {"gone@example.com", "other@example.com"}
+    assert failed_recipients("") == set()
+
+
+def test_fixture_corpus(capsys):
+    assert check_fixtures(FIXTURES) == 0
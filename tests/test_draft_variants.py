@@ -0,0 +1,73 @@
+# tests/test_draft_variants.py
+import pytest
+
+from draft_variants import save_drafts, variants_by_lead, select_variant
+from models import Lead, DraftVariant
+
+DRAFTS = [("Subject A", "Body A"), ("Subject B", "Body B"), ("Subject C", "Body C")]
+
+
+@pytest.fixture
+def session(db):
+    session = db()
+    yield session
+    session.close()
+
+
+def _drafted(session, draft_type, **fields):
+    lead = Lead(email="jane@example.com", name="Jane", status="NEW", **fields)
+    session.add(lead)
+    session.flush()
+
+    save_drafts(session, lead, draft_type, DRAFTS)
+    lead.status = "DRAFT_READY"
+    session.commit()
+    return lead
+
+
+def test_save_drafts_shows_the_first_and_stores_all(session):
+    lead = _drafted(session, "followup")
+
+    assert (lead.draft_subject, lead.draft_body) == DRAFTS[0]
+    assert (lead.draft_type, lead.draft_ready, lead.draft_variant) == ("followup", True, 0)
+
+    stored = variants_by_lead(session, [lead.id])[lead.id]
+    assert [(v.position, v.subject, v.body) for v in stored] == [(i, s, b) for i, (s, b) in enumerate(DRAFTS)]
+
+
+def test_save_drafts_replaces_previous_variants(session):
+    lead = _drafted(session, "initial")
+
+    save_drafts(session, lead, "initial", ("Only", "One"))   # single (subject, body) draft
+    session.commit()
+
+    stored = variants_by_lead(session, [lead.id])[lead.id]
+    assert [(v.position, v.subject) for v in stored] == [(0, "Only")]
+    assert lead.draft_subject == "Only"
+
+
+def test_select_variant(session):
+    lead = _drafted(session, "initial")
+    stored = variants_by_lead(session, [lead.id])[lead.id]
+
+    select_variant(lead, stored[2])
+    session.commit()
+    session.expire_all()
+
+    assert (lead.draft_subject, lead.draft_body, lead.draft_variant) == (*DRAFTS[2], 2)
+    assert session.query(DraftVariant).filter_by(lead_id=lead.id).count() == 3
+
+
+def test_variants_by_lead_groups_by_lead(session):
+    first = _drafted(session, "initial")
+    second = Lead(email="sam@example.com", status="NEW")
+    session.add(second)
+    session.flush()
+    save_drafts(session, second, "initial", DRAFTS[:1])
+    session.commit()
+
+    variants = variants_by_lead(session, [first.id, second.id])
+
+    assert {lead_id: len(rows) for lead_id, rows in variants.items()} == {first.id: 3, second.id: 1}
+    assert variants_by_lead(session, []) == {}
+
@@ -0,0 +1,65 @@
+# tests/test_email_generator.py
+import pytest
+
+from email_generator import _parse_subject_body, _draft_result, EmailGenerationError
+
+
+def _variant(n, subject=None, body=None):
+    return f"VARIANT {n}:\nSUBJECT: {subject or f'Subject {n}'}\n\nBODY:\n{body or f'Body {n}'}\n\n"
+
+
+def test_single_draft():
+    assert _parse_subject_body("SUBJECT: Hello\n\nBODY:\nHi Jane,\nBye") == ("Hello", "Hi Jane,\nBye")
+
+
+@pytest.mark.parametrize("content", ["just some text", "SUBJECT: only a subject", "SUBJECT:\nBODY:\n"])
+def test_single_draft_rejects_incomplete_output(content):
+    with pytest.raises(EmailGenerationError):
+        _parse_subject_body(content)
+
+
+def test_variants_in_order():
+    content = _variant(1) + _variant(2) + _variant(3)
+    assert _parse_subject_body(content, multiple=True) == [
+        ("Subject 1", "Body 1"),
+        ("Subject 2", "Body 2"),
+        ("Subject 3", "Body 3"),
+    ]
+
+
+def test_preamble_before_first_variant_is_dropped():
+    content = "Sure! Here are three drafts for Jane:\n\n" + _variant(1) + _variant(2)
+    assert _parse_subject_body(content, multiple=True) == [("Subject 1", "Body 1"), ("Subject 2", "Body 2")]
+
+
+def test_decorated_markers():
+    content = "**Variant #1:**\nSUBJECT: A\nBODY:\nBody A\n\n### VARIANT 2:\nSUBJECT: B\nBODY:\nBody B\n"
+    assert _parse_subject_body(content, multiple=True) == [("A", "Body A"), ("B", "Body B")]
+
+
+def test_body_lines_mentioning_a_variant_do_not_split_a_draft():
+    body = "Hi Jane,\nVariant 2 of our plan adds reporting.\nVARIANT 3: the enterprise tier.\nBest"
+    content = _variant(1, body=body) + _variant(2)
+    assert _parse_subject_body(content, multiple=True) == [("Subject 1", body), ("Subject 2", "Body 2")]
+
+
+def test_bad_variant_is_skipped_among_good_ones():
+    content = _variant(1) + "VARIANT 2:\nSUBJECT: Missing its body\n\n" + _variant(3)
+    assert _parse_subject_body(content, multiple=True) == [("Subject 1", "Body 1"), ("Subject 3", "Body 3")]
+
+
+def test_no_markers_is_one_draft():
+    content = "SUBJECT: Only one\n\nBODY:\nThe model ignored the variant format."
+    assert _parse_subject_body(content, multiple=True) == [("Only one", "The model ignored the variant format.")]
+
+
+@pytest.mark.parametrize("content", ["no markers and no draft", "VARIANT 1:\nnothing\nVARIANT 2:\nSUBJECT: x\n"])
+def test_no_usable_variant_raises(content):
+    with pytest.raises(EmailGenerationError):
+        _parse_subject_body(content, multiple=True)
+
+
+def test_draft_result_keeps_at_most_the_requested_variants():
+    content = _variant(1) + _variant(2) + _variant(3) + _variant(4)
+    assert len(_draft_result(content, 3)) == 3
+    assert _draft_result(_variant(1), 1) == ("Subject 1", "Body 1")
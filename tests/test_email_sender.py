@@ -0,0 +1,94 @@
+# tests/test_email_sender.py
+import smtplib
+from email.mime.text import MIMEText
+
+import pytest
+
+from email_sender import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Stands in for PooledSMTP; `script` holds the outcome of each send"""
+
+    script = []
+    opened = []
+
+    def __init__(self, host, port, timeout=None):
+        self.data_started = False
+        self.sent = []
+        FakeSMTP.opened.append(self)
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        outcome = FakeSMTP.script.pop(0)
+        if outcome == "drop_before_data":
+            raise smtplib.SMTPServerDisconnected("closed at MAIL FROM")
+        if outcome == "drop_after_data":
+            self.data_started = True
+            raise smtplib.SMTPServerDisconnected("closed after DATA")
+        self.data_started = True
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def pool():
+    FakeSMTP.script = []
+    FakeSMTP.opened = []
+    return SMTPConnectionPool("smtp.test", 25, None, None, max_size=2, connection_class=FakeSMTP)
+
+
+def _msg():
+    msg = MIMEText("hi")
+    msg["Subject"] = "s"
+    return msg
+
+
+def test_connection_is_reused(pool):
+    FakeSMTP.script = ["ok", "ok", "ok"]
+    for _ in range(3):
+        pool.send_message(_msg())
+
+    assert len(FakeSMTP.opened) == 1
+    assert len(FakeSMTP.opened[0].sent) == 3
+
+
+def test_drop_before_data_is_retried_on_a_fresh_connection(pool):
+    FakeSMTP.script = ["drop_before_data", "ok"]
+    pool.send_message(_msg())
+
+    assert len(FakeSMTP.opened) == 2
+    assert len(FakeSMTP.opened[1].sent) == 1
+
+
+def test_drop_after_data_is_not_retried(pool):
+    FakeSMTP.script = ["drop_after_data", "ok"]
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send_message(_msg())
+
+    assert len(FakeSMTP.opened) == 1
+    assert FakeSMTP.script == ["ok"]
+
+
+def test_second_drop_is_raised(pool):
+    FakeSMTP.script = ["drop_before_data", "drop_before_data"]
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send_message(_msg())
+
+
+def test_pooled_smtp_flags_data(monkeypatch):
+    from email_sender import PooledSMTP
+
+    monkeypatch.setattr(smtplib.SMTP, "data", lambda self, msg: (250, b"queued"))
+    server = PooledSMTP()   # no host: not connected
+
+    assert server.data_started is False
+    assert server.data(b"body") == (250, b"queued")
+    assert server.data_started is True
@@ -0,0 +1,86 @@
+# tests/test_imap_fetch.py
+import base64
+
+from imap_fetch import parse_fetch, find_text_part, find_part, decode_part
+
+MULTIPART = (
+    b'(("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL "QUOTED-PRINTABLE" 120 4 NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "7BIT" 300 8 NIL NIL NIL) "ALTERNATIVE")'
+)
+WITH_ATTACHMENT = (
+    b'(("TEXT" "PLAIN" ("NAME" "notes.txt") NIL NIL "BASE64" 90 2 NIL ("ATTACHMENT" ("FILENAME" "notes.txt")) NIL)'
+    + MULTIPART
+    + b' "MIXED")'
+)
+
+
+def _fetch(structure, header=b"From: a@b.com\r\n\r\n", uid=42):
+    prefix = b"1 (UID %d BODYSTRUCTURE %s BODY[HEADER.FIELDS (FROM)] {%d}" % (uid, structure, len(header))
+    return [(prefix, header), b")"]
+
+
+def test_parse_fetch_reads_uid_literal_and_structure():
+    result = parse_fetch(_fetch(MULTIPART))
+
+    items = result[42]
+    assert items["BODY[HEADER.FIELDS (FROM)]"] == b"From: a@b.com\r\n\r\n"
+    assert items["BODYSTRUCTURE"][-1] == b"ALTERNATIVE"
+
+
+def test_parse_fetch_several_messages_and_partial_section_keys():
+    data = [
+        (b"1 (UID 7 BODY[1]<0> {5}", b"hello"),
+        b")",
+        (b'2 (UID 9 BODY[1.2]<0> {3}', b"abc"),
+        b")",
+    ]
+    result = parse_fetch(data)
+
+    assert result[7]["BODY[1]"] == b"hello"
+    assert result[9]["BODY[1.2]"] == b"abc"
+
+
+def test_parse_fetch_quoted_strings_and_nil():
+    data = [b'1 (UID 3 BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "a \\"b\\"") NIL NIL "7BIT" 10 1 NIL NIL NIL))']
+    structure = parse_fetch(data)[3]["BODYSTRUCTURE"]
+
+    assert structure[2] == [b"CHARSET", b'a "b"']
+    assert structure[3] is None
+
+
+def test_find_text_part_in_alternative():
+    structure = parse_fetch(_fetch(MULTIPART))[42]["BODYSTRUCTURE"]
+    assert find_text_part(structure) == ("1", "quoted-printable", "iso-8859-1")
+
+
+def test_find_text_part_skips_attachments():
+    structure = parse_fetch(_fetch(WITH_ATTACHMENT))[42]["BODYSTRUCTURE"]
+    assert find_text_part(structure) == ("2.1", "quoted-printable", "iso-8859-1")
+
+
+def test_single_part_message_is_section_1():
+    data = _fetch(b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "7BIT" 10 1 NIL NIL NIL)')
+    structure = parse_fetch(data)[42]["BODYSTRUCTURE"]
+    assert find_text_part(structure) == ("1", "7bit", "utf-8")
+
+
+def test_find_part_by_type():
+    report = (
+        b'(("TEXT" "PLAIN" NIL NIL NIL "7BIT" 10 1 NIL NIL NIL)'
+        b'("MESSAGE" "DELIVERY-STATUS" NIL NIL NIL "7BIT" 200 NIL NIL NIL) "REPORT")'
+    )
+    structure = parse_fetch(_fetch(report))[42]["BODYSTRUCTURE"]
+
+    assert find_part(structure, "message/delivery-status") == ("2", "7bit", "utf-8")
+    assert find_part(structure, "image/png") is None
+
+
+def test_decode_part_base64_cut_mid_quantum():
+    raw = base64.encodebytes("Héllo wörld, thanks!".encode("utf-8"))
+    assert decode_part(raw[:-3], "base64", "utf-8").startswith("Héllo wörld")
+
+
+def test_decode_part_quoted_printable_and_unknown_charset():
+    assert decode_part(b"caf=C3=A9", "quoted-printable", "utf-8") == "café"
+    assert decode_part(b"plain", "7bit", "x-unknown") == "plain"
+    assert decode_part(None, "7bit", "utf-8") == ""
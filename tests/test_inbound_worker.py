@@ -0,0 +1,94 @@
+# tests/test_inbound_worker.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import inbound_worker
+from llm_client import LLMTimeout
+from models import Lead, InboundMessage
+
+
+@pytest.fixture
+def worker(db, monkeypatch):
+    """One pending reply; drafting raises whatever `state["error"]` holds"""
+    state = {"drafts": 0, "error": RuntimeError("unparseable draft")}
+
+    def draft(lead, text, variants=1):
+        state["drafts"] += 1
+        if state["error"]:
+            raise state["error"]
+        return "Re: pricing", "Here it is"
+
+    monkeypatch.setattr(inbound_worker, "llm_available", lambda: True)
+    monkeypatch.setattr(inbound_worker, "analyze_replies", lambda texts: ["Pricing"] * len(texts))
+    monkeypatch.setattr(inbound_worker, "generate_reply_email", draft)
+
+    session = db()
+    lead = Lead(email="jane@example.com", name="Jane", status="EMAIL_SENT")
+    session.add(lead)
+    session.flush()
+    session.add(InboundMessage(lead_id=lead.id, message_id="<r1@test>", body="What does it cost?"))
+    session.commit()
+    session.close()
+
+    state["db"] = db
+    return state
+
+
+def _message(db):
+    session = db()
+    try:
+        return session.query(InboundMessage).one()
+    finally:
+        session.close()
+
+
+def _make_due(db):
+    session = db()
+    session.query(InboundMessage).update(
+        {"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    session.commit()
+    session.close()
+
+
+def test_failed_reply_backs_off_instead_of_spinning(worker):
+    db = worker["db"]
+
+    inbound_worker.process_inbound_messages()
+    message = _message(db)
+    assert worker["drafts"] == 1                 # not reclaimed by the same run
+    assert (message.status, message.attempts) == ("PENDING", 1)
+    assert message.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+    inbound_worker.process_inbound_messages()
+    assert worker["drafts"] == 1                 # still backing off
+
+    _make_due(db)
+    worker["error"] = None
+    inbound_worker.process_inbound_messages()
+    message = _message(db)
+    assert (message.status, message.attempts, message.next_attempt_at) == ("DONE", 2, None)
+
+
+def test_reply_fails_for_good_after_max_attempts(worker):
+    db = worker["db"]
+
+    for _ in range(inbound_worker.MAX_ATTEMPTS):
+        _make_due(db)
+        inbound_worker.process_inbound_messages()
+
+    assert worker["drafts"] == inbound_worker.MAX_ATTEMPTS
+    assert _message(db).status == "FAILED"
+
+
+def test_transient_errors_back_off_without_using_attempts(worker):
+    db = worker["db"]
+    worker["error"] = LLMTimeout("timed out")
+
+    inbound_worker.process_inbound_messages()
+
+    message = _message(db)
+    assert worker["drafts"] == 1
+    assert (message.status, message.attempts) == ("PENDING", 0)
+    assert message.next_attempt_at is not None
@@ -0,0 +1,141 @@
+# tests/test_intent_analyzer.py
+import json
+from collections import OrderedDict
+
+import pytest
+
+import intent_analyzer
+import llm_cache
+from intent_analyzer import analyze_replies, _parse_batch, _single_key
+from llm_client import LLMError, LLMTimeout
+from prompts import INTENT, INTENT_BATCH
+
+LABELS = ["Interested", "Pricing", "Call Request", "Question", "Not Interested"]
+
+
+class FakeLLM:
+    """route_completion stand-in: answers batches with `respond(ids)`, single calls with "Pricing" """
+
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda ids: [{"id": i, "intent": LABELS[i % len(LABELS)]} for i in ids])
+        self.batches = []
+        self.singles = []
+
+    def __call__(self, route, messages, *, temperature, timeout, tag=None):
+        if tag == INTENT_BATCH.key:
+            replies = json.loads(messages[-1]["content"].split("\n", 1)[1])
+            self.batches.append([r["text"] for r in replies])
+            return json.dumps(self.respond([r["id"] for r in replies]))
+
+        assert tag == INTENT.key
+        self.singles.append(messages[-1]["content"])
+        return "Pricing"
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(intent_analyzer, "route_completion", fake)
+    monkeypatch.setattr(intent_analyzer, "route_model", lambda route: "test-model")
+    monkeypatch.setattr(intent_analyzer, "fastpath_classify", lambda text: (None, None))
+    monkeypatch.setattr(intent_analyzer, "INTENT_BATCH_SIZE", 20)
+    monkeypatch.setattr(intent_analyzer, "LLM_CACHE", False)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", False)
+    return fake
+
+
+def _texts(count):
+    return [f"reply number {i}" for i in range(count)]
+
+
+def test_one_request_per_batch_size(llm):
+    results = analyze_replies(_texts(45))
+
+    assert [len(batch) for batch in llm.batches] == [20, 20, 5]
+    assert llm.singles == []
+    assert results[:5] == LABELS
+    assert results[20] == LABELS[0]   # ids restart in every batch
+
+
+def test_single_pending_reply_skips_the_batch_prompt(llm):
+    assert analyze_replies(["", "reply"]) == ["Question", "Pricing"]
+    assert llm.batches == []
+    assert len(llm.singles) == 1
+
+
+def test_partial_output_falls_back_per_missing_item(llm):
+    llm.respond = lambda ids: [{"id": i, "intent": "Interested"} for i in ids[:3]]
+
+    results = analyze_replies(_texts(5))
+
+    assert len(llm.batches) == 1
+    assert len(llm.singles) == 2
+    assert results == ["Interested"] * 3 + ["Pricing"] * 2
+
+
+def test_unknown_labels_and_bad_ids_fall_back(llm):
+    llm.respond = lambda ids: [
+        {"id": 0, "intent": "Call Request"},
+        {"id": 1, "intent": "Maybe later?"},    # unknown label
+        {"id": 7, "intent": "Interested"},      # out of range
+        {"id": -1, "intent": "Interested"},
+        {"id": "2", "intent": "Interested"},    # not an int
+        {"id": 3, "intent": "not interested"},
+    ]
+
+    results = analyze_replies(_texts(4))
+
+    assert results == ["Call Request", "Pricing", "Pricing", "Not Interested"]
+    assert len(llm.batches) == 1
+    assert len(llm.singles) == 2   # ids 1 and 2
+
+
+def test_unusable_batch_response_falls_back_for_every_item(llm, monkeypatch):
+    monkeypatch.setattr(intent_analyzer, "route_completion", lambda *a, **kw: (
+        "Sorry, I can't do that." if kw["tag"] == INTENT_BATCH.key else llm(*a, **kw)
+    ))
+
+    assert analyze_replies(_texts(3)) == ["Pricing"] * 3
+    assert len(llm.singles) == 3
+
+
+def test_permanent_batch_error_falls_back_and_transient_raises(llm, monkeypatch):
+    def failing(error):
+        def complete(*args, **kwargs):
+            if kwargs["tag"] == INTENT_BATCH.key:
+                raise error
+            return llm(*args, **kwargs)
+        return complete
+
+    monkeypatch.setattr(intent_analyzer, "route_completion", failing(LLMError("bad request", 400)))
+    assert analyze_replies(_texts(2)) == ["Pricing", "Pricing"]
+
+    monkeypatch.setattr(intent_analyzer, "route_completion", failing(LLMTimeout("timed out")))
+    with pytest.raises(LLMTimeout):
+        analyze_replies(_texts(2))
+
+
+def test_cached_replies_skip_the_request_and_results_are_written_back(llm, db, monkeypatch):
+    monkeypatch.setattr(intent_analyzer, "LLM_CACHE", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", True)
+    monkeypatch.setattr(llm_cache, "_memory", OrderedDict())
+
+    texts = _texts(4)
+    llm_cache.put(_single_key(texts[2], "test-model"), INTENT, "test-model", "Not Interested")
+
+    results = analyze_replies(texts)
+
+    assert llm.batches == [[texts[0], texts[1], texts[3]]]
+    assert results[2] == "Not Interested"
+    assert llm_cache.get(_single_key(texts[3], "test-model")) == results[3]
+
+
+def test_parse_batch_tolerates_prose_and_bare_labels():
+    content = 'Here you go:\n[{"id": 1, "intent": "Pricing"}, {"id": 0, "intent": "Question"}]\nThanks'
+    assert _parse_batch(content, 2) == {0: "Question", 1: "Pricing"}
+    assert _parse_batch('["Interested", "nonsense", "Call Request"]', 3) == {0: "Interested", 2: "Call Request"}
+
+
+@pytest.mark.parametrize("content", ["", "no array here", "[{\"id\": 0,", '{"id": 0, "intent": "Pricing"}'])
+def test_parse_batch_rejects_unusable_output(content):
+    assert _parse_batch(content, 1) == {}
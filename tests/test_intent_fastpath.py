@@ -0,0 +1,54 @@
+# tests/test_intent_fastpath.py
+import os
+
+import pytest
+
+from intent_fastpath import classify, load_fixtures
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "intent_fixtures.jsonl")
+NO_MODEL = {}   # rules only
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "not interested right now but what is your pricing",
+        "No thanks needed. How much would a small pilot cost?",
+        "Not a fit this year, but happy to set up a call in Q3.",
+    ],
+)
+def test_mixed_signals_go_to_the_llm(text):
+    assert classify(text) == (None, None)
+
+
+@pytest.mark.parametrize(
+    "text, label",
+    [
+        ("No, thanks for the note! Can we schedule a call Tuesday?", "Call Request"),
+        ("Please remove me from the cc and loop in Sarah.", None),
+        ("Please remove me from the cc and loop in Sarah, she handles vendor pricing", "Pricing"),
+        ("Remove me from your mailing list.", "Not Interested"),
+        ("Please remove me.", "Not Interested"),
+        ("Hi Sam,\nNo thanks, we're all set.", "Not Interested"),
+        ("No, thank you.", "Not Interested"),
+        ("What does it cost per month?", "Pricing"),
+        ("Thanks, what are the fees for cancellation? We will not proceed.", None),
+        ("Please quote our CEO in the case study.", None),
+        ("Can we zoom in on the onboarding numbers?", None),
+        ("Could you share a quote for a small pilot?", "Pricing"),
+        ("What are your fees?", "Pricing"),
+        ("Happy to talk over Zoom next week.", "Call Request"),
+    ],
+)
+def test_rules(text, label):
+    assert classify(text, NO_MODEL)[0] == label
+
+
+def test_rule_hits_agree_with_every_fixture_label():
+    for text, expected in load_fixtures(FIXTURES):
+        label, source = classify(text, NO_MODEL)
+        assert label in (None, expected), text
+
+
+def test_blank_text_is_not_classified():
+    assert classify("   ") == (None, None)
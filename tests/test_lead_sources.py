@@ -0,0 +1,113 @@
+# tests/test_lead_sources.py
+import json
+import threading
+
+import pytest
+
+import lead_sources
+from lead_sources import iter_leads, iter_positioned, prefetch, detect_format
+
+LEADS = [{"name": f"Lead {i}", "email": f"lead{i}@example.com", "note": "x" * (i * 7)} for i in range(25)]
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    """Forces the pure-Python scanner with a tiny buffer, so items straddle chunks"""
+    monkeypatch.setattr(lead_sources, "ijson", None)
+    monkeypatch.setattr(lead_sources, "READ_CHUNK", 16)
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_detect_format(tmp_path):
+    assert detect_format("a/b.NDJSON") == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format("leads.xlsx")
+
+
+@pytest.mark.parametrize("document", [{"count": 25, "leads": LEADS}, LEADS])
+def test_json_scanner_reads_wrapped_and_bare_arrays(tmp_path, scanner, document):
+    path = _write(tmp_path, "leads.json", json.dumps(document, indent=2))
+    assert list(iter_leads(path)) == LEADS
+
+
+def test_json_scanner_rejects_truncated_file(tmp_path, scanner):
+    path = _write(tmp_path, "leads.json", json.dumps({"leads": LEADS})[:-40])
+    with pytest.raises(ValueError):
+        list(iter_leads(path))
+
+
+def test_json_resumes_by_record_count(tmp_path, scanner):
+    path = _write(tmp_path, "leads.json", json.dumps({"leads": LEADS}))
+    items = list(iter_positioned(path, records=20))
+
+    assert [item for item, _ in items] == LEADS[20:]
+    assert items[0][1] == (None, 21)
+
+
+def test_jsonl_resumes_from_byte_offset_and_flags_bad_lines(tmp_path):
+    lines = [json.dumps(lead) for lead in LEADS[:5]]
+    lines.insert(2, "{not json")
+    path = _write(tmp_path, "leads.jsonl", "\n".join(lines) + "\n\n")
+
+    items = list(iter_positioned(path))
+    assert [item for item, _ in items] == LEADS[:2] + [{}] + LEADS[2:5]
+
+    offset, records = items[3][1]
+    resumed = list(iter_positioned(path, byte_offset=offset, records=records))
+    assert [item for item, _ in resumed] == LEADS[3:5]
+    assert resumed[-1][1] == items[-1][1]
+
+
+def test_csv_multiline_quoted_fields_and_resume(tmp_path):
+    text = (
+        "\ufeffname,email,pain_points\n"
+        'Ann,ann@x.com,"line one\nline ""two"""\n'
+        "Bob,bob@x.com,\n"
+        'Cy,cy@x.com,"a, b"\n'
+    )
+    path = _write(tmp_path, "leads.csv", text)
+
+    items = list(iter_positioned(path))
+    assert [item for item, _ in items] == [
+        {"name": "Ann", "email": "ann@x.com", "pain_points": 'line one\nline "two"'},
+        {"name": "Bob", "email": "bob@x.com", "pain_points": None},
+        {"name": "Cy", "email": "cy@x.com", "pain_points": "a, b"},
+    ]
+
+    offset, records = items[0][1]
+    resumed = list(iter_positioned(path, byte_offset=offset, records=records))
+    assert [item["name"] for item, _ in resumed] == ["Bob", "Cy"]
+    assert resumed[-1][1][1] == 3
+
+
+def test_prefetch_preserves_order_and_raises_reader_errors():
+    def reader():
+        yield from range(100)
+        raise ValueError("bad file")
+
+    seen = []
+    with pytest.raises(ValueError):
+        for item in prefetch(reader(), maxsize=4):
+            seen.append(item)
+    assert seen == list(range(100))
+
+
+def test_prefetch_stops_producer_when_consumer_quits():
+    produced = []
+
+    def reader():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+
+    items = prefetch(reader(), maxsize=2)
+    assert next(items) == 0
+    items.close()
+
+    assert not any(t.name == "lead-reader" and t.is_alive() for t in threading.enumerate())
+    assert len(produced) < 100
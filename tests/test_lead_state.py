@@ -0,0 +1,201 @@
+# tests/test_lead_state.py
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import leases
+from llm_client import LLMError, LLMTimeout
+from lead_state import (
+    next_action_for,
+    schedule_next_action,
+    status_before_draft,
+    due,
+    backfill_next_actions,
+    INITIAL_DRAFT,
+    FOLLOWUP,
+    POST_REPLY_FOLLOWUP,
+    FOLLOWUP_DELAY,
+    POST_REPLY_WAIT,
+    MAX_FOLLOWUPS,
+)
+from models import Lead
+
+NOW = datetime(2024, 6, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def _lead(**fields):
+    values = dict(
+        status="NEW",
+        draft_ready=False,
+        last_email_sent=None,
+        followup_count=0,
+        awaiting_reply=False,
+        last_ai_reply_sent=None,
+    )
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_new_lead_needs_initial_draft_now():
+    assert next_action_for(_lead(), NOW) == (INITIAL_DRAFT, NOW)
+    assert next_action_for(_lead(draft_ready=True), NOW) == (None, None)
+
+
+def test_followup_is_due_after_delay_for_naive_timestamps():
+    sent = NOW.replace(tzinfo=None)
+    lead = _lead(status="EMAIL_SENT", last_email_sent=sent, followup_count=1)
+
+    assert next_action_for(lead, NOW) == (FOLLOWUP, NOW + FOLLOWUP_DELAY)
+
+
+def test_followups_stop_at_max():
+    lead = _lead(status="FOLLOWUP_SENT", last_email_sent=NOW, followup_count=MAX_FOLLOWUPS)
+    assert next_action_for(lead, NOW) == (None, None)
+
+
+def test_post_reply_followup():
+    lead = _lead(status="QUALIFIED", awaiting_reply=True, last_ai_reply_sent=NOW)
+    assert next_action_for(lead, NOW) == (POST_REPLY_FOLLOWUP, NOW + POST_REPLY_WAIT)
+
+
+def test_closed_and_draft_ready_leads_have_no_action():
+    assert next_action_for(_lead(status="CLOSED"), NOW) == (None, None)
+    assert next_action_for(_lead(status="DRAFT_READY"), NOW) == (None, None)
+
+
+def _add(session, email, **fields):
+    lead = Lead(name=email, email=email, **fields)
+    session.add(lead)
+    return lead
+
+
+def test_due_selects_only_leads_whose_action_is_due(db):
+    session = db()
+    early = _add(session, "a@x.com", status="EMAIL_SENT", last_email_sent=NOW - timedelta(hours=1))
+    late = _add(session, "b@x.com", status="EMAIL_SENT", last_email_sent=NOW)
+    for lead in (early, late):
+        schedule_next_action(lead, NOW)
+    session.commit()
+
+    found = session.query(Lead.email).filter(*due(FOLLOWUP, NOW)).all()
+    assert found == [("a@x.com",)]
+
+
+def test_backfill_next_actions(db):
+    session = db()
+    _add(session, "a@x.com", status="NEW")
+    _add(session, "b@x.com", status="CLOSED")
+    session.commit()
+
+    assert backfill_next_actions(session, batch_size=1) == 1
+    assert session.query(Lead).filter_by(email="a@x.com").one().next_action == INITIAL_DRAFT
+
+
+def test_claim_skips_leased_leads_and_release_frees_them(db):
+    session = db()
+    for i in range(3):
+        lead = _add(session, f"l{i}@x.com", status="NEW")
+        schedule_next_action(lead)
+    session.commit()
+
+    first = leases.claim_leads(session, *due(INITIAL_DRAFT), limit=2)
+    second = leases.claim_leads(session, *due(INITIAL_DRAFT), limit=2)
+    assert [job.email for job in first] == ["l0@x.com", "l1@x.com"]
+    assert [job.email for job in second] == ["l2@x.com"]
+    assert leases.claim_leads(session, *due(INITIAL_DRAFT)) == []
+
+    lead = leases.owned_lead(session, first[0].id)
+    assert lead is not None and lead.claimed_by == leases.WORKER_ID
+    leases.release(lead)
+    session.commit()
+
+    assert [job.email for job in leases.claim_leads(session, *due(INITIAL_DRAFT))] == ["l0@x.com"]
+
+
+def test_expired_lease_is_reclaimed_and_no_longer_owned(db):
+    session = db()
+    lead = _add(session, "a@x.com", status="NEW")
+    schedule_next_action(lead)
+    session.commit()
+
+    [job] = leases.claim_leads(session, *due(INITIAL_DRAFT))
+    lead = session.get(Lead, job.id)
+    lead.lease_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    session.commit()
+
+    assert leases.owned_lead(session, job.id) is None
+    assert [j.id for j in leases.claim_leads(session, *due(INITIAL_DRAFT))] == [job.id]
+
+
+def _claimed(session):
+    lead = _add(session, "a@x.com", status="NEW")
+    schedule_next_action(lead)
+    session.commit()
+    [job] = leases.claim_leads(session, *due(INITIAL_DRAFT))
+    return job
+
+
+def test_transient_draft_failure_keeps_the_lease_uncounted(db):
+    session = db()
+    job = _claimed(session)
+
+    leases.record_draft_failure(session, job, LLMTimeout("timed out"))
+
+    lead = session.get(Lead, job.id)
+    assert lead.draft_attempts is None
+    assert leases.owned_lead(session, job.id) is not None
+
+
+def test_failed_drafts_are_counted_then_parked(db, monkeypatch):
+    monkeypatch.setattr(leases, "MAX_DRAFT_ATTEMPTS", 2)
+    session = db()
+    job = _claimed(session)
+
+    leases.record_draft_failure(session, job, ValueError("unparseable"))
+    lead = session.get(Lead, job.id)
+    assert (lead.draft_attempts, lead.draft_error, lead.next_action) == (1, None, INITIAL_DRAFT)
+    assert lead.claimed_by == leases.WORKER_ID   # retried once the lease expires
+
+    leases.record_draft_failure(session, job, ValueError("unparseable"))
+    assert (lead.draft_attempts, lead.draft_error, lead.next_action) == (2, "unparseable", None)
+    assert lead.claimed_by is None
+
+
+def test_permanent_llm_error_parks_the_lead_at_once(db):
+    session = db()
+    job = _claimed(session)
+
+    leases.record_draft_failure(session, job, LLMError("OpenRouter HTTP 401", status_code=401))
+
+    lead = session.get(Lead, job.id)
+    assert (lead.draft_attempts, lead.next_action, lead.claimed_by) == (1, None, None)
+    assert session.query(Lead).filter(*due(INITIAL_DRAFT)).count() == 0
+
+    # 🔁 dashboard retry
+    leases.clear_draft_failure(lead)
+    schedule_next_action(lead)
+    session.commit()
+    assert [j.id for j in leases.claim_leads(session, *due(INITIAL_DRAFT))] == [job.id]
+
+
+@pytest.mark.parametrize(
+    "fields, status, action",
+    [
+        (dict(draft_type="initial"), "NEW", INITIAL_DRAFT),
+        (dict(draft_type="followup", last_email_sent=NOW, followup_count=0), "EMAIL_SENT", FOLLOWUP),
+        (dict(draft_type="followup", last_email_sent=NOW, followup_count=2), "FOLLOWUP_SENT", FOLLOWUP),
+        (dict(draft_type="reply", last_email_sent=NOW), "QUALIFIED", None),
+    ],
+)
+def test_discarded_draft_is_rescheduled_from_its_previous_status(fields, status, action):
+    lead = _lead(status="DRAFT_READY", draft_ready=True, **fields)
+
+    # what the dashboard's Discard does
+    lead.status = status_before_draft(lead)
+    lead.draft_ready = False
+    lead.draft_type = None
+    schedule_next_action(lead, NOW)
+
+    assert lead.status == status
+    assert lead.next_action == action
@@ -0,0 +1,117 @@
+# tests/test_llm_cache.py
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import llm_cache
+from llm_cache import cache_key, cached_completion, evict_llm_cache
+from models import LLMCacheEntry
+from prompts import INTENT, INITIAL_EMAIL
+
+
+@pytest.fixture
+def cache(db, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", True)
+    monkeypatch.setattr(llm_cache, "_memory", OrderedDict())
+    return db
+
+
+def test_key_depends_on_template_model_and_messages():
+    messages = INTENT.render(text="hello")
+    key = cache_key(INTENT, "m1", messages)
+
+    assert key == cache_key(INTENT, "m1", INTENT.render(text="hello"))
+    assert key != cache_key(INTENT, "m2", messages)
+    assert key != cache_key(INTENT, "m1", INTENT.render(text="hello!"))
+    assert key != cache_key(INITIAL_EMAIL, "m1", messages)
+    assert len(key) == 64
+
+
+def test_miss_then_hit_from_memory_and_db(cache):
+    calls = []
+    messages = INTENT.render(text="hi")
+
+    def complete():
+        calls.append(1)
+        return "Interested"
+
+    assert cached_completion(INTENT, messages, complete, model="m") == "Interested"
+    assert cached_completion(INTENT, messages, complete, model="m") == "Interested"
+    assert len(calls) == 1
+
+    llm_cache._memory.clear()          # new process: served from the table
+    assert cached_completion(INTENT, messages, complete, model="m") == "Interested"
+    assert len(calls) == 1
+
+    session = cache()
+    assert session.get(LLMCacheEntry, cache_key(INTENT, "m", messages)).hits == 1
+
+
+def test_regenerate_bypasses_and_overwrites(cache):
+    answers = iter(["first", "second"])
+    messages = INTENT.render(text="hi")
+
+    cached_completion(INTENT, messages, lambda: next(answers), model="m")
+    assert cached_completion(INTENT, messages, lambda: next(answers), model="m", regenerate=True) == "second"
+    assert cached_completion(INTENT, messages, lambda: "unused", model="m") == "second"
+
+
+def test_invalid_output_is_not_cached(cache):
+    messages = INTENT.render(text="hi")
+
+    def reject(content):
+        raise ValueError("unusable")
+
+    with pytest.raises(ValueError):
+        cached_completion(INTENT, messages, lambda: "garbage", model="m", validate=reject)
+    assert llm_cache.get(cache_key(INTENT, "m", messages)) is None
+
+
+def test_expired_entries_miss_and_are_evicted(cache, monkeypatch):
+    messages = INTENT.render(text="hi")
+    key = cache_key(INTENT, "m", messages)
+    llm_cache.put(key, INTENT, "m", "Pricing")
+
+    session = cache()
+    row = session.get(LLMCacheEntry, key)
+    row.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    session.commit()
+    session.close()
+    llm_cache._memory.clear()
+
+    assert llm_cache.get(key) is None
+    assert evict_llm_cache() == 1
+
+
+def test_eviction_drops_least_recently_used_overflow(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_ROWS", 2)
+    keys = [cache_key(INTENT, "m", INTENT.render(text=str(i))) for i in range(3)]
+    for key in keys:
+        llm_cache.put(key, INTENT, "m", "Question")
+
+    llm_cache._memory.clear()
+    llm_cache.get(keys[0])             # touched: most recently used
+
+    assert evict_llm_cache() == 1
+    session = cache()
+    remaining = {row.key for row in session.query(LLMCacheEntry)}
+    assert remaining == {keys[0], keys[2]}
+
+
+def test_memory_lru_is_bounded(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MEMORY_SIZE", 2)
+    for i in range(3):
+        llm_cache.put(f"k{i}", INTENT, "m", "Question")
+
+    assert list(llm_cache._memory) == ["k1", "k2"]
+
+
+def test_disabled_cache_always_calls(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", False)
+    calls = []
+    messages = INTENT.render(text="hi")
+
+    for _ in range(2):
+        cached_completion(INTENT, messages, lambda: calls.append(1) or "Question", model="m")
+    assert len(calls) == 2
@@ -0,0 +1,129 @@
+# tests/test_llm_guard.py
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import llm_guard
+from llm_guard import CircuitBreaker, AdaptiveConcurrency, backoff_delay, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+
+
+def test_backoff_is_full_jitter_with_retry_after_floor():
+    assert backoff_delay(0, rng=lambda: 1.0) == llm_guard.LLM_RETRY_BASE_SECONDS
+    assert backoff_delay(3, rng=lambda: 0.5) == pytest.approx(0.5 * 8 * llm_guard.LLM_RETRY_BASE_SECONDS)
+    assert backoff_delay(30, rng=lambda: 1.0) == llm_guard.LLM_RETRY_MAX_SECONDS
+    assert backoff_delay(0, retry_after=12, rng=lambda: 0.1) == 12
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()           # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_breaker_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()         # second caller waits for the probe
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_doubles_cooldown_up_to_max(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, max_cooldown=25, clock=clock)
+    breaker.record_failure()
+
+    for expected in (20, 25, 25):
+        clock.now += breaker.cooldown
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.cooldown == expected
+
+    clock.now += breaker.cooldown
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.cooldown == 10
+
+
+def test_aimd_halves_once_per_burst_and_grows_back(clock):
+    limiter = AdaptiveConcurrency(max_limit=8, clock=clock)
+
+    limiter.on_throttled()
+    limiter.on_throttled()             # same burst
+    assert limiter.limit == 4
+
+    clock.now = llm_guard.DECREASE_INTERVAL
+    limiter.on_throttled()
+    assert limiter.limit == 2
+
+    for _ in range(3):
+        limiter.on_throttled()
+        clock.now += llm_guard.DECREASE_INTERVAL
+    assert limiter.limit == 1          # floor
+
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 8          # ceiling
+
+
+def test_aimd_acquire_blocks_at_the_limit(clock):
+    limiter = AdaptiveConcurrency(max_limit=1, clock=clock)
+    limiter.acquire()
+
+    entered = threading.Event()
+
+    def worker():
+        limiter.acquire()
+        entered.set()
+        limiter.release()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not entered.wait(0.05)
+
+    limiter.release()
+    assert entered.wait(1)
+    thread.join()
+    assert limiter.in_flight == 0
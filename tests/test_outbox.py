@@ -0,0 +1,91 @@
+# tests/test_outbox.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from lead_state import FOLLOWUP, schedule_next_action
+from models import Lead, OutboxEmail
+from outbox import enqueue_email, _record_results, send_errors_by_lead, MAX_SEND_ATTEMPTS
+
+
+@pytest.fixture
+def session(db):
+    session = db()
+    yield session
+    session.close()
+
+
+def _queued(session, draft_type, **fields):
+    """A lead as the dashboard's Send button leaves it"""
+    lead = Lead(email="jane@example.com", name="Jane", **fields)
+    session.add(lead)
+    session.flush()
+
+    row = enqueue_email(session, lead, "Hello", "Hi Jane", draft_type)
+    lead.draft_ready = False
+    lead.last_email_sent = datetime.now(timezone.utc)
+    if draft_type == "initial":
+        lead.status = "EMAIL_SENT"
+    elif draft_type == "followup":
+        lead.status = "FOLLOWUP_SENT"
+        lead.followup_count += 1
+    else:
+        lead.awaiting_reply = True
+        lead.last_ai_reply_sent = datetime.now(timezone.utc)
+    schedule_next_action(lead)
+    session.commit()
+    return lead, row
+
+
+def _fail(session, row, attempts, error="550 mailbox unavailable"):
+    row.attempts = attempts
+    session.commit()
+    _record_results(session, [({"id": row.id}, error)])
+
+
+def test_retryable_failure_keeps_the_lead_scheduled(session):
+    lead, row = _queued(session, "initial", status="DRAFT_READY")
+
+    _fail(session, row, attempts=1)
+
+    assert row.status == "PENDING"
+    assert row.next_attempt_at is not None
+    assert (lead.status, lead.next_action) == ("EMAIL_SENT", FOLLOWUP)
+
+
+def test_final_failure_puts_the_email_back_as_a_draft(session):
+    lead, row = _queued(session, "initial", status="DRAFT_READY")
+
+    _fail(session, row, attempts=MAX_SEND_ATTEMPTS)
+
+    assert row.status == "FAILED"
+    assert lead.status == "SEND_FAILED"
+    assert lead.next_action is None        # no follow-up for an undelivered email
+    assert (lead.draft_ready, lead.draft_type, lead.draft_subject, lead.draft_body) == (True, "initial", "Hello", "Hi Jane")
+    assert send_errors_by_lead(session, [lead.id]) == {lead.id: "550 mailbox unavailable"}
+
+
+def test_final_failure_reverts_followup_count_and_reply_wait(session):
+    lead, row = _queued(session, "followup", status="DRAFT_READY", followup_count=1)
+    _fail(session, row, attempts=MAX_SEND_ATTEMPTS)
+    assert lead.followup_count == 1
+
+    session.delete(lead)
+    session.commit()
+
+    lead, row = _queued(session, "reply", status="DRAFT_READY")
+    _fail(session, row, attempts=MAX_SEND_ATTEMPTS)
+    assert lead.awaiting_reply is False
+    assert lead.next_action is None
+
+
+def test_send_errors_by_lead_ignores_other_rows(session):
+    lead, row = _queued(session, "initial", status="DRAFT_READY")
+    row.status = "SENT"
+    session.add(OutboxEmail(lead_id=lead.id, to_email=lead.email, subject="s", body="b", type="initial",
+                            status="FAILED", attempts=5, last_error="timed out",
+                            created_at=datetime.now(timezone.utc) - timedelta(days=1)))
+    session.commit()
+
+    assert send_errors_by_lead(session, [lead.id]) == {lead.id: "timed out"}
+    assert send_errors_by_lead(session, []) == {}
@@ -0,0 +1,166 @@
+# tests/test_rate_limiter.py
+import smtplib
+
+import pytest
+
+import metrics
+from rate_limiter import (
+    TokenBucket,
+    SendRateLimiter,
+    is_throttle_response,
+    MIN_RATE_FACTOR,
+    RECOVERY_STEP,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_spends_burst_then_reserves(clock):
+    bucket = TokenBucket(rate_per_sec=1.0, capacity=3, clock=clock)
+
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(1.0)
+    assert bucket.take() == pytest.approx(2.0)   # reservations queue up
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_sec=2.0, capacity=2, clock=clock)
+    bucket.take()
+    bucket.take()
+
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.now += 60
+    bucket.take()
+    assert bucket.tokens == pytest.approx(1.0)   # capped at capacity
+
+
+def test_slow_down_halves_rate_and_drops_burst(clock):
+    bucket = TokenBucket(rate_per_sec=1.0, capacity=5, clock=clock)
+    bucket.slow_down()
+
+    assert bucket.rate == pytest.approx(0.5)
+    assert bucket.take() == pytest.approx(2.0)   # no saved-up burst left
+
+    for _ in range(20):
+        bucket.slow_down()
+    assert bucket.factor == pytest.approx(MIN_RATE_FACTOR)
+
+
+def test_recover_steps_back_to_full_rate(clock):
+    bucket = TokenBucket(rate_per_sec=1.0, capacity=1, clock=clock)
+    bucket.slow_down()
+    bucket.recover()
+    assert bucket.factor == pytest.approx(0.5 + RECOVERY_STEP)
+
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.factor == 1.0
+
+
+def _limiter(clock, **kwargs):
+    options = dict(
+        account_rate_per_min=60,
+        account_burst=2,
+        domain_rate_per_min=30,
+        domain_burst=1,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    options.update(kwargs)
+    return SendRateLimiter(**options)
+
+
+def test_acquire_waits_for_the_slowest_bucket(clock):
+    limiter = _limiter(clock)
+
+    assert limiter.acquire("me@x.com", "a@gmail.com") == 0.0
+    # account still has a token, the gmail.com bucket needs 2s (30/min)
+    assert limiter.acquire("me@x.com", "b@gmail.com") == pytest.approx(2.0)
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_domains_are_paced_independently(clock):
+    limiter = _limiter(clock, account_burst=10)
+
+    assert limiter.acquire("me@x.com", "a@gmail.com") == 0.0
+    assert limiter.acquire("me@x.com", "a@outlook.com") == 0.0
+    assert limiter.acquire("me@x.com", "b@GMAIL.com") == pytest.approx(2.0)
+
+
+def test_throttle_slows_both_buckets_and_success_recovers(clock):
+    limiter = _limiter(clock)
+    limiter.on_throttled("me@x.com", "a@gmail.com")
+
+    account, domain = limiter._buckets("me@x.com", "a@gmail.com")
+    assert account.factor == domain.factor == pytest.approx(0.5)
+
+    limiter.on_success("me@x.com", "a@gmail.com")
+    assert account.factor == pytest.approx(0.5 + RECOVERY_STEP)
+
+
+def test_smtp_data_error_counts_as_throttling():
+    assert is_throttle_response(smtplib.SMTPDataError(550, b"rate limited"))
+    assert is_throttle_response(smtplib.SMTPResponseException(421, b"try later"))
+    assert not is_throttle_response(smtplib.SMTPResponseException(535, b"auth"))
+    assert not is_throttle_response(smtplib.SMTPServerDisconnected("gone"))
+
+
+def test_waiting_gauge_and_wait_seconds(clock):
+    waiting_during_sleep = []
+
+    def sleep(seconds):
+        waiting_during_sleep.append(metrics.get("smtp_send_waiting"))
+        clock.sleep(seconds)
+
+    limiter = _limiter(clock, sleep=sleep)
+    waited_before = metrics.get("smtp_send_wait_seconds")
+    queued_before = metrics.get("smtp_send_waiting")
+
+    limiter.acquire("me@x.com", "a@gmail.com")
+    limiter.acquire("me@x.com", "b@gmail.com")
+
+    assert waiting_during_sleep == [queued_before + 1]
+    assert metrics.get("smtp_send_waiting") == queued_before
+    assert metrics.get("smtp_send_wait_seconds") - waited_before == pytest.approx(2.0)
+
+
+def test_send_email_slows_down_on_data_error_and_recovers_on_success(clock, monkeypatch):
+    import email_sender
+
+    limiter = _limiter(clock, account_burst=10, domain_burst=10)
+    outcomes = [smtplib.SMTPDataError(451, b"slow down"), None]
+
+    class Pool:
+        def send_message(self, msg):
+            outcome = outcomes.pop(0)
+            if outcome:
+                raise outcome
+
+    monkeypatch.setenv("SMTP_EMAIL", "me@x.com")
+    monkeypatch.setenv("SMTP_PASSWORD", "pw")
+    monkeypatch.setattr(email_sender, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(email_sender, "get_smtp_pool", lambda: Pool())
+
+    assert email_sender.send_email("a@gmail.com", "s", "b") is False
+    account, domain = limiter._buckets("me@x.com", "a@gmail.com")
+    assert account.factor == domain.factor == pytest.approx(0.5)
+
+    assert email_sender.send_email("a@gmail.com", "s", "b") is True
+    assert domain.factor == pytest.approx(0.5 + RECOVERY_STEP)
@@ -0,0 +1,154 @@
+# tests/test_reply_listener.py
+import pytest
+
+import reply_listener
+from models import MailboxSyncState
+
+FETCH_TEXTS = reply_listener._fetch_texts   # the fixture stubs it out
+
+
+class FakeMail:
+    """UID SEARCH / STATUS over a fixed set of UIDs, some of them unseen"""
+
+    def __init__(self, uids, unseen=None, uidvalidity=7):
+        self.uids = sorted(uids)
+        self.unseen = sorted(unseen if unseen is not None else uids)
+        self.uidvalidity = uidvalidity
+
+    def response(self, code):
+        return code, [str(self.uidvalidity).encode()]
+
+    def status(self, folder, items):
+        uidnext = (self.uids[-1] if self.uids else 0) + 1
+        return "OK", [f"INBOX (UIDNEXT {uidnext})".encode()]
+
+    def uid(self, command, charset, criteria):
+        if criteria == "(UNSEEN)":
+            found = self.unseen
+        else:
+            low = int(criteria.split()[1].split(":")[0])
+            found = [u for u in self.uids if u >= low] or self.uids[-1:]
+        return "OK", [" ".join(map(str, found)).encode()]
+
+
+@pytest.fixture
+def mailbox(monkeypatch):
+    """Stubs the fetch helpers; `failing` holds UIDs whose processing raises"""
+    state = {"ingested": [], "texts": {}, "failing": set()}
+
+    def fetch_batch(mail, uids, uidvalidity):
+        return {uid: ({}, f"<{uid}@test>", None, None) for uid in uids}
+
+    def ingest(session, headers, text, message_id, lead_id):
+        uid = int(message_id[1:].split("@")[0])
+        if uid in state["failing"]:
+            raise RuntimeError("database unavailable")
+        state["ingested"].append(uid)
+        state["texts"][uid] = text
+
+    monkeypatch.setattr(reply_listener, "_fetch_batch", fetch_batch)
+    monkeypatch.setattr(reply_listener, "_processed_ids", lambda session, ids: set())
+    monkeypatch.setattr(reply_listener, "_match_leads", lambda session, messages: {})
+    monkeypatch.setattr(reply_listener, "_fetch_texts", lambda mail, parts: {})
+    monkeypatch.setattr(reply_listener, "_ingest_message", ingest)
+    return state
+
+
+def _sync(db, mail):
+    session = db()
+    try:
+        reply_listener._process_mailbox(mail, session)
+    finally:
+        session.close()
+
+    session = db()
+    try:
+        return session.get(MailboxSyncState, reply_listener.IMAP_FOLDER)
+    finally:
+        session.close()
+
+
+def test_failed_message_is_fetched_again_on_next_sync(db, mailbox):
+    mail = FakeMail([10, 11, 12])
+    mailbox["failing"] = {11}
+
+    state = _sync(db, mail)
+    assert mailbox["ingested"] == [10]
+    assert state.last_uid == 10          # never past the failed UID
+    assert state.failed_uid == 11
+
+    mailbox["failing"] = set()
+    state = _sync(db, mail)
+    assert mailbox["ingested"] == [10, 11, 12]
+    assert state.last_uid == 12
+    assert state.failed_uid is None
+
+
+def test_poison_message_is_skipped_after_max_attempts(db, mailbox, monkeypatch):
+    monkeypatch.setattr(reply_listener, "MAX_MESSAGE_ATTEMPTS", 3)
+    mail = FakeMail([10, 11, 12])
+    mailbox["failing"] = {11}
+
+    for _ in range(2):
+        state = _sync(db, mail)
+        assert state.last_uid == 10
+
+    state = _sync(db, mail)          # third failure: skip it, carry on
+    assert state.last_uid == 12
+    assert mailbox["ingested"] == [10, 12]
+
+
+def test_first_sync_starts_below_first_unseen(db, mailbox):
+    mail = FakeMail([1, 2, 3, 4, 5], unseen=[4, 5])
+    mailbox["failing"] = {4}
+
+    state = _sync(db, mail)
+    assert state.last_uid == 3           # retry searches 4:*, not the whole folder
+
+    mailbox["failing"] = set()
+    state = _sync(db, mail)
+    assert mailbox["ingested"] == [4, 5]
+
+
+def test_first_sync_without_unseen_starts_at_folder_end(db, mailbox):
+    state = _sync(db, FakeMail([1, 2, 3], unseen=[]))
+
+    assert state.last_uid == 3
+    assert mailbox["ingested"] == []
+
+
+class SectionFetchMail(FakeMail):
+    """Answers the text-section FETCH with `fetch_status`"""
+
+    fetch_status = "NO"
+
+    def uid(self, command, uid_set, spec):
+        if command != "FETCH":
+            return super().uid(command, uid_set, spec)
+        if self.fetch_status != "OK":
+            return self.fetch_status, [b"FETCH failed"]
+
+        data = []
+        for seq, uid in enumerate(uid_set.split(","), 1):
+            body = f"reply {uid}".encode()
+            data += [(f"{seq} (UID {uid} BODY[1]<0> {{{len(body)}}}".encode(), body), b")"]
+        return "OK", data
+
+
+def test_failed_text_fetch_does_not_ingest_empty_replies(db, mailbox, monkeypatch):
+    monkeypatch.setattr(reply_listener, "_fetch_texts", FETCH_TEXTS)
+    monkeypatch.setattr(
+        reply_listener,
+        "_fetch_batch",
+        lambda mail, uids, uidvalidity: {uid: ({}, f"<{uid}@test>", ("1", "7bit", "utf-8"), None) for uid in uids},
+    )
+    mail = SectionFetchMail([10, 11])
+
+    state = _sync(db, mail)
+    assert mailbox["ingested"] == []
+    assert state.last_uid == 9           # nothing marked as processed
+
+    mail.fetch_status = "OK"
+    state = _sync(db, mail)
+    assert mailbox["texts"] == {10: "reply 10", 11: "reply 11"}
+    assert state.last_uid == 11